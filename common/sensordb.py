@@ -0,0 +1,200 @@
+"""
+SQLite sensor catalogue shared by the generators.
+
+One indexed database holds every known sensor (keyed like the genstate
+registry: '<site>:<topic>#<field>', so sites sharing topics keep their own
+rows) and the bindings of sensors to panel / SVG
+elements. It is filled in bulk by the Influx export (query_influxdb.py
+--catalogue) and by genstate (--catalogue), and read by genstate (a .db
+input instead of a values file) and generate_svg.py, so no generator has
+to reparse text files or hardcode the sensor list.
+
+Columns filled by one source never erase what another source knows: an
+Influx export adds last values to sensors genstate already named, and a
+genstate run adds names to sensors first seen in Influx. Rebuilds are
+incremental: every run upserts only its own rows.
+
+Usage from the scripts (the module is not installed):
+
+    sys.path.insert(0, os.path.join(<repo root>, "common"))
+    from sensordb import SensorDB
+"""
+import sqlite3
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sensors (
+    key TEXT PRIMARY KEY,
+    site TEXT,
+    name TEXT,
+    lbl TEXT,
+    topic TEXT NOT NULL,
+    field TEXT NOT NULL,
+    measurement TEXT,
+    device TEXT,
+    keyword TEXT,
+    data_type TEXT,
+    unit TEXT,
+    precision TEXT,
+    num_min TEXT,
+    num_max TEXT,
+    last_value TEXT,
+    source TEXT,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS sensors_site ON sensors (site);
+CREATE INDEX IF NOT EXISTS sensors_device ON sensors (device);
+CREATE INDEX IF NOT EXISTS sensors_keyword ON sensors (keyword);
+CREATE INDEX IF NOT EXISTS sensors_name ON sensors (name);
+CREATE INDEX IF NOT EXISTS sensors_field ON sensors (field);
+
+CREATE TABLE IF NOT EXISTS bindings (
+    target TEXT NOT NULL,
+    element_id TEXT NOT NULL,
+    field TEXT NOT NULL,
+    alias TEXT,
+    kind TEXT,
+    format TEXT,
+    sensor_key TEXT,
+    PRIMARY KEY (target, element_id)
+);
+CREATE INDEX IF NOT EXISTS bindings_field ON bindings (field);
+"""
+
+# PRAGMA user_version of the current key format; 0 keyed sensors by topic and field only
+KEY_VERSION = 1
+
+SENSOR_COLUMNS = ("key", "site", "name", "lbl", "topic", "field", "measurement", "device", "keyword",
+                  "data_type", "unit", "precision", "num_min", "num_max", "last_value", "source", "updated_at")
+
+# Record (genstate) attribute -> catalogue column
+RECORD_COLUMNS = {"name": "name", "lbl": "lbl", "device": "device", "keyword": "keyword",
+                  "dataType": "data_type", "unit": "unit", "precision": "precision",
+                  "numMin": "num_min", "numMax": "num_max", "value": "last_value"}
+
+
+def sensor_key(site, topic, field):
+    """Catalogue key of a sensor; rows without a site keep the bare topic key."""
+    return f"{site}:{topic}#{field}" if site else f"{topic}#{field}"
+
+
+def _upsert_sql():
+    columns = ", ".join(SENSOR_COLUMNS)
+    placeholders = ", ".join(f":{column}" for column in SENSOR_COLUMNS)
+    # Known values are only ever replaced by other known values
+    updates = ", ".join(f"{column} = COALESCE(excluded.{column}, sensors.{column})"
+                        for column in SENSOR_COLUMNS if column != "key")
+    return f"INSERT INTO sensors ({columns}) VALUES ({placeholders}) ON CONFLICT(key) DO UPDATE SET {updates}"
+
+
+class SensorDB:
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        """Prefixes the keys of catalogues written before sensors were keyed per site."""
+        if self.connection.execute("PRAGMA user_version").fetchone()[0] >= KEY_VERSION:
+            return
+        with self.connection:
+            self.connection.execute("UPDATE bindings SET sensor_key = COALESCE((SELECT site || ':' || key FROM sensors "
+                                    "WHERE key = bindings.sensor_key AND site IS NOT NULL AND site != ''), "
+                                    "sensor_key)")
+            self.connection.execute("UPDATE sensors SET key = site || ':' || key WHERE site IS NOT NULL AND site != ''")
+            self.connection.execute(f"PRAGMA user_version = {KEY_VERSION}")
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # Writing
+
+    def upsert_sensors(self, rows, source=None):
+        """
+        Inserts or updates sensors in one transaction. rows are dicts with at
+        least 'topic' and 'field' and any of the other catalogue columns.
+        Returns the number of rows written.
+        """
+        now = time.time()
+
+        def complete(row):
+            full = dict.fromkeys(SENSOR_COLUMNS)
+            full.update(row)
+            full["key"] = full["key"] or sensor_key(full["site"], row["topic"], row["field"])
+            full["source"] = full["source"] or source
+            full["updated_at"] = now
+            return full
+
+        with self.connection:
+            return self.connection.executemany(_upsert_sql(), (complete(row) for row in rows)).rowcount
+
+    def upsert_records(self, records, site, source=None, measurement=None):
+        """Stores genstate sensor records (Sensor objects or record dicts) for a site."""
+        def rows():
+            for record in records:
+                row = {"site": site, "topic": record["topic"], "field": record["field"],
+                       "measurement": measurement or site}
+                for attribute, column in RECORD_COLUMNS.items():
+                    value = record.get(attribute)
+                    row[column] = None if value in (None, "") else str(value)
+                yield row
+        return self.upsert_sensors(rows(), source=source)
+
+    def set_bindings(self, target, bindings):
+        """
+        Replaces the element bindings of one target (an SVG or panel). bindings
+        are dicts with 'element_id', 'field' and optionally 'alias' (the name
+        the panel script uses), 'kind', 'format' and 'sensor_key'.
+        """
+        with self.connection:
+            self.connection.execute("DELETE FROM bindings WHERE target = ?", (target,))
+            self.connection.executemany(
+                "INSERT INTO bindings (target, element_id, field, alias, kind, format, sensor_key) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(target, b["element_id"], b["field"], b.get("alias"), b.get("kind"), b.get("format"),
+                  b.get("sensor_key")) for b in bindings])
+
+    # Reading
+
+    def sensors(self, site=None, device=None, keyword=None, field=None):
+        """Returns the matching sensors (sqlite3.Row, in insertion order)."""
+        clauses, params = [], []
+        for column, value in (("site", site), ("device", device), ("keyword", keyword), ("field", field)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self.connection.execute(f"SELECT * FROM sensors{where} ORDER BY rowid", params).fetchall()
+
+    def sensor(self, key):
+        return self.connection.execute("SELECT * FROM sensors WHERE key = ?", (key,)).fetchone()
+
+    def by_name(self, name):
+        return self.connection.execute("SELECT * FROM sensors WHERE name = ?", (name,)).fetchone()
+
+    def value_rows(self, site=None):
+        """Yields (value, field, measurement, topic) rows like a values file."""
+        for row in self.sensors(site=site):
+            yield row["last_value"] or "", row["field"], row["measurement"] or "", row["topic"]
+
+    def bindings(self, target):
+        """Returns the bindings of a target as dicts, in element order."""
+        rows = self.connection.execute(
+            "SELECT element_id, field, alias, kind, format, sensor_key FROM bindings WHERE target = ? ORDER BY rowid",
+            (target,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def fields(self, site=None):
+        """Distinct field names, optionally of one site."""
+        query = "SELECT DISTINCT field FROM sensors" + (" WHERE site = ?" if site else "") + " ORDER BY field"
+        return [row["field"] for row in self.connection.execute(query, (site,) if site else ())]
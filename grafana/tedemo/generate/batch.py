@@ -0,0 +1,193 @@
+"""
+Batch panel generation for many units.
+
+A batch source is either a directory of unit files (one unit per *.json,
+named after the file unless it sets "name") or one JSON file holding a
+list of units (or {"units": [...]}). See generate_svg.unit_config for the
+unit keys.
+
+Panels are rendered in worker processes, one <name>.svg per unit in the
+output directory, with the unit's minified panel scripts
+(<name>.init.js, <name>.render.js) and binding manifest
+(<name>.bindings.json) next to it. Generation is deterministic (particles are seeded per
+unit), and manifest.json there records for every panel a hash of its
+configuration together with the generator sources (this script, styles,
+panel scripts) and the sha256 of the written file:
+
+- a unit whose config hash is unchanged and whose file still has the
+  recorded content is not rendered again
+- a rendered panel identical to the existing file is not rewritten
+- the sha256 serves as ETag, and as a version (e.g. te.svg?v=<sha256[:12]>)
+  under which the panel can be cached indefinitely
+
+A failing unit is reported and does not stop the others.
+"""
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from generate_svg import (build_panel, bundle_scripts, content_hash, optimize_panel, unit_config,
+                          write_binding_manifest, write_svg_if_changed)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MANIFEST = "manifest.json"
+# Files whose content shapes every panel
+GENERATOR_SOURCES = ("generate_svg.py", "optimize_svg.py", os.path.join("style", "defs.xml"), "js")
+
+
+def generator_digest():
+    """Hash of the generator sources; changing any of them invalidates every panel."""
+    digest = hashlib.sha256()
+    for source in GENERATOR_SOURCES:
+        path = os.path.join(HERE, source)
+        paths = sorted(os.path.join(path, name) for name in os.listdir(path)) if os.path.isdir(path) else [path]
+        for file_path in paths:
+            digest.update(os.path.relpath(file_path, HERE).encode())
+            with open(file_path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def config_hash(unit, generator, optimize=None):
+    text = json.dumps([unit, optimize], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{generator}\n{text}".encode()).hexdigest()
+
+
+def discover_units(source, out_dir="panels", optimize=None, overrides=None):
+    """
+    Returns the unit jobs described by a directory or a units file.
+    optimize is the precision of the optimiser, None to not optimise;
+    overrides are unit keys (e.g. seed, profile) set on every unit.
+    """
+    units = []
+    if os.path.isdir(source):
+        for entry in sorted(os.listdir(source)):
+            stem, ext = os.path.splitext(entry)
+            if ext.lower() == ".json":
+                units.append((stem, os.path.join(source, entry)))
+    else:
+        with open(source, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+        if isinstance(entries, dict):
+            entries = entries["units"]
+        units = [(f"unit{i}", entry) for i, entry in enumerate(entries, 1)]
+
+    jobs = []
+    for default_name, unit in units:
+        job = {"name": default_name, "unit": None, "output": None, "optimize": optimize, "error": None}
+        try:
+            if isinstance(unit, str):
+                with open(unit, 'r', encoding='utf-8') as f:
+                    unit = json.load(f)
+            job["unit"] = unit_config(dict({"name": default_name}, **unit, **(overrides or {})))
+            job["name"] = job["unit"]["name"]
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            job["error"] = f"{type(e).__name__}: {e}"
+        job["output"] = os.path.join(out_dir, f"{job['name']}.svg")
+        jobs.append(job)
+    return jobs
+
+
+def _result(job, status, error=None):
+    return {"name": job["name"], "output": job["output"], "status": status, "seconds": 0.0,
+            "bytes": 0, "saved": 0, "elements": 0, "sha256": None, "error": error}
+
+
+def render_unit(job):
+    """Worker: builds and writes one panel. Never raises."""
+    result = _result(job, "generated")
+    started = time.perf_counter()
+    try:
+        svg, _ = build_panel(job["unit"])
+        if job["optimize"] is not None:
+            _, before, after = optimize_panel(svg, job["unit"], job["optimize"])
+            result["saved"] = before - after
+        result["elements"] = sum(1 for _ in svg.iter())
+        result["sha256"], result["bytes"], written = write_svg_if_changed(svg, job["output"])
+        stem = os.path.splitext(job["output"])[0]
+        for suffix, code in zip((".init.js", ".render.js"), bundle_scripts(job["unit"])):
+            with open(stem + suffix, 'w', encoding='utf-8') as f:
+                f.write(code)
+        write_binding_manifest(job["unit"], stem + ".bindings.json")
+        if not written:
+            result["status"] = "unchanged"
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def _load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def run_batch(jobs, out_dir="panels", workers=None, force=False):
+    """
+    Renders every job whose configuration or output changed (all with
+    force) in a process pool and updates the manifest. Results keep the
+    order of jobs.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    generator = generator_digest()
+    previous = _load_manifest(out_dir).get("panels", {})
+    configs = {}
+
+    results, pending = [], []
+    for job in jobs:
+        if job["error"] is not None:
+            results.append(_result(job, "failed", job["error"]))
+            continue
+        configs[job["name"]] = config_hash(job["unit"], generator, job["optimize"])
+        entry = previous.get(job["name"], {})
+        if (not force and entry.get("config") == configs[job["name"]]
+                and entry.get("sha256") and content_hash(job["output"]) == entry["sha256"]):
+            result = _result(job, "unchanged")
+            result["sha256"], result["bytes"] = entry["sha256"], entry.get("bytes", 0)
+            results.append(result)
+            continue
+        results.append(None)
+        pending.append((len(results) - 1, job))
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [(index, job, pool.submit(render_unit, job)) for index, job in pending]
+            for index, job, future in futures:
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    # The worker itself died (e.g. out of memory)
+                    results[index] = _result(job, "failed", f"{type(e).__name__}: {e}")
+
+    # Failed panels are left out so the next run retries them
+    panels = {result["name"]: {"config": configs[result["name"]], "output": os.path.basename(result["output"]),
+                               "sha256": result["sha256"], "bytes": result["bytes"]}
+              for result in results if result["status"] != "failed"}
+    with open(os.path.join(out_dir, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump({"generator": generator, "panels": panels}, f, indent=2, sort_keys=True)
+    return results
+
+
+def print_report(results, stream=sys.stderr):
+    """Prints per-panel timings and sizes, then a summary line."""
+    for result in results:
+        if result["status"] == "generated":
+            saved = f" ({result['saved']} saved)" if result["saved"] else ""
+            print(f"✓ {result['name']}: {result['elements']} elements, {result['bytes']} bytes{saved} "
+                  f"in {result['seconds']:.3f}s ({result['sha256'][:12]}) -> {result['output']}", file=stream)
+        elif result["status"] == "unchanged":
+            print(f"= {result['name']}: unchanged ({result['sha256'][:12]}) -> {result['output']}", file=stream)
+        else:
+            print(f"✗ {result['name']}: {result['error']}", file=stream)
+    counts = {status: sum(1 for result in results if result["status"] == status)
+              for status in ("generated", "unchanged", "failed")}
+    seconds = sum(result["seconds"] for result in results)
+    print(f"{counts['generated']} generated, {counts['unchanged']} unchanged, {counts['failed']} failed "
+          f"of {len(results)} units, {seconds:.2f}s generation time", file=stream)
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Benchmark and regression check for the SVG generator.
+
+Runs main() (a whole panel, written to a temporary directory) and the
+individual create_* builders at increasing component counts, and records
+for every case:
+
+- seconds   time per run, the best of --repeat timed loops (each at least
+            MIN_LOOP long; memoised geometry is cleared before every run,
+            so every run starts cold)
+- peak_kb   peak memory allocated during one run (tracemalloc)
+- bytes     size of the serialized output
+- elements  number of elements in the output
+
+The results are compared with the stored baseline (benchmark_baseline.json)
+and a case is flagged when a metric grows beyond its threshold: time by
+50% (--time-threshold) and memory by 25%, and by at least 1 ms / 64 KB,
+below which timer and allocator noise dominate; bytes and elements by
+1%. A case flagged for time or memory is measured again (up to RETRIES
+times, keeping its best values) before it counts, as load on a shared
+machine slows runs in bursts. Output size is deterministic, so a size
+regression is a real change and fails the run. Timings and memory depend
+on the machine the baseline was recorded on: their regressions are only
+reported, unless --strict (for a baseline recorded where the benchmark
+runs, with --update).
+
+Usage:
+    python benchmark.py                  # compare with the baseline, exit 1 on size regressions
+    python benchmark.py --strict         # also exit 1 on time/memory regressions
+    python benchmark.py --update         # record the current results as the baseline
+    python benchmark.py --json out.json  # also write the results
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import xml.etree.ElementTree as ET
+
+import generate_svg
+from generate_svg import (DEFAULT_UNIT, SymbolLibrary, create_defs, create_exhaust, create_fan, create_pressure_gauge,
+                          create_rpm_gauge, create_starfield, create_status_light, svg_bytes, unit_config)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(HERE, "benchmark_baseline.json")
+# metric -> (relative threshold, absolute threshold)
+THRESHOLDS = {
+    "seconds": (0.5, 0.001),
+    "peak_kb": (0.25, 64),
+    "bytes": (0.01, 0),
+    "elements": (0.01, 0),
+}
+# Shortest timed loop; builders take about a millisecond, too little to time one by one
+MIN_LOOP = 0.02
+# Re-measurements of a case flagged for time or memory
+RETRIES = 2
+NOISY = ("seconds", "peak_kb")
+# Metrics that don't depend on the machine; only these fail a run without --strict
+DETERMINISTIC = ("bytes", "elements")
+# Memoised geometry of the gauge engine
+CACHES = ("_arc_points", "_sector_points", "gauge_scale_geometry")
+
+
+def _document():
+    """An empty panel root with its defs and symbol library."""
+    svg = ET.Element("svg", {"xmlns": "http://www.w3.org/2000/svg", "viewBox": "0 0 100 100"})
+    return svg, SymbolLibrary(create_defs(svg))
+
+
+def _fans(count):
+    svg, library = _document()
+    for i in range(count):
+        create_fan(svg, 10 + 25 * i, 50, 10, 0.75, f"power-fan{i + 1}", "on" if i % 2 else "off", library=library)
+    return svg
+
+
+def _status_lights(count):
+    svg, library = _document()
+    for i in range(count):
+        create_status_light(svg, 5 + 10 * i, 71, f"status-{i}", "#00FF00", ("fuse", "feedback")[i % 2],
+                            library=library)
+    return svg
+
+
+def _rpm_gauge(ticks):
+    svg, library = _document()
+    create_rpm_gauge(svg, 40, 18, "fanspeed", library=library, num_ticks=ticks)
+    return svg
+
+
+def _pressure_gauge(ticks):
+    svg, library = _document()
+    create_pressure_gauge(svg, 40, -13, "pressure", library=library, num_ticks=ticks)
+    return svg
+
+
+def _exhaust(particles):
+    svg, _ = _document()
+    create_exhaust(svg, 10, 60, particles, 3, rng=random.Random(0))
+    return svg
+
+
+def _starfield(particles):
+    svg, _ = _document()
+    create_starfield(svg, particles, rng=random.Random(0))
+    return svg
+
+
+def _main(fans, out_dir):
+    """A whole panel with fans fans through main(); returns the written path."""
+    path = os.path.join(out_dir, f"bench-{fans}.svg")
+    if os.path.exists(path):
+        # Else main() finds the file unchanged and skips the write
+        os.remove(path)
+    unit = unit_config(dict(DEFAULT_UNIT, name=f"bench{fans}", fans=fans))
+    with contextlib.redirect_stdout(io.StringIO()):
+        generate_svg.main(path, unit=unit)
+    return path
+
+
+# (name, counts, build(count) -> svg element); main is added by run_cases
+CASES = [
+    ("create_fan", (1, 4, 16), _fans),
+    ("create_status_light", (2, 8, 32), _status_lights),
+    ("create_rpm_gauge", (4, 16, 64), _rpm_gauge),
+    ("create_pressure_gauge", (5, 20, 80), _pressure_gauge),
+    ("create_exhaust", (10, 40, 160), _exhaust),
+    ("create_starfield", (75, 300, 1200), _starfield),
+]
+MAIN_FANS = (1, 2, 4, 8)
+
+
+def _clear_caches():
+    for name in CACHES:
+        getattr(generate_svg, name).cache_clear()
+
+
+def _loop(build, count, number):
+    """Seconds taken by number cold runs of build(count)."""
+    started = time.perf_counter()
+    for _ in range(number):
+        _clear_caches()
+        build(count)
+    return time.perf_counter() - started
+
+
+def measure(build, count, repeat=10):
+    """
+    Times build(count) in repeat loops (after a warm-up run that also
+    sizes the loops) and runs it once more traced. Returns the case's
+    metrics.
+    """
+    output = build(count)
+    number = 1
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        while _loop(build, count, number) < MIN_LOOP:
+            number *= 2
+        best = min(_loop(build, count, number) for _ in range(repeat)) / number
+    finally:
+        if enabled:
+            gc.enable()
+
+    _clear_caches()
+    tracemalloc.start()
+    try:
+        build(count)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    if isinstance(output, str):
+        size, elements = os.path.getsize(output), sum(1 for _ in ET.parse(output).iter())
+    else:
+        size, elements = len(svg_bytes(output)), sum(1 for _ in output.iter())
+    return {"seconds": round(best, 6), "peak_kb": round(peak / 1024, 1), "bytes": size, "elements": elements}
+
+
+def run_cases(repeat=10, only=None, keys=None):
+    """
+    Measures every case (those whose name contains only, or whose key is
+    in keys). Returns {"name[count]": metrics}.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as out_dir:
+        cases = CASES + [("main", MAIN_FANS, lambda fans: _main(fans, out_dir))]
+        for name, counts, build in cases:
+            if only and only not in name:
+                continue
+            for count in counts:
+                key = f"{name}[{count}]"
+                if keys is None or key in keys:
+                    results[key] = measure(build, count, repeat)
+    return results
+
+
+def compare(results, baseline, thresholds=THRESHOLDS):
+    """
+    Regressions of results against the baseline cases: [(case, metric,
+    baseline value, current value)]. Cases missing from either side are
+    not compared.
+    """
+    regressions = []
+    for case, metrics in results.items():
+        reference = baseline.get(case)
+        if reference is None:
+            continue
+        for metric, (relative, absolute) in thresholds.items():
+            before, after = reference.get(metric), metrics[metric]
+            if before is not None and after > before * (1 + relative) and after - before > absolute:
+                regressions.append((case, metric, before, after))
+    return regressions
+
+
+def load_baseline(path=BASELINE):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _environment():
+    return {"python": platform.python_version(), "machine": platform.machine(), "system": platform.system()}
+
+
+def print_results(results, baseline, stream=sys.stdout):
+    """Prints one line per case, with the change of each metric against the baseline."""
+    def change(metric, value, reference):
+        if not reference or reference.get(metric) in (None, 0):
+            return ""
+        return f" ({100 * (value - reference[metric]) / reference[metric]:+.0f}%)"
+
+    print(f"{'case':<28} {'ms':>9}{'':7} {'peak KB':>9}{'':7} {'bytes':>11}{'':7} {'elements':>9}", file=stream)
+    for case, metrics in results.items():
+        reference = baseline.get(case)
+        print(f"{case:<28} "
+              f"{metrics['seconds'] * 1000:>9.2f}{change('seconds', metrics['seconds'], reference):>7} "
+              f"{metrics['peak_kb']:>9.1f}{change('peak_kb', metrics['peak_kb'], reference):>7} "
+              f"{metrics['bytes']:>11}{change('bytes', metrics['bytes'], reference):>7} "
+              f"{metrics['elements']:>9}{change('elements', metrics['elements'], reference):>7}", file=stream)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark generate_svg.py and compare with the stored baseline")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed loops per case, the best counts (default: 10)")
+    parser.add_argument("--time-threshold", type=float, default=THRESHOLDS["seconds"][0], metavar="RATIO",
+                        help="Flag cases slower than the baseline by more than RATIO (default: 0.5)")
+    parser.add_argument("--only", metavar="NAME", help="Only run cases whose name contains NAME")
+    parser.add_argument("--baseline", default=BASELINE, help="Baseline file (default: benchmark_baseline.json)")
+    parser.add_argument("--update", action="store_true", help="Record the results as the baseline")
+    parser.add_argument("--strict", action="store_true",
+                        help="Also fail on time and memory regressions (for a baseline recorded on this machine)")
+    parser.add_argument("--json", metavar="FILE", help="Also write the results to FILE")
+    args = parser.parse_args(argv)
+
+    stored = load_baseline(args.baseline)
+    baseline = {} if args.update else stored.get("cases", {})
+    thresholds = dict(THRESHOLDS, seconds=(args.time_threshold, THRESHOLDS["seconds"][1]))
+    results = run_cases(args.repeat, args.only)
+    regressions = compare(results, baseline, thresholds)
+    for _ in range(RETRIES):
+        flagged = {case for case, metric, _, _ in regressions if metric in NOISY}
+        if not flagged:
+            break
+        for case, metrics in run_cases(args.repeat, keys=flagged).items():
+            for metric in NOISY:
+                results[case][metric] = min(results[case][metric], metrics[metric])
+        regressions = compare(results, baseline, thresholds)
+    print_results(results, baseline)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"environment": _environment(), "cases": results}, f, indent=2)
+
+    if args.update:
+        # A partial run (--only) keeps the other cases' baselines
+        cases = dict(stored.get("cases", {}), **results) if args.only else results
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({"environment": _environment(), "cases": cases}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"✓ baseline of {len(results)} cases written to {args.baseline}", file=sys.stderr)
+        return 0
+
+    if not baseline:
+        print(f"No baseline in {args.baseline}; record one with --update", file=sys.stderr)
+        return 0
+    if stored.get("environment") != _environment():
+        print(f"Note: baseline recorded on {stored.get('environment')}, timings may not compare", file=sys.stderr)
+    failing = [regression for regression in regressions if args.strict or regression[1] in DETERMINISTIC]
+    for case, metric, before, after in regressions:
+        mark = "✗" if (case, metric, before, after) in failing else "!"
+        print(f"{mark} {case}: {metric} {before} -> {after}", file=sys.stderr)
+    reported = len(regressions) - len(failing)
+    if reported:
+        print(f"{reported} time/memory regressions reported only (timings depend on the machine; see --strict)",
+              file=sys.stderr)
+    print(f"{len(failing)} regressions in {len(results)} cases", file=sys.stderr)
+    return 1 if failing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
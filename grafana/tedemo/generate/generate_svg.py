@@ -6,7 +6,377 @@ Mirrors the JavaScript creation logic from teXXX.svg.
 import xml.etree.ElementTree as ET
 import math
 import argparse
+import functools
+import io
+import json
+import hashlib
 import os
+import random
+import re
+import sys
+
+# The built-in AirflowM1 panel. Unit files (--unit, --batch) override any
+# of these keys; "rpm", "pressure" and "particles" are merged key by key.
+DEFAULT_UNIT = {
+    "name": "te",
+    "id": "svgAirflowM1",
+    "measurement": "airflowm01",
+    "fans": [{"state": "on"}, {"state": "off"}],
+    "dryer": True,
+    "rpm": {"max": 4000, "ticks": 4},
+    "pressure": {"max": 500, "ticks": 5, "low": 100, "warning": 150, "high": 350, "normal": 250, "set": 250},
+    "particles": {"exhaust": 10, "exhaust_center": 24, "starfield": 75, "duration": 3},
+    # Seed of the particle layout; None seeds with the unit name
+    "seed": None,
+    "profile": "full",
+}
+
+# Rendering profiles, for clients of different power:
+#   budget   most animated particles (exhaust + starfield) in total, None for no limit
+#   animate  animate particles at all (without: still stars, no exhaust plume)
+#   smil     animate the stars with SMIL <animate> (as the original panel did)
+#            rather than the shared CSS animation (.star)
+#   filters  keep the blur filter
+#   css      rules appended to the panel styles
+NO_FILTERS_CSS = """
+      .plume-particle, .bg-animated-disk, .status-active { filter: none !important; }
+"""
+PROFILES = {
+    "full": {"budget": None, "animate": True, "smil": True, "filters": True, "css": ""},
+    "reduced": {"budget": 30, "animate": True, "smil": False, "filters": False, "css": NO_FILTERS_CSS},
+    "static": {"budget": None, "animate": False, "smil": False, "filters": False,
+               "css": NO_FILTERS_CSS + "      * { animation: none !important; }\n"},
+}
+
+# Gauge centres, shared by build_panel and the update routine (update_js)
+RPM_GAUGE_CENTER = (40, 18)
+PRESSURE_GAUGE_CENTER = (40, -13)
+
+
+def unit_config(unit):
+    """
+    Returns a complete unit description: unit merged over DEFAULT_UNIT.
+    "fans" may be a list of {"state": "on"|"off"} or just a fan count (all
+    off). Raises ValueError for descriptions that can't be drawn.
+    """
+    config = dict(DEFAULT_UNIT, **unit)
+    for key in ("rpm", "pressure", "particles"):
+        config[key] = dict(DEFAULT_UNIT[key], **unit.get(key, {}))
+    fans = config["fans"]
+    if isinstance(fans, int):
+        fans = [{"state": "off"}] * fans
+    config["fans"] = [dict({"state": "off"}, **fan) for fan in fans]
+
+    name = config["name"]
+    if not config["fans"]:
+        raise ValueError(f"unit '{name}': at least one fan is required")
+    if any(fan["state"] not in ("on", "off") for fan in config["fans"]):
+        raise ValueError(f"unit '{name}': fan state must be 'on' or 'off'")
+    pressure = config["pressure"]
+    if not 0 < pressure["low"] < pressure["warning"] < pressure["high"] < pressure["max"]:
+        raise ValueError(f"unit '{name}': pressure needs 0 < low < warning < high < max")
+    if config["rpm"]["max"] <= 0 or config["rpm"]["ticks"] < 1 or pressure["ticks"] < 1:
+        raise ValueError(f"unit '{name}': gauge ranges and tick counts must be positive")
+    if not isinstance(config["seed"], (int, str, type(None))) or isinstance(config["seed"], bool):
+        raise ValueError(f"unit '{name}': seed must be an integer or a string")
+    if config["profile"] not in PROFILES:
+        raise ValueError(f"unit '{name}': profile must be one of {', '.join(PROFILES)}")
+    return config
+
+
+def load_unit(path):
+    """Reads a JSON unit description; its name defaults to the file name."""
+    with open(path, 'r', encoding='utf-8') as f:
+        unit = json.load(f)
+    unit.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+    return unit_config(unit)
+
+
+def bindings_for(unit):
+    """
+    Runtime data bindings of a unit: element id -> InfluxDB field of the
+    unit's measurement, the alias render.js reads it under, and how it is
+    shown.
+    """
+    numbers = range(1, len(unit["fans"]) + 1)
+    bindings = []
+    for n in numbers:
+        # A fan's lights show unknown (gray) while the fan is off
+        bindings.append({"element_id": f"status-Fuse_Fan{n}", "field": f"Fuse_Fan{n}", "alias": f"Fuse_Fan{n}",
+                         "kind": "status", "gate": f"Fan{n}_On"})
+        bindings.append({"element_id": f"status-Feedback_K{n}", "field": f"Feedback_K{n}",
+                         "alias": f"Feedback_K{n}", "kind": "status", "gate": f"Fan{n}_On"})
+    if unit["dryer"]:
+        bindings.append({"element_id": "status-Fuse_Dryer", "field": "Fuse_Dryer", "alias": "Fuse_Dryer",
+                         "kind": "status"})
+        bindings.append({"element_id": "status-FeedbackPipeWatchdog", "field": "FeedbackPipeWatchdog",
+                         "alias": "FeedbackPipeWatchdog", "kind": "status"})
+    bindings.append({"element_id": "no-errors-disc", "field": "No_Emergency", "alias": "NoEmergency",
+                     "kind": "alarm"})
+    bindings += [{"element_id": f"power-fan{n}", "field": f"Fan{n}_on", "alias": f"Fan{n}_On", "kind": "power"}
+                 for n in numbers]
+    bindings += [{"element_id": f"fan{n}-hours", "field": f"Operational_Hours_{n}", "alias": f"OperationalHours{n}",
+                  "kind": "text", "format": "%06d"} for n in numbers]
+    bindings += [
+        {"element_id": "fanspeed-value", "field": "Fan_Speed", "alias": "FanSpeed_RPM", "kind": "gauge"},
+        {"element_id": "pressure-value", "field": "Pressure_Sensor", "alias": "Pressure", "kind": "gauge"},
+        {"element_id": "pressure-set-label", "field": "Set_Pressure", "alias": "SetPressure",
+         "kind": "text", "format": "SET %d"},
+        {"element_id": "pressure-normal-label", "field": "Set_Pressure_Normal", "alias": "SetPressure_Normal",
+         "kind": "text", "format": "NORMAL %d"},
+        {"element_id": "pressure-high-label", "field": "Set_Pressure_High", "alias": "SetPressure_High",
+         "kind": "text", "format": "HIGH %d"},
+    ]
+    return bindings
+
+
+MEASUREMENT = DEFAULT_UNIT["measurement"]
+BINDINGS = bindings_for(unit_config(DEFAULT_UNIT))
+
+
+FIELD_TABLE = re.compile(r"(// <fields>[^\n]*\n).*?(// </fields>)", re.S)
+# Leading note of the js/ templates, left out of the bundles
+TEMPLATE_NOTE = re.compile(r"\A/\* Template.*?\*/\n+", re.S)
+
+
+def field_table(unit):
+    """
+    The fields the panel scripts read for a unit: [(alias, field, value
+    while missing)], each alias once. Only bound fields are read, so a
+    panel never queries a field it doesn't show.
+    """
+    table = {}
+    for binding in bindings_for(unit):
+        table.setdefault(binding["alias"], (binding["alias"], binding["field"], 0))
+    return list(table.values())
+
+
+def script_constants(unit):
+    """Values the panel scripts use that are not queried from InfluxDB."""
+    return {"SetPressure_Low": unit["pressure"]["low"]}
+
+
+def render_js(unit):
+    """js/render.js with the field table of unit filled in."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    script = TEMPLATE_NOTE.sub("", load_javascript_from_file(os.path.join(here, "js", "render.js")))
+    rows = ",\n".join(f"  [{json.dumps(alias)}, {json.dumps(default)}]" for alias, _, default in field_table(unit))
+    block = ("// [alias, value while the field is missing from the data frame]\n"
+             f"const FIELDS = [\n{rows}\n];\n"
+             "// Values not queried from InfluxDB\n"
+             f"const CONSTANTS = {json.dumps(script_constants(unit))};\n")
+    return FIELD_TABLE.sub(lambda m: m.group(1) + block + m.group(2), script, count=1)
+
+
+def svgmap_name(element_id):
+    """The name an element is reachable under in the panel's svgmap (camelCase of its id)."""
+    return re.sub(r"[-_](\w)", lambda m: m.group(1).upper(), element_id)
+
+
+def _js_format(fmt):
+    """JS template literal printing v with a %d / %0Nd format."""
+    def field(match):
+        return f"${{String(v).padStart({int(match.group(1))}, '0')}}" if match.group(1) else "${v}"
+    return "`" + re.sub(r"%(?:0(\d+))?d", field, fmt) + "`"
+
+
+# Gauges redrawn by an init.js function: gauge id -> (function, other aliases
+# it reads, the gauge's elements it redraws besides the value text)
+GAUGE_UPDATES = {
+    "fanspeed": ("updateRPMGauge", (), ("value-arc", "indicator")),
+    "pressure": ("updatePressureGauge", ("SetPressure_Low",),
+                 ("value-arc", "indicator", "disk-path", "low-pressure-indicator")),
+}
+
+
+def _alarm_symbol(element_id):
+    """The symbol shown on an alarm disc (no-errors-disc -> no-errors-symbol)."""
+    return element_id.rsplit("-", 1)[0] + "-symbol"
+
+
+def binding_manifest(unit):
+    """
+    Machine-readable description of the data a unit's panel shows: every
+    bound element with its field, alias, kind, format and the elements
+    its value redraws, the fields to query and the values that are not
+    queried. influxdb/query_influxdb.py --panel builds the panel query
+    from it.
+    """
+    bindings = []
+    for binding in bindings_for(unit):
+        elements = [binding["element_id"]]
+        if binding["kind"] == "alarm":
+            elements.append(_alarm_symbol(binding["element_id"]))
+        elif binding["kind"] == "gauge":
+            gauge = binding["element_id"].rsplit("-", 1)[0]
+            elements += [f"{gauge}-{suffix}" for suffix in GAUGE_UPDATES[gauge][2]]
+        bindings.append(dict(binding, elements=elements))
+    return {
+        "unit": unit["name"],
+        "id": unit["id"],
+        "measurement": unit["measurement"],
+        "fields": [{"field": field, "alias": alias} for alias, field, _ in field_table(unit)],
+        "constants": script_constants(unit),
+        "bindings": bindings,
+    }
+
+
+def write_binding_manifest(unit, path):
+    """Writes the binding manifest of unit as JSON. Returns the manifest."""
+    manifest = binding_manifest(unit)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+    return manifest
+
+
+def panel_updates(unit):
+    """
+    What the generated update routine checks on every refresh:
+    [(svgmap names of the nodes it updates, JS expression of the value over
+    d = statusData, JS statement applying the value v to nodes n0, n1, ...)].
+    """
+    def field(alias):
+        return f"d[{json.dumps(alias)}]"
+
+    updates = []
+    for binding in bindings_for(unit):
+        name, value, kind = svgmap_name(binding["element_id"]), field(binding["alias"]), binding["kind"]
+        if kind == "status":
+            if binding.get("gate"):
+                value = f"{field(binding['gate'])} ? {value} : -1"
+            updates.append(([name], value, "options.updateStatusElement(n0, v)"))
+        elif kind == "alarm":
+            symbol = svgmap_name(_alarm_symbol(binding["element_id"]))
+            updates.append(([name, symbol], f"{value} === 1",
+                            "n0.attr('fill', v ? 'green' : 'url(#status-red-gradient)'); "
+                            "v ? n0.addClass('status-active') : n0.removeClass('status-active'); "
+                            "n1.text(v ? '\u2713' : '\u2717')"))
+        elif kind == "power":
+            updates.append(([name], value, "v ? n0.addClass('power-on') : n0.removeClass('power-on')"))
+        elif kind == "text":
+            updates.append(([name], value, f"n0.text({_js_format(binding['format'])})"))
+        elif kind == "gauge":
+            function, extra, _ = GAUGE_UPDATES[binding["element_id"].rsplit("-", 1)[0]]
+            if extra:
+                value = "`" + "|".join(f"${{{field(alias)}}}" for alias in (binding["alias"], *extra)) + "`"
+            updates.append(([], value, f"options.{function}(svgmap)"))
+
+    # Not bound to a field of their own
+    updates.append(([], '`${d["SetPressure_Low"]}|${d["SetPressure_High"]}`',
+                    "options.updatePressureGaugeSegments(svgmap)"))
+    updates.append((["pressureLowLabel"], field("SetPressure_Low"), "n0.text(`LOW ${v}`)"))
+    fans_on = [field(f"Fan{n}_On") for n in range(1, len(unit["fans"]) + 1)]
+    for n, fan_on in enumerate(fans_on, 1):
+        updates.append(([f"exhaustContainer{n}"], f"{fan_on} ? 'block' : 'none'", "n0.css('display', v)"))
+    updates.append((["exhaustContainerCenter"], f"({' || '.join(fans_on)}) ? 'block' : 'none'",
+                    "n0.css('display', v)"))
+    return updates
+
+
+def update_js(unit):
+    """
+    The generated update routine of a unit: options.panel (the unit's
+    gauge geometry for init.js) and options.updatePanel(svgmap), which
+    caches the svgmap nodes it updates and only touches an element when
+    the value it shows changed since the last refresh.
+    """
+    pressure = unit["pressure"]
+    panel = {
+        "fans": len(unit["fans"]),
+        "rpm": {"cx": RPM_GAUGE_CENTER[0], "cy": RPM_GAUGE_CENTER[1], "max": unit["rpm"]["max"]},
+        "pressure": {"cx": PRESSURE_GAUGE_CENTER[0], "cy": PRESSURE_GAUGE_CENTER[1], "max": pressure["max"],
+                     "low": pressure["low"], "warning": pressure["warning"], "high": pressure["high"]},
+    }
+    nodes, lines = [], []
+    for i, (names, value, apply) in enumerate(panel_updates(unit)):
+        indices = []
+        for name in names:
+            if name not in nodes:
+                nodes.append(name)
+            indices.append(nodes.index(name))
+        apply = re.sub(r"\bn(\d)\b", lambda m: f"n[{indices[int(m.group(1))]}]", apply)
+        lines.append(f"  v = {value};\n"
+                     f"  if (v !== last[{i}]) {{ last[{i}] = v; {apply}; }}\n")
+    node_list = ",\n".join(f"      svgmap.{name}" for name in nodes)
+    return (f"// Generated by generate_svg.py for unit {unit['name']}, do not edit\n"
+            f"options.panel = {json.dumps(panel)};\n"
+            "\n"
+            "// Applies options.statusData, touching only the elements whose value changed\n"
+            "options.updatePanel = (svgmap) => {\n"
+            "  if (options.updateMap !== svgmap) {\n"
+            "    // Nodes are looked up once per svgmap; everything is drawn on the first refresh\n"
+            "    options.updateMap = svgmap;\n"
+            f"    options.updateNodes = [\n{node_list}\n    ];\n"
+            "    options.lastValues = [];\n"
+            "  }\n"
+            "  const d = options.statusData, n = options.updateNodes, last = options.lastValues;\n"
+            "  let v;\n"
+            + "".join(lines) +
+            "};\n")
+
+
+# Code before a trailing // comment is only cut when it holds none of these
+# (a // inside a string or regular expression would be cut too)
+LITERAL_CHARS = "\"'`/"
+
+
+def minify_js(source):
+    """
+    Strips comments, indentation and blank lines from a panel script, line
+    by line. Line breaks are kept, so automatic semicolon insertion sees
+    the same code; string and regular expression literals are untouched
+    (a trailing comment is only removed from a line without quotes or
+    slashes), and lines inside a multi-line template literal are kept
+    verbatim.
+    """
+    out, in_comment, in_template = [], False, False
+    for line in source.splitlines():
+        if in_template:
+            out.append(line)
+            in_template = line.count("`") % 2 == 0
+            continue
+        code = line.strip()
+        if in_comment:
+            end = code.find("*/")
+            if end < 0:
+                continue
+            in_comment, code = False, code[end + 2:].strip()
+        if code.startswith("/*"):
+            end = code.find("*/", 2)
+            if end < 0:
+                in_comment = True
+                continue
+            code = code[end + 2:].strip()
+        if not code or code.startswith("//"):
+            continue
+        comment = code.find("//")
+        if comment > 0 and not any(c in LITERAL_CHARS for c in code[:comment]):
+            code = code[:comment].rstrip()
+        if code.count("`") % 2:
+            # Opens a template literal spanning lines: keep its text as is
+            code = line.lstrip()
+            in_template = True
+        out.append(code)
+    return "\n".join(out) + "\n"
+
+
+def bundle_scripts(unit, minify=True):
+    """
+    The panel scripts of a unit: (init code, render code) for the
+    Grafana panel options. The init code is js/init.js followed by the
+    unit's update routine (update_js), the render code is render_js.
+    These bundles (written by --scripts; ../te.init.js and ../te.render.js
+    for the built-in unit) are what goes into a panel: js/init.js and
+    js/render.js are templates and don't run on their own.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    init = TEMPLATE_NOTE.sub("", load_javascript_from_file(os.path.join(here, "js", "init.js")))
+    init += "\n" + update_js(unit)
+    render = render_js(unit)
+    if minify:
+        return minify_js(init), minify_js(render)
+    return init, render
 
 
 def create_element(parent, tag, attribs=None, text=None):
@@ -20,18 +390,97 @@ def create_element(parent, tag, attribs=None, text=None):
     return elem
 
 
-def create_fan(parent, x, y, size, stroke_width, fan_id, initial_state):
+class SymbolLibrary:
+    """
+    Shared component geometry.
+
+    Each distinct component (its name plus the parameters that shape it) is
+    drawn once into a <symbol> in <defs>; every instance is a <use> of it.
+    Elements the runtime scripts update (anything addressed by ID through
+    svgmap) are never part of a symbol: they stay per-instance elements, so
+    the scripts and ID-scoped CSS keep working unchanged.
+    """
+
+    def __init__(self, defs):
+        self.defs = defs
+        self.symbols = {}
+        self.instances = 0
+
+    def use(self, parent, name, draw, params, x, y, attribs=None):
+        """
+        Places the symbol for (name, params) at (x, y), drawing it with
+        draw(symbol, *params) around the origin the first time it is used.
+        """
+        key = (name, *params)
+        symbol_id = self.symbols.get(key)
+        if symbol_id is None:
+            variants = sum(1 for other in self.symbols if other[0] == name)
+            symbol_id = f"{name}-symbol" + (f"-{variants + 1}" if variants else "")
+            # Without a viewBox the symbol keeps user units; overflow shows negative coordinates
+            draw(create_element(self.defs, "symbol", {"id": symbol_id, "overflow": "visible"}), *params)
+            self.symbols[key] = symbol_id
+        self.instances += 1
+        return create_element(parent, "use", dict(_translated(x, y, attribs), href=f"#{symbol_id}"))
+
+
+def _translated(x, y, attribs=None):
+    """Returns attribs with a translate(x, y) in front of any transform they carry."""
+    attribs = dict(attribs or {})
+    transform = attribs.pop("transform", None)
+    attribs["transform"] = f"translate({x}, {y})" + (f" {transform}" if transform else "")
+    return attribs
+
+
+def place_component(parent, library, name, draw, params, x, y, attribs=None):
+    """
+    Places a static component, drawn around the origin by
+    draw(parent, *params), at (x, y): as a <use> of a shared symbol when a
+    SymbolLibrary is given, otherwise inline in a translated group.
+    """
+    if library is not None:
+        return library.use(parent, name, draw, params, x, y, attribs)
+    group = create_element(parent, "g", _translated(x, y, attribs))
+    draw(group, *params)
+    return group
+
+
+def draw_fan_blades(parent, count=5, inner_radius=2, outer_radius=10.5, half_width=0.3):
+    """Draws the blades of a fan centred on the origin."""
+    blade_angle = 360 / count
+    for i in range(count):
+        angle = (i * blade_angle) * (math.pi / 180)
+        blade_start_angle = angle - half_width
+        blade_end_angle = angle + half_width
+
+        x1 = inner_radius * math.cos(blade_start_angle)
+        y1 = inner_radius * math.sin(blade_start_angle)
+        x2 = outer_radius * math.cos(blade_start_angle)
+        y2 = outer_radius * math.sin(blade_start_angle)
+        x3 = outer_radius * math.cos(blade_end_angle)
+        y3 = outer_radius * math.sin(blade_end_angle)
+        x4 = inner_radius * math.cos(blade_end_angle)
+        y4 = inner_radius * math.sin(blade_end_angle)
+
+        blade_path = f"M {x1} {y1} L {x2} {y2} L {x3} {y3} L {x4} {y4} Z"
+        create_element(parent, "path", {"d": blade_path, "class": "fan-blade"})
+
+
+def create_fan(parent, x, y, size, stroke_width, fan_id, initial_state, library=None):
     """
     Create a parametric fan component.
     Mirrors createFan() from teXXX.svg JavaScript.
+
+    The blade geometry comes from the symbol library when one is given; the
+    .fan-blades group stays per fan because the spin animation is bound to
+    .power-fan.power-on .fan-blades.
     """
     cx = x + size / 2
     cy = y + size / 2
     
     # Main group
-    group_attribs = {"id": fan_id}
+    group_attribs = {"id": fan_id, "class": "power-fan"}
     if initial_state == 'on':
-        group_attribs['class'] = 'power-on'
+        group_attribs['class'] = 'power-fan power-on'
     main_group = create_element(parent, "g", group_attribs)
     
     # Background disk
@@ -48,27 +497,7 @@ def create_fan(parent, x, y, size, stroke_width, fan_id, initial_state):
     
     # Fan blades group
     blades_group = create_element(main_group, "g", {"class": "fan-blades"})
-    blade_radius = 10.5
-    blade_angle = 360 / 5
-    
-    for i in range(5):
-        angle = (i * blade_angle) * (math.pi / 180)
-        blade_start_angle = angle - 0.3
-        blade_end_angle = angle + 0.3
-        inner_radius = 2
-        outer_radius = blade_radius
-        
-        x1 = cx + inner_radius * math.cos(blade_start_angle)
-        y1 = cy + inner_radius * math.sin(blade_start_angle)
-        x2 = cx + outer_radius * math.cos(blade_start_angle)
-        y2 = cy + outer_radius * math.sin(blade_start_angle)
-        x3 = cx + outer_radius * math.cos(blade_end_angle)
-        y3 = cy + outer_radius * math.sin(blade_end_angle)
-        x4 = cx + inner_radius * math.cos(blade_end_angle)
-        y4 = cy + inner_radius * math.sin(blade_end_angle)
-        
-        blade_path = f"M {x1} {y1} L {x2} {y2} L {x3} {y3} L {x4} {y4} Z"
-        create_element(blades_group, "path", {"d": blade_path, "class": "fan-blade"})
+    place_component(blades_group, library, "fan-blades", draw_fan_blades, (5, 2, 10.5), cx, cy)
     
     # Intermediate disk
     create_element(main_group, "circle", {
@@ -108,12 +537,8 @@ def create_fan(parent, x, y, size, stroke_width, fan_id, initial_state):
     
     # Labels - extract correct fan number from ID (e.g., "power-fan1" -> "FAN1")
     label_y = cy - 25
-    if 'fan1' in fan_id.lower():
-        fan_label = "FAN1"
-    elif 'fan2' in fan_id.lower():
-        fan_label = "FAN2"
-    else:
-        fan_label = "FAN"
+    number = re.search(r"fan(\d+)", fan_id.lower())
+    fan_label = f"FAN{number.group(1)}" if number else "FAN"
     
     create_element(parent, "text", {
         "x": cx, "y": label_y,
@@ -140,471 +565,266 @@ def create_fan(parent, x, y, size, stroke_width, fan_id, initial_state):
     }, "000000")
 
 
-def create_exhaust(parent, cx, cy, num_particles, duration_sec):
+def create_exhaust(parent, cx, cy, num_particles, duration_sec, rng=random):
     """
-    Create exhaust particles (animated).
+    Create exhaust particles (animated), placed with rng (a random.Random;
+    the unseeded module generator by default).
     Mirrors createExhaust() from teXXX.svg JavaScript.
     """
-    import random
     for i in range(num_particles):
         particle = create_element(parent, "circle", {
             "class": "plume-particle",
-            "cx": cx + (random.random() - 0.5) * 4,
-            "cy": cy + (random.random() - 0.5) * 2,
+            "cx": cx + (rng.random() - 0.5) * 4,
+            "cy": cy + (rng.random() - 0.5) * 2,
             "r": "2"
         })
         # Set animation delay and duration as style
-        delay = random.random() * duration_sec
+        delay = rng.random() * duration_sec
         particle.set("style", f"animation-delay: {-delay}s; animation-duration: {duration_sec}s;")
 
 
-def create_starfield(parent, num_particles):
+def create_starfield(parent, num_particles, x_min=0, width=100, rng=random, animate=True, smil=False):
     """
-    Create starfield particles (animated lines).
+    Create starfield particles (lines falling through the panel) across
+    x_min..x_min + width, placed with rng like create_exhaust. All stars
+    share one CSS animation (.star); with smil every star gets its own two
+    <animate> elements instead, and without animate they are drawn still.
     Mirrors createStarfield() from teXXX.svg JavaScript.
     """
-    import random
     for i in range(num_particles):
-        x = random.random() * 100
+        x = x_min + rng.random() * width
         y_start = -50
         y_end = 110
-        len_streak = random.random() * 2 + 0.5
-        duration = f"{random.random() * 3 + 2}s"
-        delay = f"{random.random() * 5}s"
+        len_streak = rng.random() * 2 + 0.5
+        duration = rng.random() * 3 + 2
+        delay = rng.random() * 5
         
         line = create_element(parent, "line", {
             "x1": x, "x2": x,
             "stroke": "white",
-            "stroke-width": random.random() * 0.3 + 0.1,
-            "opacity": random.random() * 0.5 + 0.3
+            "stroke-width": rng.random() * 0.3 + 0.1,
+            "opacity": rng.random() * 0.5 + 0.3
         })
         
-        # Add animate elements for y1
-        animate_y1 = create_element(line, "animate", {
-            "attributeName": "y1",
-            "from": y_start,
-            "to": y_end,
-            "dur": duration,
-            "begin": delay,
-            "repeatCount": "indefinite"
-        })
-        
-        # Add animate elements for y2
-        animate_y2 = create_element(line, "animate", {
-            "attributeName": "y2",
-            "from": y_start + len_streak,
-            "to": y_end + len_streak,
-            "dur": duration,
-            "begin": delay,
-            "repeatCount": "indefinite"
-        })
+        if animate and smil:
+            for attribute, offset in (("y1", 0), ("y2", len_streak)):
+                create_element(line, "animate", {
+                    "attributeName": attribute,
+                    "from": y_start + offset,
+                    "to": y_end + offset,
+                    "dur": f"{duration}s",
+                    "begin": f"{delay}s",
+                    "repeatCount": "indefinite"
+                })
+        elif animate:
+            # A negative delay starts each star part-way through its fall
+            line.set("y1", str(y_start))
+            line.set("y2", str(y_start + len_streak))
+            line.set("class", "star")
+            line.set("style", f"animation-duration: {duration}s; animation-delay: {-(delay % duration)}s;")
+        else:
+            # Where the star would be at some moment, spread over the panel height
+            y = delay * 20
+            line.set("y1", str(y))
+            line.set("y2", str(y + len_streak))
 
 
-def create_rpm_gauge(parent, cx, cy, gauge_id):
+def particle_counts(particles, num_fans, budget=None):
     """
-    Create an RPM gauge.
-    Mirrors createGauge() from teXXX.svg JavaScript.
+    Particle counts of a unit (exhaust per fan, exhaust_center, starfield),
+    scaled down evenly to at most budget animated particles in total.
     """
-    gauge_group = create_element(parent, "g", {
-        "class": "rpm-gauge",
-        "id": gauge_id,
-        "data-cx": cx,
-        "data-cy": cy
-    })
-    
-    gauge_radius = 15
-    
-    # Background disk (sector)
-    disk_radius = 22.5
-    disk_start = math.pi + (22.5 * math.pi / 180)
-    disk_end = -22.5 * math.pi / 180
-    expand = 40 * math.pi / 180
-    disk_start_expanded = disk_start - expand
-    disk_end_expanded = disk_end + expand
-    
-    # Normalize
-    disk_end_norm = disk_end_expanded
-    while disk_end_norm < disk_start_expanded:
-        disk_end_norm += 2 * math.pi
-    
-    disk_angle_span = disk_end_norm - disk_start_expanded
-    disk_large_arc = 1 if disk_angle_span > math.pi else 0
-    disk_sweep = 1
-    
-    disk_start_x = cx + disk_radius * math.cos(disk_start_expanded)
-    disk_start_y = cy + disk_radius * math.sin(disk_start_expanded)
-    disk_end_x = cx + disk_radius * math.cos(disk_end_norm)
-    disk_end_y = cy + disk_radius * math.sin(disk_end_norm)
-    
-    disk_path_d = f"M {cx} {cy} L {disk_start_x:.3f} {disk_start_y:.3f} A {disk_radius} {disk_radius} 0 {disk_large_arc} {disk_sweep} {disk_end_x:.3f} {disk_end_y:.3f} Z"
-    create_element(gauge_group, "path", {
-        "id": f"{gauge_id}-disk-path",
-        "d": disk_path_d,
-        "fill": "url(#disk-gradient)",
-        "class": "gauge-disk"
-    })
-    
-    # Gauge arc (main semi-circle)
-    gauge_start_angle = 0
-    gauge_end_angle = math.pi
-    angle_span = abs(gauge_end_angle - gauge_start_angle)
-    large_arc_flag = 1 if angle_span > math.pi else 0
-    sweep_flag = 1
-    
-    rotated_start = gauge_start_angle + math.pi
-    rotated_end = gauge_end_angle + math.pi
-    
-    gauge_arc_path = f"M {cx + gauge_radius * math.cos(rotated_start):.3f} {cy + gauge_radius * math.sin(rotated_start):.3f} A {gauge_radius} {gauge_radius} 0 {large_arc_flag} {sweep_flag} {cx + gauge_radius * math.cos(rotated_end):.3f} {cy + gauge_radius * math.sin(rotated_end):.3f}"
-    create_element(gauge_group, "path", {"d": gauge_arc_path, "class": "gauge-arc"})
-    
-    # Value arc (initially empty, updated by JS)
-    create_element(gauge_group, "path", {
-        "id": f"{gauge_id}-value-arc",
-        "class": "gauge-value-arc"
-    })
-    
-    # Tick marks and labels
-    max_rpm = 4000
-    num_ticks = 4
-    
-    for i in range(num_ticks + 1):
-        rpm = (i * max_rpm) / num_ticks
-        angle = gauge_start_angle + (i * (gauge_end_angle - gauge_start_angle)) / num_ticks
-        
-        tick_inner_radius = gauge_radius - 4
-        tick_outer_radius = gauge_radius - 2
-        tick_x1 = cx + tick_inner_radius * math.cos(angle)
-        tick_y1 = cy + tick_inner_radius * math.sin(angle)
-        tick_x2 = cx + tick_outer_radius * math.cos(angle)
-        tick_y2 = cy + tick_outer_radius * math.sin(angle)
-        
-        # Symmetric with respect to center
-        tick_x1 = 2 * cx - tick_x1
-        tick_y1 = 2 * cy - tick_y1
-        tick_x2 = 2 * cx - tick_x2
-        tick_y2 = 2 * cy - tick_y2
-        
-        create_element(gauge_group, "line", {
-            "x1": tick_x1, "y1": tick_y1,
-            "x2": tick_x2, "y2": tick_y2,
-            "class": "gauge-tick"
-        })
-        
-        # Number label
-        if 0 <= i <= 4:
-            label_radius = gauge_radius + 3
-            label_x = cx + label_radius * math.cos(angle)
-            label_y = cy + label_radius * math.sin(angle)
-            
-            label_x = 2 * cx - label_x
-            label_y = 2 * cy - label_y
-            
-            radial_angle = math.atan2(label_y - cy, label_x - cx) * 180 / math.pi
-            tangent_angle = radial_angle + 90
-            
-            create_element(gauge_group, "text", {
-                "x": label_x, "y": label_y,
-                "class": "gauge-label",
-                "text-anchor": "middle",
-                "dominant-baseline": "middle",
-                "transform": f"rotate({tangent_angle}, {label_x}, {label_y})"
-            }, str(int(rpm)))
-    
-    # Indicator triangle (initially at 0)
-    indicator_group = create_element(gauge_group, "g", {"class": "rpm-indicator"})
-    create_element(indicator_group, "polygon", {
-        "id": f"{gauge_id}-indicator",
-        "points": "0,0 0,0 0,0",
-        "class": "gauge-indicator"
-    })
-    
-    # RPM value text
-    create_element(gauge_group, "text", {
-        "id": f"{gauge_id}-value",
-        "x": cx, "y": cy + 3.75,
-        "class": "rpm-value",
-        "text-anchor": "middle",
-        "dominant-baseline": "middle"
-    }, "0")
-    
-    # RPM unit text
-    create_element(gauge_group, "text", {
-        "x": cx, "y": cy + 7.5,
-        "class": "rpm-unit",
-        "text-anchor": "middle",
-        "dominant-baseline": "middle"
-    }, "RPM")
+    counts = {key: particles[key] for key in ("exhaust", "exhaust_center", "starfield")}
+    total = counts["exhaust"] * num_fans + counts["exhaust_center"] + counts["starfield"]
+    if budget is None or total <= budget:
+        return counts
+    return {key: count * budget // total for key, count in counts.items()}
 
 
-def create_pressure_gauge(parent, cx, cy, gauge_id):
+@functools.lru_cache(maxsize=None)
+def _arc_points(radius, start_angle, end_angle):
     """
-    Create a pressure gauge with colored segments.
-    Mirrors createPressureGauge() from teXXX.svg JavaScript.
+    Local end points and large-arc flag of a gauge arc. Gauge angles are
+    measured from the left (0) clockwise through the top (pi).
+    """
+    rotated_start = start_angle + math.pi
+    rotated_end = end_angle + math.pi
+    large_arc = 1 if abs(end_angle - start_angle) > math.pi else 0
+    return (radius * math.cos(rotated_start), radius * math.sin(rotated_start), large_arc,
+            radius * math.cos(rotated_end), radius * math.sin(rotated_end))
+
+
+def arc_path(cx, cy, radius, start_angle, end_angle):
+    """Path data of a gauge arc around (cx, cy)."""
+    x0, y0, large_arc, x1, y1 = _arc_points(radius, start_angle, end_angle)
+    return f"M {cx + x0:.3f} {cy + y0:.3f} A {radius} {radius} 0 {large_arc} 1 {cx + x1:.3f} {cy + y1:.3f}"
+
+
+@functools.lru_cache(maxsize=None)
+def _sector_points(radius, expand):
+    """Local arc end points and large-arc flag of a gauge's background sector."""
+    start = math.pi + (22.5 * math.pi / 180) - expand * math.pi / 180
+    end = -22.5 * math.pi / 180 + expand * math.pi / 180
+    while end < start:
+        end += 2 * math.pi
+    large_arc = 1 if end - start > math.pi else 0
+    return (radius * math.cos(start), radius * math.sin(start), large_arc,
+            radius * math.cos(end), radius * math.sin(end))
+
+
+@functools.lru_cache(maxsize=None)
+def gauge_scale_geometry(radius, start_angle, end_angle, max_value, num_ticks, minor_ticks=False):
+    """
+    Geometry of a gauge scale centred on the origin, computed once per
+    parameter set: (arc path, major ticks, labels, minor ticks). Ticks are
+    (x1, y1, x2, y2), labels (x, y, rotation, text).
+    """
+    span = end_angle - start_angle
+    # Every angle's cos/sin once; ticks and labels scale the same unit vectors
+    majors = [(-math.cos(angle), -math.sin(angle))
+              for angle in (start_angle + i * span / num_ticks for i in range(num_ticks + 1))]
+    minors = [(-math.cos(angle), -math.sin(angle))
+              for angle in (start_angle + (i + 0.5) * span / num_ticks for i in range(num_ticks))] if minor_ticks else []
+    
+    inner, outer, minor_outer, label_radius = radius - 4, radius - 2, radius - 3, radius + 3
+    ticks = tuple((inner * x, inner * y, outer * x, outer * y) for x, y in majors)
+    labels = []
+    for i, (x, y) in enumerate(majors):
+        label_x, label_y = label_radius * x, label_radius * y
+        tangent_angle = math.atan2(label_y, label_x) * 180 / math.pi + 90
+        labels.append((label_x, label_y, tangent_angle, str(int(i * max_value / num_ticks))))
+    minor = tuple((inner * x, inner * y, minor_outer * x, minor_outer * y) for x, y in minors)
+    return arc_path(0, 0, radius, start_angle, end_angle), ticks, tuple(labels), minor
+
+
+def draw_gauge_scale(parent, radius, start_angle, end_angle, max_value, num_ticks, minor_ticks=False):
+    """Draws the static part of a gauge (arc, ticks, labels) centred on the origin."""
+    arc, ticks, labels, minor = gauge_scale_geometry(radius, start_angle, end_angle, max_value, num_ticks,
+                                                     minor_ticks)
+    create_element(parent, "path", {"d": arc, "class": "gauge-arc"})
+    for (x1, y1, x2, y2), (label_x, label_y, rotation, text) in zip(ticks, labels):
+        create_element(parent, "line", {"x1": x1, "y1": y1, "x2": x2, "y2": y2, "class": "gauge-tick"})
+        create_element(parent, "text", {
+            "x": label_x, "y": label_y,
+            "class": "gauge-label",
+            "text-anchor": "middle",
+            "dominant-baseline": "middle",
+            "transform": f"rotate({rotation}, {label_x}, {label_y})"
+        }, text)
+    # Minor ticks halfway between the major ones
+    for x1, y1, x2, y2 in minor:
+        create_element(parent, "line", {"x1": x1, "y1": y1, "x2": x2, "y2": y2, "class": "gauge-tick"})
+
+
+def create_gauge(parent, cx, cy, gauge_id, kind, library=None, radius=15, start_angle=0, end_angle=math.pi,
+                 max_value=100, num_ticks=4, minor_ticks=False, disk_radius=22.5, disk_expand=40,
+                 bands=(), labels=(), value_dy=3.75, unit_text="", unit_dy=7.5, unit_class="rpm-unit"):
+    """
+    Create a gauge: background sector, scale (shared), value arc, coloured
+    bands, indicator and value/unit texts. The runtime scripts update the
+    elements with ids ({gauge_id}-value-arc, -indicator, -value, bands).
+    
+    Args:
+        kind: Gauge class prefix ("rpm" -> .rpm-gauge) and scale symbol name
+        start_angle, end_angle: Span of the scale (see _arc_points)
+        bands: (name, start value, end value, color) arcs drawn outside
+               the scale, with ids {gauge_id}-{name}-arc
+        labels: (name, text, radius, start value, end value) texts set
+                along invisible arcs ({gauge_id}-{name}-text-path), with
+                ids {gauge_id}-{name}-label
     """
     gauge_group = create_element(parent, "g", {
-        "class": "pressure-gauge",
+        "class": f"{kind}-gauge",
         "id": gauge_id,
         "data-cx": cx,
         "data-cy": cy
     })
     
-    gauge_radius = 15
-    extra_radius1 = 25
-    extra_radius2 = 30
-    
-    # Background disk
-    disk_radius = 36.5
-    disk_start = math.pi + (22.5 * math.pi / 180)
-    disk_end = -22.5 * math.pi / 180
-    expand = 57.5 * math.pi / 180
-    disk_start_expanded = disk_start - expand
-    disk_end_expanded = disk_end + expand
-    
-    disk_end_norm = disk_end_expanded
-    while disk_end_norm < disk_start_expanded:
-        disk_end_norm += 2 * math.pi
-    
-    disk_angle_span = disk_end_norm - disk_start_expanded
-    disk_large_arc = 1 if disk_angle_span > math.pi else 0
-    disk_sweep = 1
-    
-    disk_start_x = cx + disk_radius * math.cos(disk_start_expanded)
-    disk_start_y = cy + disk_radius * math.sin(disk_start_expanded)
-    disk_end_x = cx + disk_radius * math.cos(disk_end_norm)
-    disk_end_y = cy + disk_radius * math.sin(disk_end_norm)
+    def angle_of(value):
+        return start_angle + (value / max_value) * (end_angle - start_angle)
     
-    disk_path_d = f"M {cx} {cy} L {disk_start_x:.3f} {disk_start_y:.3f} A {disk_radius} {disk_radius} 0 {disk_large_arc} {disk_sweep} {disk_end_x:.3f} {disk_end_y:.3f} Z"
+    # Background disk (sector)
+    x0, y0, large_arc, x1, y1 = _sector_points(disk_radius, disk_expand)
     create_element(gauge_group, "path", {
         "id": f"{gauge_id}-disk-path",
-        "d": disk_path_d,
+        "d": f"M {cx} {cy} L {cx + x0:.3f} {cy + y0:.3f} A {disk_radius} {disk_radius} 0 {large_arc} 1 "
+             f"{cx + x1:.3f} {cy + y1:.3f} Z",
         "fill": "url(#disk-gradient)",
         "class": "gauge-disk"
     })
     
-    # Main gauge arc
-    gauge_start_angle = -24.5 * math.pi / 180
-    gauge_end_angle = math.pi + 24.5 * math.pi / 180
-    angle_span = abs(gauge_end_angle - gauge_start_angle)
-    large_arc_flag = 1 if angle_span > math.pi else 0
-    sweep_flag = 1
-    rotated_start = gauge_start_angle + math.pi
-    rotated_end = gauge_end_angle + math.pi
-    
-    gauge_arc_path = f"M {cx + gauge_radius * math.cos(rotated_start):.3f} {cy + gauge_radius * math.sin(rotated_start):.3f} A {gauge_radius} {gauge_radius} 0 {large_arc_flag} {sweep_flag} {cx + gauge_radius * math.cos(rotated_end):.3f} {cy + gauge_radius * math.sin(rotated_end):.3f}"
-    create_element(gauge_group, "path", {"d": gauge_arc_path, "class": "gauge-arc"})
+    # Arc, ticks and labels (shared)
+    place_component(gauge_group, library, f"{kind}-scale", draw_gauge_scale,
+                    (radius, start_angle, end_angle, max_value, num_ticks, minor_ticks), cx, cy)
     
-    # Value arc (initially empty)
+    # Value arc (initially empty, updated by JS)
     create_element(gauge_group, "path", {
         "id": f"{gauge_id}-value-arc",
         "class": "gauge-value-arc"
     })
     
-    # Colored segments
-    max_pressure = 500
-    low_start = gauge_start_angle
-    low_end = gauge_start_angle + (100 / max_pressure) * (gauge_end_angle - gauge_start_angle)
-    yellow_end = gauge_start_angle + (150 / max_pressure) * (gauge_end_angle - gauge_start_angle)
-    green_end = gauge_start_angle + (350 / max_pressure) * (gauge_end_angle - gauge_start_angle)
-    high_end = gauge_start_angle + (500 / max_pressure) * (gauge_end_angle - gauge_start_angle)
-    
-    # Helper function for colored arcs
-    def create_colored_arc(start, end, color, arc_id=None):
-        angle_span = abs(end - start)
-        large_arc = 1 if angle_span > math.pi else 0
-        rotated_start = start + math.pi
-        rotated_end = end + math.pi
-        arc_path = f"M {cx + extra_radius2 * math.cos(rotated_start):.3f} {cy + extra_radius2 * math.sin(rotated_start):.3f} A {extra_radius2} {extra_radius2} 0 {large_arc} 1 {cx + extra_radius2 * math.cos(rotated_end):.3f} {cy + extra_radius2 * math.sin(rotated_end):.3f}"
-        attribs = {
-            "d": arc_path,
+    for name, start, end, color in bands:
+        create_element(gauge_group, "path", {
+            "d": arc_path(cx, cy, 30, angle_of(start), angle_of(end)),
             "stroke": color,
             "stroke-width": "11",
             "fill": "none",
-            "stroke-linecap": "round"
-        }
-        if arc_id:
-            attribs["id"] = arc_id
-        create_element(gauge_group, "path", attribs)
-        return rotated_start, rotated_end, large_arc
-    
-    # Yellow segment (100-150)
-    yellow_rs, yellow_re, yellow_la = create_colored_arc(low_end, yellow_end, "yellow", f"{gauge_id}-yellow-low-arc")
-    
-    # Low segment (0-100, red)
-    low_rs, low_re, low_la = create_colored_arc(low_start, low_end, "red", f"{gauge_id}-low-arc")
-    
-    # Text path for LOW label
-    low_text_arc = f"M {cx + (extra_radius2 - 2) * math.cos(low_rs):.3f} {cy + (extra_radius2 - 2) * math.sin(low_rs):.3f} A {extra_radius2 - 2} {extra_radius2 - 2} 0 {low_la} 1 {cx + (extra_radius2 - 2) * math.cos(low_re):.3f} {cy + (extra_radius2 - 2) * math.sin(low_re):.3f}"
-    create_element(gauge_group, "path", {
-        "d": low_text_arc,
-        "id": f"{gauge_id}-low-text-path",
-        "opacity": "0"
-    })
-    
-    # Green segment (150-350)
-    green_rs, green_re, green_la = create_colored_arc(yellow_end, green_end, "green", f"{gauge_id}-green-arc")
-    
-    # Text path for NORMAL label
-    normal_text_arc = f"M {cx + (extra_radius2 + 1.0) * math.cos(green_rs):.3f} {cy + (extra_radius2 + 1.0) * math.sin(green_rs):.3f} A {extra_radius2 + 1.0} {extra_radius2 + 1.0} 0 {green_la} 1 {cx + (extra_radius2 + 1.0) * math.cos(green_re):.3f} {cy + (extra_radius2 + 1.0) * math.sin(green_re):.3f}"
-    create_element(gauge_group, "path", {
-        "d": normal_text_arc,
-        "id": f"{gauge_id}-normal-text-path",
-        "opacity": "0"
-    })
-    
-    # High segment (350-500, yellow)
-    high_rs, high_re, high_la = create_colored_arc(green_end, high_end, "yellow", f"{gauge_id}-yellow-high-arc")
-    
-    # High segment (350-500, yellow)
-    high_rs, high_re, high_la = create_colored_arc(green_end, high_end, "yellow", f"{gauge_id}-yellow-high-arc")
-    
-    # Text path for HIGH label
-    high_text_arc = f"M {cx + (extra_radius2 - 2) * math.cos(high_rs):.3f} {cy + (extra_radius2 - 2) * math.sin(high_rs):.3f} A {extra_radius2 - 2} {extra_radius2 - 2} 0 {high_la} 1 {cx + (extra_radius2 - 2) * math.cos(high_re):.3f} {cy + (extra_radius2 - 2) * math.sin(high_re):.3f}"
-    create_element(gauge_group, "path", {
-        "d": high_text_arc,
-        "id": f"{gauge_id}-high-text-path",
-        "opacity": "0"
-    })
-    
-    # Labels
-    low_label = create_element(gauge_group, "text", {"fill": "black", "font-size": "4px"})
-    create_element(low_label, "textPath", {
-        "href": f"#{gauge_id}-low-text-path",
-        "startOffset": "50%",
-        "text-anchor": "middle",
-        "id": f"{gauge_id}-low-label"
-    }, "LOW 100")
-    
-    normal_label = create_element(gauge_group, "text", {"fill": "black", "font-size": "4px"})
-    create_element(normal_label, "textPath", {
-        "href": f"#{gauge_id}-normal-text-path",
-        "startOffset": "50%",
-        "text-anchor": "middle",
-        "id": f"{gauge_id}-normal-label"
-    }, "NORMAL 250")
-    
-    # SET label path
-    set_start_ratio = 200 / max_pressure
-    set_end_ratio = 300 / max_pressure
-    set_start_angle = gauge_start_angle + set_start_ratio * (gauge_end_angle - gauge_start_angle) + math.pi
-    set_end_angle = gauge_start_angle + set_end_ratio * (gauge_end_angle - gauge_start_angle) + math.pi
-    set_angle_span = abs(set_end_angle - set_start_angle)
-    set_large_arc = 1 if set_angle_span > math.pi else 0
-    set_text_arc = f"M {cx + (extra_radius2 - 4.5) * math.cos(set_start_angle):.3f} {cy + (extra_radius2 - 4.5) * math.sin(set_start_angle):.3f} A {extra_radius2 - 4.5} {extra_radius2 - 4.5} 0 {set_large_arc} 1 {cx + (extra_radius2 - 4.5) * math.cos(set_end_angle):.3f} {cy + (extra_radius2 - 4.5) * math.sin(set_end_angle):.3f}"
-    create_element(gauge_group, "path", {
-        "d": set_text_arc,
-        "id": f"{gauge_id}-set-text-path",
-        "opacity": "0"
-    })
-    
-    set_label = create_element(gauge_group, "text", {"fill": "black", "font-size": "4px"})
-    create_element(set_label, "textPath", {
-        "href": f"#{gauge_id}-set-text-path",
-        "startOffset": "50%",
-        "text-anchor": "middle",
-        "id": f"{gauge_id}-set-label"
-    }, "SET 250")
-    
-    high_label = create_element(gauge_group, "text", {"fill": "black", "font-size": "4px"})
-    create_element(high_label, "textPath", {
-        "href": f"#{gauge_id}-high-text-path",
-        "startOffset": "50%",
-        "text-anchor": "middle",
-        "id": f"{gauge_id}-high-label"
-    }, "HIGH 350")
-    
-    # Tick marks
-    num_ticks = 5
-    for i in range(num_ticks + 1):
-        pressure = (i * max_pressure) / num_ticks
-        angle = gauge_start_angle + (i * (gauge_end_angle - gauge_start_angle)) / num_ticks
-        tick_inner_radius = gauge_radius - 4
-        tick_outer_radius = gauge_radius - 2
-        tick_x1 = cx + tick_inner_radius * math.cos(angle)
-        tick_y1 = cy + tick_inner_radius * math.sin(angle)
-        tick_x2 = cx + tick_outer_radius * math.cos(angle)
-        tick_y2 = cy + tick_outer_radius * math.sin(angle)
-        tick_x1 = 2 * cx - tick_x1
-        tick_y1 = 2 * cy - tick_y1
-        tick_x2 = 2 * cx - tick_x2
-        tick_y2 = 2 * cy - tick_y2
-        
-        create_element(gauge_group, "line", {
-            "x1": tick_x1, "y1": tick_y1,
-            "x2": tick_x2, "y2": tick_y2,
-            "class": "gauge-tick"
+            "stroke-linecap": "round",
+            "id": f"{gauge_id}-{name}-arc"
         })
-        
-        if 0 <= i <= 5:
-            label_radius = gauge_radius + 3
-            label_x = cx + label_radius * math.cos(angle)
-            label_y = cy + label_radius * math.sin(angle)
-            label_x = 2 * cx - label_x
-            label_y = 2 * cy - label_y
-            radial_angle = math.atan2(label_y - cy, label_x - cx) * 180 / math.pi
-            tangent_angle = radial_angle + 90
-            create_element(gauge_group, "text", {
-                "x": label_x, "y": label_y,
-                "class": "gauge-label",
-                "text-anchor": "middle",
-                "dominant-baseline": "middle",
-                "transform": f"rotate({tangent_angle}, {label_x}, {label_y})"
-            }, str(int(pressure)))
     
-    # Minor ticks
-    for i in [0.5, 1.5, 2.5, 3.5, 4.5]:
-        angle = gauge_start_angle + (i * (gauge_end_angle - gauge_start_angle)) / num_ticks
-        tick_inner_radius = gauge_radius - 4
-        tick_outer_radius = gauge_radius - 3
-        tick_x1 = cx + tick_inner_radius * math.cos(angle)
-        tick_y1 = cy + tick_inner_radius * math.sin(angle)
-        tick_x2 = cx + tick_outer_radius * math.cos(angle)
-        tick_y2 = cy + tick_outer_radius * math.sin(angle)
-        tick_x1 = 2 * cx - tick_x1
-        tick_y1 = 2 * cy - tick_y1
-        tick_x2 = 2 * cx - tick_x2
-        tick_y2 = 2 * cy - tick_y2
-        create_element(gauge_group, "line", {
-            "x1": tick_x1, "y1": tick_y1,
-            "x2": tick_x2, "y2": tick_y2,
-            "class": "gauge-tick"
+    for name, text, label_radius, start, end in labels:
+        create_element(gauge_group, "path", {
+            "d": arc_path(cx, cy, label_radius, angle_of(start), angle_of(end)),
+            "id": f"{gauge_id}-{name}-text-path",
+            "opacity": "0"
         })
+        label = create_element(gauge_group, "text", {"fill": "black", "font-size": "4px"})
+        create_element(label, "textPath", {
+            "href": f"#{gauge_id}-{name}-text-path",
+            "startOffset": "50%",
+            "text-anchor": "middle",
+            "id": f"{gauge_id}-{name}-label"
+        }, text)
     
     # Indicator triangle (initially at 0)
-    indicator_group = create_element(gauge_group, "g", {"class": "pressure-indicator"})
+    indicator_group = create_element(gauge_group, "g", {"class": f"{kind}-indicator"})
     create_element(indicator_group, "polygon", {
         "id": f"{gauge_id}-indicator",
         "points": "0,0 0,0 0,0",
         "class": "gauge-indicator"
     })
     
-    # Pressure value and unit
+    # Value and unit text
     create_element(gauge_group, "text", {
         "id": f"{gauge_id}-value",
-        "x": cx, "y": cy + 5.25,
+        "x": cx, "y": cy + value_dy,
         "class": "rpm-value",
         "text-anchor": "middle",
         "dominant-baseline": "middle"
     }, "0")
-    
     create_element(gauge_group, "text", {
-        "x": cx, "y": cy - 0.5,
-        "class": "pressure-unit",
+        "x": cx, "y": cy + unit_dy,
+        "class": unit_class,
         "text-anchor": "middle",
         "dominant-baseline": "middle"
-    }, "Pa")
-    
-    # Low pressure indicator (initially with opacity 0)
-    low_label_x = cx - 3.5
-    low_label_y = cy - 10.5
-    low_indicator_group = create_element(gauge_group, "g", {
-        "class": "low-pressure-indicator",
-        "id": f"{gauge_id}-low-pressure-indicator",
-        "transform": f"translate({low_label_x}, {low_label_y}) scale(0.5)",
-        "opacity": "0"
-    })
-    
+    }, unit_text)
+    return gauge_group
+
+
+def create_rpm_gauge(parent, cx, cy, gauge_id, library=None, max_rpm=4000, num_ticks=4):
+    """
+    Create an RPM gauge.
+    Mirrors createGauge() from teXXX.svg JavaScript.
+    """
+    create_gauge(parent, cx, cy, gauge_id, "rpm", library, max_value=max_rpm, num_ticks=num_ticks,
+                 unit_text="RPM")
+
+
+def draw_low_pressure_arrows(parent):
+    """Draws the low pressure warning (two wavy arrows and a scale)."""
     # Path 1 - wavy arrow
-    create_element(low_indicator_group, "path", {
+    create_element(parent, "path", {
         "d": "M 4 2 C 3 4, 5 6, 4 8 C 3 10, 5 12, 4 14",
         "marker-end": "url(#arrowhead)",
         "stroke": "black",
@@ -613,7 +833,7 @@ def create_pressure_gauge(parent, cx, cy, gauge_id):
     })
     
     # Path 2 - wavy arrow
-    create_element(low_indicator_group, "path", {
+    create_element(parent, "path", {
         "d": "M 7 2 C 6 4, 8 6, 7 8 C 6 10, 8 12, 7 14",
         "marker-end": "url(#arrowhead)",
         "stroke": "black",
@@ -622,7 +842,7 @@ def create_pressure_gauge(parent, cx, cy, gauge_id):
     })
     
     # Vertical line
-    create_element(low_indicator_group, "line", {
+    create_element(parent, "line", {
         "x1": "11.5", "y1": "2",
         "x2": "11.5", "y2": "14",
         "stroke": "black",
@@ -631,7 +851,7 @@ def create_pressure_gauge(parent, cx, cy, gauge_id):
     
     # Tick marks
     for y in [2, 5, 8, 11, 14]:
-        create_element(low_indicator_group, "line", {
+        create_element(parent, "line", {
             "x1": "9.5", "y1": str(y),
             "x2": "11.5", "y2": str(y),
             "stroke": "black",
@@ -639,6 +859,89 @@ def create_pressure_gauge(parent, cx, cy, gauge_id):
         })
 
 
+def create_pressure_gauge(parent, cx, cy, gauge_id, library=None, max_pressure=500, num_ticks=5,
+                          low=100, warning=150, high=350, normal=250, set_point=250):
+    """
+    Create a pressure gauge with colored segments.
+    Mirrors createPressureGauge() from teXXX.svg JavaScript.
+
+    Segments: red 0..low, yellow low..warning, green warning..high, yellow
+    high..max_pressure. normal and set_point are the initial label values.
+    """
+    # Band labels follow the bands; SET spans a tenth of the range either
+    # side of the set point
+    gauge_group = create_gauge(
+        parent, cx, cy, gauge_id, "pressure", library,
+        start_angle=-24.5 * math.pi / 180, end_angle=math.pi + 24.5 * math.pi / 180,
+        max_value=max_pressure, num_ticks=num_ticks, minor_ticks=True, disk_radius=36.5, disk_expand=57.5,
+        bands=(("yellow-low", low, warning, "yellow"), ("low", 0, low, "red"),
+               ("green", warning, high, "green"), ("yellow-high", high, max_pressure, "yellow")),
+        labels=(("low", f"LOW {low}", 28, 0, low),
+                ("normal", f"NORMAL {normal}", 31, warning, high),
+                ("set", f"SET {set_point}", 25.5, set_point - 0.1 * max_pressure, set_point + 0.1 * max_pressure),
+                ("high", f"HIGH {high}", 28, high, max_pressure)),
+        value_dy=5.25, unit_text="Pa", unit_dy=-0.5, unit_class="pressure-unit")
+    
+    # Low pressure indicator (initially with opacity 0)
+    place_component(gauge_group, library, "low-pressure-arrows", draw_low_pressure_arrows, (),
+                    cx - 3.5, cy - 10.5, {
+                        "class": "low-pressure-indicator",
+                        "id": f"{gauge_id}-low-pressure-indicator",
+                        "transform": "scale(0.5)",
+                        "opacity": "0"
+                    })
+
+
+def draw_fuse_icon(parent):
+    """Draws a fuse symbol centred on the origin."""
+    create_element(parent, "rect", {
+        "x": "-1.5", "y": "-1",
+        "width": "3", "height": "2",
+        "fill": "transparent",
+        "stroke": "black",
+        "stroke-width": "0.5"
+    })
+    create_element(parent, "line", {
+        "x1": "-2.5", "y1": "0",
+        "x2": "2.5", "y2": "0",
+        "stroke": "black",
+        "stroke-width": "0.5"
+    })
+
+
+def draw_feedback_icon(parent):
+    """Draws a feedback (circular arrow) symbol centred on the origin."""
+    create_element(parent, "path", {
+        "d": "M 2 -1 L 1.5 0 L 2.5 0 Z",
+        "fill": "black"
+    })
+    create_element(parent, "path", {
+        "d": "M 2 0 A 2 2 0 1 1 1.732 -1",
+        "stroke": "black",
+        "fill": "none",
+        "stroke-width": "0.5"
+    })
+
+
+STATUS_ICONS = {"fuse": draw_fuse_icon, "feedback": draw_feedback_icon}
+
+
+def create_status_light(parent, cx, cy, status_id, fill, icon, active=True, library=None):
+    """
+    Create a status light: a black ring, the coloured disc updateStatuses()
+    recolours (status_id) and a fuse or feedback icon on top.
+    """
+    create_element(parent, "circle", {
+        "cx": cx, "cy": cy, "r": "4",
+        "fill": "black"
+    })
+    attribs = {"id": status_id, "cx": cx, "cy": cy, "r": "3", "fill": fill}
+    if active:
+        attribs["class"] = "status-active"
+    create_element(parent, "circle", attribs)
+    place_component(parent, library, f"{icon}-icon", STATUS_ICONS[icon], (), cx, cy)
+
+
 def load_javascript_from_file(filepath):
     """Load JavaScript code from file."""
     try:
@@ -648,60 +951,83 @@ def load_javascript_from_file(filepath):
         return None
 
 
-def main(output_filename: str = "te.svg"):
+def runtime_ids(svg, unit=None):
     """
-    Generate te.svg programmatically.
+    Ids of the elements used from outside the SVG: the bound elements of
+    unit (default DEFAULT_UNIT) and anything its panel scripts address, by
+    id or by its svgmap (camelCase) name.
+    """
+    unit = unit_config(unit or DEFAULT_UNIT)
+    scripts = "".join(bundle_scripts(unit, minify=False))
+    ids = {binding["element_id"] for binding in bindings_for(unit)}
+    for elem in svg.iter():
+        element_id = elem.get("id")
+        if element_id and (element_id in scripts or svgmap_name(element_id) in scripts):
+            ids.add(element_id)
+    return ids
+
+
+def optimize_panel(svg, unit=None, precision=2):
+    """
+    Runs the optimiser (optimize_svg.py) on a panel, keeping every element
+    the runtime uses. Returns (stats, bytes before, bytes after).
+    """
+    from optimize_svg import optimize
+    before = len(svg_bytes(svg))
+    stats = optimize(svg, precision, keep_ids=runtime_ids(svg, unit))
+    return stats, before, len(svg_bytes(svg))
+
+
+def register_bindings(svg, catalogue_path, target, bindings=None, measurement=MEASUREMENT):
+    """
+    Stores the element bindings (default BINDINGS) of target in the shared
+    SQLite sensor catalogue (common/sensordb.py), linked to the catalogued
+    sensors of measurement. Returns a list of problems: bound elements
+    missing from the SVG and fields the catalogue doesn't know.
     """
-    # Create SVG root
-    svg = ET.Element("svg", {
-        "xmlns:dc": "http://purl.org/dc/elements/1.1/",
-        "xmlns:cc": "http://creativecommons.org/ns#",
-        "xmlns:rdf": "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
-        "xmlns:svg": "http://www.w3.org/2000/svg",
-        "xmlns": "http://www.w3.org/2000/svg",
-        "xmlns:xlink": "http://www.w3.org/1999/xlink",
-        "viewBox": "0 0 100 100",
-        "width": "60mm",
-        "height": "120mm",
-        "version": "1.1",
-        "id": "svgAirflowM1"
-    })
-    
-    # Read simplified update-only JavaScript
     here = os.path.dirname(os.path.abspath(__file__))
-    update_js_path = os.path.join(here, "js", "update.js")
-    
-    js_code = ""
-    if os.path.exists(update_js_path):
-        # Read the update.js file
-        with open(update_js_path, 'r', encoding='utf-8') as f:
-            js_code = f.read()
-    
-    # Embed JavaScript with proper CDATA wrapping
-    if js_code:
-        script = create_element(svg, "script", {"type": "text/javascript"})
-        script.text = f"\n    <![CDATA[\n{js_code}\n    ]]>\n  "
-    
-    # Add title
-    #create_element(svg, "title", text="Clickable Power Button Components (ID-Styled)")
-    
-    # Create defs with styles
+    common_dir = os.path.join(here, "..", "..", "..", "common")
+    if common_dir not in sys.path:
+        sys.path.insert(0, common_dir)
+    from sensordb import SensorDB
+
+    bindings = BINDINGS if bindings is None else bindings
+    element_ids = {elem.get("id") for elem in svg.iter() if elem.get("id")}
+    problems = [f"element '{b['element_id']}' is not in the SVG" for b in bindings
+                if b["element_id"] not in element_ids]
+
+    with SensorDB(catalogue_path) as catalogue:
+        sensors = {row["field"]: row["key"] for row in catalogue.sensors(site=measurement)}
+        bindings = [dict(b, sensor_key=sensors.get(b["field"])) for b in bindings]
+        catalogue.set_bindings(target, bindings)
+    if sensors:
+        problems += [f"field '{b['field']}' is not in the catalogue" for b in bindings if b["sensor_key"] is None]
+    return problems
+
+
+def create_defs(svg, profile="full"):
+    """
+    Create <defs> with the filters, panel styles (style/defs.xml plus the
+    rules of the rendering profile), gradients and markers.
+    """
     defs = create_element(svg, "defs")
+    settings = PROFILES[profile]
     
     # Get paths
     here = os.path.dirname(os.path.abspath(__file__))
     style_path = os.path.join(here, "style/defs.xml")
     
     # Filters
-    blur_filter = create_element(defs, "filter", {
-        "id": "blur-effect",
-        "x": "-50%", "y": "-50%",
-        "width": "200%", "height": "200%"
-    })
-    create_element(blur_filter, "feGaussianBlur", {
-        "in": "SourceGraphic",
-        "stdDeviation": "1.5"
-    })
+    if settings["filters"]:
+        blur_filter = create_element(defs, "filter", {
+            "id": "blur-effect",
+            "x": "-50%", "y": "-50%",
+            "width": "200%", "height": "200%"
+        })
+        create_element(blur_filter, "feGaussianBlur", {
+            "in": "SourceGraphic",
+            "stdDeviation": "1.5"
+        })
     
     # Extract and add styles from teXXX.svg
     if os.path.exists(style_path):
@@ -711,7 +1037,7 @@ def main(output_filename: str = "te.svg"):
         for style_elem in root.findall("style"):
             if style_elem.text:
                 style = create_element(defs, "style")
-                style.text = style_elem.text
+                style.text = style_elem.text + settings["css"]
                 break
     
     # Gradients
@@ -789,27 +1115,122 @@ def main(output_filename: str = "te.svg"):
         "points": "0 0, 3 1.5, 0 3",
         "fill": "black"
     })
+    return defs
+
+
+def create_fan_status(parent, number, x0, on, library=None):
+    """Create the status panel of fan number (fuse and contactor feedback lights) at column x0."""
+    fill, active = ("#00FF00", True) if on else ("gray", False)
+    status_indicators = create_element(parent, "g", {"id": f"status-indicators-fan{number}"})
+    fuse = create_element(status_indicators, "g", {"id": f"fuse-fan{number}"})
+    create_element(fuse, "rect", {
+        "x": x0, "y": "25",
+        "width": "20", "height": "51",
+        "rx": "5", "ry": "5",
+        "fill": "silver",
+        "stroke": "black",
+        "stroke-width": "1"
+    })
+    create_status_light(fuse, x0 + 5, 71, f"status-Fuse_Fan{number}", fill, "fuse", active, library)
+    
+    feedback = create_element(status_indicators, "g", {"id": f"feedback-k{number}"})
+    create_status_light(feedback, x0 + 15, 71, f"status-Feedback_K{number}", fill, "feedback", active, library)
+
+
+def create_dryer_indicator(parent, library=None):
+    """Create the dryer panel with the dryer fuse and pipe watchdog status lights."""
+    dryer_indicator = create_element(parent, "g", {"id": "dryer-indicator"})
+    create_element(dryer_indicator, "rect", {
+        "x": "25", "y": "60",
+        "width": "30", "height": "17",
+        "rx": "5", "ry": "5",
+        "fill": "silver",
+        "stroke": "black",
+        "stroke-width": "1"
+    })
+    create_element(dryer_indicator, "text", {
+        "x": "34", "y": "65",
+        "class": "fan-label"
+    }, "DRYER")
+    
+    fuse_dryer = create_element(dryer_indicator, "g", {"id": "fuse-dryer"})
+    create_status_light(fuse_dryer, 35, 71, "status-Fuse_Dryer", "#FF0000", "fuse", library=library)
+    
+    feedback_watchdog = create_element(dryer_indicator, "g", {"id": "feedback-watchdog"})
+    create_status_light(feedback_watchdog, 45, 71, "status-FeedbackPipeWatchdog", "#00FF00", "feedback",
+                        library=library)
+
+
+def fan_columns(count):
+    """
+    Returns the left edge of each fan's column and the number of extra
+    columns left and right of the centre block. Fans alternate between the
+    left and right of the gauges, moving outwards: 1 left, 2 right, 3 left
+    of 1, ...
+    """
+    columns = [5 - 50 * (i // 2) if i % 2 == 0 else 55 + 50 * (i // 2) for i in range(count)]
+    return columns, max(0, (count + 1) // 2 - 1), max(0, count // 2 - 1)
+
+
+def build_panel(unit=None):
+    """
+    Builds the panel described by unit (see unit_config; default: the
+    AirflowM1 panel) and returns (svg root, symbol library). Particles are
+    placed from the unit's seed, so a description always gives the same
+    document.
+    """
+    unit = unit_config(unit or DEFAULT_UNIT)
+    fans = unit["fans"]
+    particles = unit["particles"]
+    rng = random.Random(unit["name"] if unit["seed"] is None else unit["seed"])
+    columns, extra_left, extra_right = fan_columns(len(fans))
+    min_x = -50 * extra_left
+    width = 100 + 50 * (extra_left + extra_right)
+
+    # Create SVG root
+    svg = ET.Element("svg", {
+        "xmlns:dc": "http://purl.org/dc/elements/1.1/",
+        "xmlns:cc": "http://creativecommons.org/ns#",
+        "xmlns:rdf": "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+        "xmlns:svg": "http://www.w3.org/2000/svg",
+        "xmlns": "http://www.w3.org/2000/svg",
+        "xmlns:xlink": "http://www.w3.org/1999/xlink",
+        "viewBox": f"{min_x} 0 {width} 100",
+        "width": f"{60 * width // 100}mm",
+        "height": "120mm",
+        "version": "1.1",
+        "id": unit["id"]
+    })
+    
+    # Shared component symbols are added to defs as they are used
+    library = SymbolLibrary(create_defs(svg, unit["profile"]))
     
     # Background
     create_element(svg, "rect", {
-        "x": "0", "y": "-50",
-        "width": "80", "height": "160",
+        "x": min_x, "y": "-50",
+        "width": width - 20, "height": "160",
         "fill": "#000011"
     })
     
     # Containers for dynamic elements (exhaust and starfield)
-    exhaust_container_1 = create_element(svg, "g", {"id": "exhaust-container-1"})
-    exhaust_container_2 = create_element(svg, "g", {"id": "exhaust-container-2"})
+    exhaust_containers = [create_element(svg, "g", {"id": f"exhaust-container-{number}"})
+                          for number in range(1, len(fans) + 1)]
     exhaust_container_center = create_element(svg, "g", {"id": "exhaust-container-center"})
     
+    # Particles, within the animation budget of the rendering profile
+    profile = PROFILES[unit["profile"]]
+    counts = particle_counts(particles, len(fans), profile["budget"])
+    
     # Create exhaust particles (static elements, animated by CSS)
-    create_exhaust(exhaust_container_1, 15, 78, 10, 3)
-    create_exhaust(exhaust_container_2, 65, 78, 10, 3)
-    create_exhaust(exhaust_container_center, 40, 78, 24, 3)
+    if profile["animate"]:
+        for container, x0 in zip(exhaust_containers, columns):
+            create_exhaust(container, x0 + 10, 78, counts["exhaust"], particles["duration"], rng)
+        create_exhaust(exhaust_container_center, 40, 78, counts["exhaust_center"], particles["duration"], rng)
     
-    # Create starfield (static elements with SMIL animation)
+    # Create starfield (animated by SMIL or CSS, depending on the profile)
     starfield_container = create_element(svg, "g", {"id": "starfield-container"})
-    create_starfield(starfield_container, 75)
+    create_starfield(starfield_container, counts["starfield"], min_x, width, rng, profile["animate"],
+                     profile["smil"])
     
     # System indicator
     system_indicator = create_element(svg, "g", {"id": "system-indicator"})
@@ -860,216 +1281,202 @@ def main(output_filename: str = "te.svg"):
         "width": "40", "height": "10",
         "fill": "url(#disk-gradient)"
     })
-    
     # Gauges
+    rpm = unit["rpm"]
     fanspeed_container = create_element(svg, "g", {"id": "fanspeed-container"})
-    create_rpm_gauge(fanspeed_container, 40, 18, "fanspeed")
+    create_rpm_gauge(fanspeed_container, *RPM_GAUGE_CENTER, "fanspeed", library=library,
+                     max_rpm=rpm["max"], num_ticks=rpm["ticks"])
     
+    pressure = unit["pressure"]
     pressure_container = create_element(svg, "g", {"id": "pressure-container"})
-    create_pressure_gauge(pressure_container, 40, -13, "pressure")
+    create_pressure_gauge(pressure_container, *PRESSURE_GAUGE_CENTER, "pressure", library=library,
+                          max_pressure=pressure["max"], num_ticks=pressure["ticks"], low=pressure["low"],
+                          warning=pressure["warning"], high=pressure["high"], normal=pressure["normal"],
+                          set_point=pressure["set"])
     
     # Status indicators
-    status_indicators_fan1 = create_element(svg, "g", {"id": "status-indicators-fan1"})
-    fuse_fan1 = create_element(status_indicators_fan1, "g", {"id": "fuse-fan1"})
-    create_element(fuse_fan1, "rect", {
-        "x": "5", "y": "25",
-        "width": "20", "height": "51",
-        "rx": "5", "ry": "5",
-        "fill": "silver",
-        "stroke": "black",
-        "stroke-width": "1"
-    })
-    create_element(fuse_fan1, "circle", {
-        "cx": "10", "cy": "71", "r": "4",
-        "fill": "black"
-    })
-    create_element(fuse_fan1, "circle", {
-        "id": "status-Fuse_Fan1",
-        "cx": "10", "cy": "71", "r": "3",
-        "fill": "#00FF00",
-        "class": "status-active"
-    })
-    create_element(fuse_fan1, "rect", {
-        "x": "8.5", "y": "70",
-        "width": "3", "height": "2",
-        "fill": "transparent",
-        "stroke": "black",
-        "stroke-width": "0.5"
-    })
-    create_element(fuse_fan1, "line", {
-        "x1": "7.5", "y1": "71",
-        "x2": "12.5", "y2": "71",
-        "stroke": "black",
-        "stroke-width": "0.5"
-    })
-    
-    feedback_k1 = create_element(status_indicators_fan1, "g", {"id": "feedback-k1"})
-    create_element(feedback_k1, "circle", {
-        "cx": "20", "cy": "71", "r": "4",
-        "fill": "black"
-    })
-    create_element(feedback_k1, "circle", {
-        "id": "status-Feedback_K1",
-        "cx": "20", "cy": "71", "r": "3",
-        "fill": "#00FF00",
-        "class": "status-active"
-    })
-    create_element(feedback_k1, "path", {
-        "d": "M 22 70 L 21.5 71 L 22.5 71 Z",
-        "fill": "black"
-    })
-    create_element(feedback_k1, "path", {
-        "d": "M 22 71 A 2 2 0 1 1 21.732 70",
-        "stroke": "black",
-        "fill": "none",
-        "stroke-width": "0.5"
-    })
-    
-    # Dryer indicator
-    dryer_indicator = create_element(svg, "g", {"id": "dryer-indicator"})
-    create_element(dryer_indicator, "rect", {
-        "x": "25", "y": "60",
-        "width": "30", "height": "17",
-        "rx": "5", "ry": "5",
-        "fill": "silver",
-        "stroke": "black",
-        "stroke-width": "1"
-    })
-    create_element(dryer_indicator, "text", {
-        "x": "34", "y": "65",
-        "class": "fan-label"
-    }, "DRYER")
-    
-    fuse_dryer = create_element(dryer_indicator, "g", {"id": "fuse-dryer"})
-    create_element(fuse_dryer, "circle", {
-        "cx": "35", "cy": "71", "r": "4",
-        "fill": "black"
-    })
-    create_element(fuse_dryer, "circle", {
-        "id": "status-Fuse_Dryer",
-        "cx": "35", "cy": "71", "r": "3",
-        "fill": "#FF0000",
-        "class": "status-active"
-    })
-    create_element(fuse_dryer, "rect", {
-        "x": "33.5", "y": "70",
-        "width": "3", "height": "2",
-        "fill": "transparent",
-        "stroke": "black",
-        "stroke-width": "0.5"
-    })
-    create_element(fuse_dryer, "line", {
-        "x1": "32.5", "y1": "71",
-        "x2": "37.5", "y2": "71",
-        "stroke": "black",
-        "stroke-width": "0.5"
-    })
-    
-    feedback_watchdog = create_element(dryer_indicator, "g", {"id": "feedback-watchdog"})
-    create_element(feedback_watchdog, "circle", {
-        "cx": "45", "cy": "71", "r": "4",
-        "fill": "black"
-    })
-    create_element(feedback_watchdog, "circle", {
-        "id": "status-FeedbackPipeWatchdog",
-        "cx": "45", "cy": "71", "r": "3",
-        "fill": "#00FF00",
-        "class": "status-active"
-    })
-    create_element(feedback_watchdog, "path", {
-        "d": "M 47 70 L 46.5 71 L 47.5 71 Z",
-        "fill": "black"
-    })
-    create_element(feedback_watchdog, "path", {
-        "d": "M 47 71 A 2 2 0 1 1 46.732 70",
-        "stroke": "black",
-        "fill": "none",
-        "stroke-width": "0.5"
-    })
-    
-    # Status indicators Fan 2
-    status_indicators_fan2 = create_element(svg, "g", {"id": "status-indicators-fan2"})
-    fuse_fan2 = create_element(status_indicators_fan2, "g", {"id": "fuse-fan2"})
-    create_element(fuse_fan2, "rect", {
-        "x": "55", "y": "25",
-        "width": "20", "height": "51",
-        "rx": "5", "ry": "5",
-        "fill": "silver",
-        "stroke": "black",
-        "stroke-width": "1"
-    })
-    create_element(fuse_fan2, "circle", {
-        "cx": "60", "cy": "71", "r": "4",
-        "fill": "black"
-    })
-    create_element(fuse_fan2, "circle", {
-        "id": "status-Fuse_Fan2",
-        "cx": "60", "cy": "71", "r": "3",
-        "fill": "gray"
-    })
-    create_element(fuse_fan2, "rect", {
-        "x": "58.5", "y": "70",
-        "width": "3", "height": "2",
-        "fill": "transparent",
-        "stroke": "black",
-        "stroke-width": "0.5"
-    })
-    create_element(fuse_fan2, "line", {
-        "x1": "57.5", "y1": "71",
-        "x2": "62.5", "y2": "71",
-        "stroke": "black",
-        "stroke-width": "0.5"
-    })
-    
-    feedback_k2 = create_element(status_indicators_fan2, "g", {"id": "feedback-k2"})
-    create_element(feedback_k2, "circle", {
-        "cx": "70", "cy": "71", "r": "4",
-        "fill": "black"
-    })
-    create_element(feedback_k2, "circle", {
-        "id": "status-Feedback_K2",
-        "cx": "70", "cy": "71", "r": "3",
-        "fill": "gray"
-    })
-    create_element(feedback_k2, "path", {
-        "d": "M 72 70 L 71.5 71 L 72.5 71 Z",
-        "fill": "black"
-    })
-    create_element(feedback_k2, "path", {
-        "d": "M 72 71 A 2 2 0 1 1 71.732 70",
-        "stroke": "black",
-        "fill": "none",
-        "stroke-width": "0.5"
-    })
+    for number, (fan, x0) in enumerate(zip(fans, columns), 1):
+        create_fan_status(svg, number, x0, fan["state"] == "on", library)
+    if unit["dryer"]:
+        create_dryer_indicator(svg, library)
     
     # Fan containers
-    power_fan1_container = create_element(svg, "g", {"id": "power-fan1-container"})
-    create_fan(power_fan1_container, 10, 50, 10, 0.75, "power-fan1", "on")
+    for number, (fan, x0) in enumerate(zip(fans, columns), 1):
+        container = create_element(svg, "g", {"id": f"power-fan{number}-container"})
+        create_fan(container, x0 + 5, 50, 10, 0.75, f"power-fan{number}", fan["state"], library=library)
     
-    power_fan2_container = create_element(svg, "g", {"id": "power-fan2-container"})
-    create_fan(power_fan2_container, 60, 50, 10, 0.75, "power-fan2", "off")
-    
-    # Write to file
-    tree = ET.ElementTree(svg)
-    ET.indent(tree, space="  ")
-    
-    # Write to string first
-    import io
-    stream = io.BytesIO()
-    tree.write(stream, encoding="utf-8", xml_declaration=False)
-    svg_content = stream.getvalue().decode('utf-8')
-    
-    # Prepend XML declaration
-    svg_content = '<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n' + svg_content
-    
-    # Fix escaped entities in JavaScript CDATA sections
-    svg_content = svg_content.replace('&lt;', '<').replace('&gt;', '>').replace('&amp;', '&')
-    
-    # Write final content
+    return svg, library
+
+
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n'
+# Elements whose text is code, written as CDATA instead of being escaped
+CDATA_TAGS = ("script", "style")
+
+
+def _escape_text(text):
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+
+def _escape_attribute(value):
+    value = _escape_text(str(value))
+    if '"' in value:
+        value = value.replace('"', "&quot;")
+    if "\n" in value:
+        value = value.replace("\n", "&#10;")
+    return value
+
+
+def _cdata(text):
+    # A literal ]]> has to be split across two sections
+    return "<![CDATA[" + text.replace("]]>", "]]]]><![CDATA[>") + "]]>"
+
+
+def serialize_svg(svg, write, pretty=True, space="  "):
+    """
+    Writes the panel tree through write(str) in a single pass, without
+    copying or modifying the tree.
+    
+    Args:
+        svg: Root element
+        write: Callable receiving the document piece by piece
+        pretty: Indent nested elements (like ET.indent) instead of writing
+                them on one line
+        space: Indentation per level
+    """
+    write(XML_DECLARATION)
+    
+    def element(elem, level):
+        tag = elem.tag
+        if tag is ET.Comment:
+            write(f"<!--{elem.text or ''}-->")
+            return
+        if tag is ET.ProcessingInstruction:
+            write(f"<?{elem.text or ''}?>")
+            return
+        
+        write("<" + tag)
+        for name, value in elem.attrib.items():
+            write(f' {name}="{_escape_attribute(value)}"')
+        
+        text = elem.text
+        if not len(elem) and not text:
+            write(" />")
+            return
+        write(">")
+        
+        if text:
+            write(_cdata(text) if tag in CDATA_TAGS else _escape_text(text))
+        # Whitespace is only added where it can't change content
+        indent = pretty and not (text and text.strip())
+        for child in elem:
+            if indent:
+                write("\n" + space * (level + 1))
+            element(child, level + 1)
+            tail = child.tail
+            if tail and not (indent and not tail.strip()):
+                write(_escape_text(tail))
+        if indent and len(elem):
+            write("\n" + space * level)
+        write(f"</{tag}>")
+    
+    element(svg, 0)
+
+
+def write_svg(svg, output_filename, pretty=True):
+    """Serializes the panel straight to output_filename."""
     with open(output_filename, 'w', encoding='utf-8') as f:
-        f.write(svg_content)
-    
-    print(f"✓ {output_filename} generated successfully using Python functions")
+        serialize_svg(svg, f.write, pretty)
+
+
+def content_hash(path):
+    """sha256 of a file, None if it doesn't exist."""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def write_svg_if_changed(svg, output_filename, pretty=True):
+    """
+    Writes the panel only if its content differs from the existing file,
+    so unchanged panels keep their modification time (and ETag). Returns
+    (sha256 of the content, bytes, whether the file was written).
+    """
+    content = svg_bytes(svg, pretty)
+    digest = hashlib.sha256(content).hexdigest()
+    if content_hash(output_filename) == digest:
+        return digest, len(content), False
+    with open(output_filename, 'wb') as f:
+        f.write(content)
+    return digest, len(content), True
+
+
+def svg_bytes(svg, pretty=True):
+    """Returns the serialized panel as UTF-8 bytes, built in one buffer."""
+    buffer = io.BytesIO()
+    with io.TextIOWrapper(buffer, encoding='utf-8', newline='\n', write_through=True) as stream:
+        serialize_svg(svg, stream.write, pretty)
+        stream.flush()
+        return buffer.getvalue()
+
+
+def main(output_filename: str = "te.svg", catalogue=None, unit=None, optimize=None, seed=None, profile=None,
+         scripts=False, minify=True, manifest=False):
+    """
+    Generate te.svg programmatically, or the panel of a unit description
+    (a unit_config dict or the path of a JSON unit file). With optimize
+    (a number of decimals), the panel is optimised before it is written;
+    seed and profile override the unit's particle seed and rendering
+    profile. With scripts, the panel's init and render code (bundle_scripts)
+    are written next to the SVG as <name>.init.js and <name>.render.js;
+    with manifest, its binding manifest as <name>.bindings.json.
+    """
+    if isinstance(unit, str):
+        unit = load_unit(unit)
+    overrides = {key: value for key, value in (("seed", seed), ("profile", profile)) if value is not None}
+    unit = unit_config(dict(unit or DEFAULT_UNIT, **overrides))
+    svg, library = build_panel(unit)
+
+    if catalogue:
+        target = os.path.splitext(os.path.basename(output_filename))[0]
+        bindings = bindings_for(unit)
+        for problem in register_bindings(svg, catalogue, target, bindings, unit["measurement"]):
+            print(f"Warning: {problem}")
+        print(f"✓ {len(bindings)} bindings of '{target}' stored in {catalogue}")
+
+    if optimize is not None:
+        stats, before, after = optimize_panel(svg, unit, optimize)
+        print(", ".join(f"{count} {name}" for name, count in stats.items()))
+        print(f"✓ optimised: {before} -> {after} bytes ({100 * (before - after) / before:.1f}% smaller)")
+
+    digest, size, written = write_svg_if_changed(svg, output_filename)
+    if written:
+        print(f"✓ {output_filename} generated successfully using Python functions "
+              f"({len(library.symbols)} symbols, {library.instances} instances)")
+    else:
+        print(f"= {output_filename} unchanged")
+    print(f"  {size} bytes, sha256 {digest}")
+    
+    if scripts:
+        stem = os.path.splitext(output_filename)[0]
+        for suffix, code in zip((".init.js", ".render.js"), bundle_scripts(unit, minify)):
+            with open(stem + suffix, 'w', encoding='utf-8') as f:
+                f.write(code)
+            print(f"✓ {stem + suffix} generated ({len(code)} bytes)")
+        print(f"  {len(panel_updates(unit))} dirty-checked updates, {len(field_table(unit))} fields")
+
+    if manifest:
+        manifest_filename = os.path.splitext(output_filename)[0] + ".bindings.json"
+        written = write_binding_manifest(unit, manifest_filename)
+        print(f"✓ {manifest_filename} generated ({len(written['bindings'])} bindings, "
+              f"{len(written['fields'])} fields)")
     return 0
 
 
@@ -1083,5 +1490,82 @@ if __name__ == "__main__":
         default="te.svg", 
         help="Output SVG file path (default: te.svg)"
     )
+    parser.add_argument(
+        "--catalogue",
+        metavar="DB",
+        help="Register the SVG's element bindings in this SQLite sensor catalogue"
+    )
+    parser.add_argument(
+        "--unit",
+        metavar="JSON",
+        help="Unit description to generate instead of the built-in AirflowM1 panel"
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="SOURCE",
+        help="Generate every unit of a directory of unit JSON files (or one JSON list of units)"
+    )
+    parser.add_argument(
+        "--out-dir",
+        default="panels",
+        help="Output directory for --batch (default: panels)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Worker processes for --batch (default: CPU count)"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="With --batch, regenerate units whose configuration hasn't changed"
+    )
+    parser.add_argument(
+        "--optimize",
+        nargs="?",
+        type=int,
+        const=2,
+        metavar="DECIMALS",
+        help="Optimise the output, rounding coordinates to DECIMALS (default: 2)"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="Seed for the particle layout (default: the unit's seed, else its name)"
+    )
+    parser.add_argument(
+        "--profile",
+        choices=PROFILES,
+        help="Rendering profile: full, reduced (animation budget, no filters) or static "
+             "(default: the unit's, else full)"
+    )
+    parser.add_argument(
+        "--scripts",
+        action="store_true",
+        help="Also write the panel's init and render code (NAME.init.js, NAME.render.js next to the SVG)"
+    )
+    parser.add_argument(
+        "--no-minify",
+        dest="minify",
+        action="store_false",
+        help="Write the panel scripts unminified"
+    )
+    parser.add_argument(
+        "--manifest",
+        action="store_true",
+        help="Also write the binding manifest (NAME.bindings.json next to the SVG) for query_influxdb.py --panel"
+    )
     args = parser.parse_args()
-    exit(main(args.output))
+    overrides = {key: value for key, value in (("seed", args.seed), ("profile", args.profile)) if value is not None}
+    if args.batch:
+        from batch import discover_units, print_report, run_batch
+        results = run_batch(discover_units(args.batch, args.out_dir, args.optimize, overrides), args.out_dir,
+                            workers=args.workers, force=args.force)
+        print_report(results)
+        exit(1 if any(result["error"] for result in results) else 0)
+    try:
+        exit(main(args.output, args.catalogue, args.unit, args.optimize, args.seed, args.profile, args.scripts,
+                  args.minify, args.manifest))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        exit(1)
@@ -1,3 +1,8 @@
+/* Template of the panel's init code: generate_svg.py --scripts appends the
+unit's generated update routine (options.panel, options.updatePanel) and
+writes the bundle to paste into the panel, e.g. ../te.init.js. This file
+doesn't run on its own.
+*/
 
 options.debug = false; // Toggle for console.log statements
 
@@ -15,7 +20,6 @@ options.statusData = {
   "Fuse_Dryer": 0,
   "Fuse_Fan1": 0,
   "Fuse_Fan2": 0,
-  "Inflation": 0,
   "NoEmergency": 0,
   "OperationalHours1": 0,
   "OperationalHours2": 0,
@@ -23,20 +27,7 @@ options.statusData = {
   "SetPressure": 0,
   "SetPressure_High": 0,
   "SetPressure_Normal": 0,
-  "SetPressure_Low": 100,
-  "free": 0,
-  "LowPressure": 0
-};
-
-options.statusMap = {
-  'status-Fuse_Fan1': options.statusData['Fan1_On'] ? options.statusData['Fuse_Fan1'] : -1,
-  'status-Feedback_K1': options.statusData['Fan1_On'] ? options.statusData['Feedback_K1'] : -1,
-  'status-Fuse_Fan2': options.statusData['Fan2_On'] ? options.statusData['Fuse_Fan2'] : -1,
-  'status-Feedback_K2': options.statusData['Fan2_On'] ? options.statusData['Feedback_K2'] : -1,
-  'status-Inflation': options.statusData['Inflation'],
-  'status-free': options.statusData['free'],
-  'status-Fuse_Dryer': options.statusData['Fuse_Dryer'],
-  'status-FeedbackPipeWatchdog': options.statusData['FeedbackPipeWatchdog']
+  "SetPressure_Low": 100
 };
 
 // Update status indicator element based on value
@@ -55,12 +46,14 @@ options.updateStatusElement = (el, value) => {
   }
 }; 
 
+// The gauge functions read the unit's gauge geometry from options.panel and
+// are called by options.updatePanel, both generated by generate_svg.py and
+// appended to this script (see bundle_scripts)
+
 // Update RPM gauge based on FanSpeed_RPM
 options.updateRPMGauge = (svgmap) => {  
-  const cx = 40; //parseFloat(gauge.getAttribute('data-cx'));
-  const cy = 18; //parseFloat(gauge.getAttribute('data-cy'));
+  const { cx, cy, max: maxRPM } = options.panel.rpm;
   const gaugeRadius = 15;
-  const maxRPM = 4000;
   const gaugeStartAngle = 0; // 0°
   const gaugeEndAngle = Math.PI; // 180°
     
@@ -124,11 +117,10 @@ options.updateRPMGauge = (svgmap) => {
 
 // Update pressure gauge segments based on SetPressure_Low and SetPressure_High
 options.updatePressureGaugeSegments = (svgmap) => {   
-  const cx = 40; //parseFloat(gauge.getAttribute('data-cx'));
-  const cy = -13; //parseFloat(gauge.getAttribute('data-cy'));
+  const { cx, cy, max: maxPressure } = options.panel.pressure;
+  const warningSpan = options.panel.pressure.warning - options.panel.pressure.low;
    
   const extraRadius2 = 30; // Radius for colored arc segments
-  const maxPressure = 500;
   const gaugeStartAngle = -24.5 * Math.PI / 180; // -24.5°
   const gaugeEndAngle = Math.PI + 24.5 * Math.PI / 180; // 204.5°
   
@@ -152,7 +144,7 @@ options.updatePressureGaugeSegments = (svgmap) => {
   }
   const lowThreshold = options.statusData["SetPressure_Low"];
   const highThreshold = options.statusData["SetPressure_High"]; 
-  const pressureYellowLowArcNew = createArcPath(lowThreshold / maxPressure, (lowThreshold + 50) / maxPressure, extraRadius2);
+  const pressureYellowLowArcNew = createArcPath(lowThreshold / maxPressure, (lowThreshold + warningSpan) / maxPressure, extraRadius2);
  
   svgmap.pressureYellowLowArc.plot(pressureYellowLowArcNew.path);
   options.log("Updated yellow-low arc to:", pressureYellowLowArcNew.path);
@@ -163,7 +155,7 @@ options.updatePressureGaugeSegments = (svgmap) => {
   svgmap.pressureLowArc.plot(pressureLowArcNew.path);
   options.log("Updated low arc to:", pressureLowArcNew.path);
 
-  const greenStart = (lowThreshold + 50) / maxPressure;
+  const greenStart = (lowThreshold + warningSpan) / maxPressure;
   const greenEnd = highThreshold / maxPressure;
   const greenArcNew = createArcPath(greenStart, greenEnd, extraRadius2);
   //svgmap.pressureGreenArc.attr('d', greenArcNew.path);
@@ -175,11 +167,7 @@ options.updatePressureGaugeSegments = (svgmap) => {
   //svgmap.pressureYellowHighArc.attr('d', pressureYellowHighArcNew.path);
   svgmap.pressureYellowHighArc.plot(pressureYellowHighArcNew.path);
   options.log("Updated yellow-high arc to:", pressureYellowHighArcNew.path);
-   
-  svgmap.pressureLowLabel.text(`LOW ${options.statusData["SetPressure_Low"]}`);
-  svgmap.pressureNormalLabel.text(`NORMAL ${options.statusData["SetPressure_Normal"]}`);
-  svgmap.pressureHighLabel.text(`HIGH ${options.statusData["SetPressure_High"]}`);
-  svgmap.pressureSetLabel.text(`SET ${options.statusData["SetPressure"]}`);   
+  // The band labels are updated by options.updatePanel
 }
  
 options.updatePressureGauge = (svgmap) => {
@@ -187,11 +175,8 @@ options.updatePressureGauge = (svgmap) => {
   const newPressure = Math.round(options.statusData["Pressure"]);
   options.log("Updating pressure gauge with value:", newPressure);
   
-  //const gauge = svgmap.pressure;
-  const cx = 40; //parseFloat(gauge.getAttribute('data-cx'));
-  const cy = -13; //parseFloat(gauge.getAttribute('data-cy'));
+  const { cx, cy, max: maxPressure, low, warning, high } = options.panel.pressure;
   const gaugeRadius = 15;
-  const maxPressure = 500;
   const gaugeStartAngle = -24.5 * Math.PI / 180; // -24.5°
   const gaugeEndAngle = Math.PI + 24.5 * Math.PI / 180; // 204.5°
   
@@ -221,11 +206,11 @@ options.updatePressureGauge = (svgmap) => {
     options.log("Pressure value arc updated to:", arcPath);
     
     // Update color based on pressure ranges
-    if (newPressure < 100) {
+    if (newPressure < low) {
       svgmap.pressureValueArc.style.stroke = '#FF0000'; // Red
-    } else if (newPressure < 150) {
+    } else if (newPressure < warning) {
       svgmap.pressureValueArc.style.stroke = '#FFFF00'; // Yellow 
-    } else if (newPressure <= 350) {
+    } else if (newPressure <= high) {
       svgmap.pressureValueArc.style.stroke = '#00FF00'; // Green
     } else {
       svgmap.pressureValueArc.style.stroke = '#FFFF00'; // Yellow
@@ -280,69 +265,3 @@ options.updatePressureGauge = (svgmap) => {
   }
    options.log("Pressure low indicator opacity set to:", newPressure <= options.statusData["SetPressure_Low"] ? '1' : '0'); 
 }
- 
-// Update status indicators based on statusData
-options.updateStatuses = (svgmap) => {
-
-  if (options.statusData["Fan1_On"] && !svgmap.powerFan1.hasClass('power-on'))
-    svgmap.powerFan1.addClass('power-on')
-  else if (!options.statusData["Fan1_On"] && svgmap.powerFan1.hasClass('power-on'))
-    svgmap.powerFan1.removeClass('power-on')
-
-  if (options.statusData["Fan2_On"] && !svgmap.powerFan2.hasClass('power-on'))
-    svgmap.powerFan2.addClass('power-on')
-  else if (!options.statusData["Fan2_On"] && svgmap.powerFan2.hasClass('power-on'))
-    svgmap.powerFan2.removeClass('power-on') 
-     
-  // Update no-errors indicator  
-  if (options.statusData["NoEmergency"] === 1) {
-    svgmap.noErrorsDisc.attr('fill', 'green');
-    svgmap.noErrorsDisc.addClass('status-active');
-    svgmap.noErrorsSymbol.text('✓');
-  } else {
-    svgmap.noErrorsDisc.attr('fill', 'url(#status-red-gradient)');
-    svgmap.noErrorsDisc.removeClass('status-active');
-    svgmap.noErrorsSymbol.text('✗');
-  }
-      
-  options.updateStatusElement(
-    svgmap.statusFuseFan1,
-    options.statusMap['status-Fuse_Fan1']
-  );
-
-  options.updateStatusElement(
-    svgmap.statusFuseFan2,
-    options.statusMap['status-Fuse_Fan2']
-  );
-
-  options.updateStatusElement(
-    svgmap.statusFeedbackK1,
-    options.statusMap['status-Feedback_K1']
-  );
-
-  options.updateStatusElement(
-    svgmap.statusFeedbackK2,
-    options.statusMap['status-Feedback_K2']
-  );
-
-  options.updateStatusElement(
-    svgmap.statusFuseDryer,
-    options.statusMap['status-Fuse_Dryer']
-  );
-
-  options.updateStatusElement(
-    svgmap.statusFeedbackPipeWatchdog,
-    options.statusMap['status-FeedbackPipeWatchdog']
-  );
-}
- 
-options.updateExhaust = (svgmap) => { 
-  options.log("Updating exhaust visibility based on fan states");
-
-  svgmap.exhaustContainer1.css('display', options.statusData["Fan1_On"] ? 'block' : 'none');  
-  svgmap.exhaustContainer2.css('display', options.statusData["Fan2_On"] ? 'block' : 'none');
-  svgmap.exhaustContainerCenter.css('display', (options.statusData["Fan1_On"] || options.statusData["Fan2_On"]) ? 'block' : 'none');
-}
-
-
- 
\ No newline at end of file
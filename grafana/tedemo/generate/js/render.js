@@ -1,142 +1,87 @@
-/* InfluxDB query used to get the data:
-SELECT 
-  last("Fan1_on") as Fan1_On, 
-  last("Fan2_on") as Fan2_On,  
-  last("Fan1_off") as Fan1_Off, 
-  last("Fan2_off") as Fan2_Off,  
-  last("Fan_Speed") as FanSpeed_RPM,
-  last("FeedbackPipeWatchdog") as FeedbackPipeWatchdog,
-  last("Feedback_K1") as Feedback_K1,
-  last("Feedback_K2") as Feedback_K2,
-  last("Fuse_Dryer") as Fuse_Dryer,
-  last("Fuse_Fan1") as Fuse_Fan1,
-  last("Fuse_Fan2") as Fuse_Fan2,
-  last("Inflation") as Inflation,
-  last("No_Emergency") as NoEmergency,
-  last("Operational_Hours_1") as OperationalHours1,
-  last("Operational_Hours_2") as OperationalHours2,
-  last("Pressure_Sensor") as Pressure,
-  last("Set_Pressure") as SetPressure,
-  last("Set_Pressure") as SetPressure,
-  last("Set_Pressure_High") as SetPressure_High,
-  last("Set_Pressure_Normal") as SetPressure_Normal,
-  last("free") as free,
-  last("low_press") as LowPressure
-FROM "airflowm01" 
+/* Template of the panel's render code: generate_svg.py --scripts fills in
+the unit's field table and writes the bundle to paste into the panel,
+e.g. ../te.render.js (with ../te.init.js, which defines updatePanel).
+*/
+
+/* InfluxDB query used to get the data: exactly the fields of the panel's
+binding manifest (generate_svg.py --manifest), for the Grafana panel:
+  python query_influxdb.py BUCKET TOKEN FQDN PORT --panel te.bindings.json --influxql
 */
 
 options.debug = false; // Toggle for console.log statements
 //console.log("Rendering airflowm01 SVG with data:", data);
 
-const getFieldValue = (name) => data.series[0].fields.find(f => f.name === name).values[0];
-
-options.statusData = {  
-  "Fan1_On": getFieldValue("Fan1_On"),
-  "Fan2_On": getFieldValue("Fan2_On"),
-  "FanSpeed_RPM": getFieldValue("FanSpeed_RPM"),
-  "FeedbackPipeWatchdog": getFieldValue("FeedbackPipeWatchdog"),
-  "Feedback_K1": getFieldValue("Feedback_K1"),
-  "Feedback_K2": getFieldValue("Feedback_K2"),
-  "Fuse_Dryer": getFieldValue("Fuse_Dryer"),
-  "Fuse_Fan1": getFieldValue("Fuse_Fan1"),
-  "Fuse_Fan2": getFieldValue("Fuse_Fan2"),
-  "Inflation": getFieldValue("Inflation"),
-  "NoEmergency": getFieldValue("NoEmergency"),
-  "OperationalHours1": getFieldValue("OperationalHours1"),
-  "OperationalHours2": getFieldValue("OperationalHours2"),
-  "Pressure": getFieldValue("Pressure"),
-  "SetPressure": getFieldValue("SetPressure"),
-  "SetPressure_High": getFieldValue("SetPressure_High"),
-  "SetPressure_Normal": getFieldValue("SetPressure_Normal"),
-  "free": getFieldValue("free"),
-  "LowPressure": getFieldValue("LowPressure"),
-  "SetPressure_Low": 100
+// <fields> generated by generate_svg.py from the unit's bindings, do not edit
+// [alias, value while the field is missing from the data frame]
+const FIELDS = [
+  ["Fuse_Fan1", 0],
+  ["Feedback_K1", 0],
+  ["Fuse_Fan2", 0],
+  ["Feedback_K2", 0],
+  ["Fuse_Dryer", 0],
+  ["FeedbackPipeWatchdog", 0],
+  ["NoEmergency", 0],
+  ["Fan1_On", 0],
+  ["Fan2_On", 0],
+  ["OperationalHours1", 0],
+  ["OperationalHours2", 0],
+  ["FanSpeed_RPM", 0],
+  ["Pressure", 0],
+  ["SetPressure", 0],
+  ["SetPressure_Normal", 0],
+  ["SetPressure_High", 0]
+];
+// Values not queried from InfluxDB
+const CONSTANTS = {"SetPressure_Low": 100};
+// </fields>
+
+// Field name -> index, built once per data frame instead of a scan per value
+const frame = data.series[0];
+if (!options.fieldIndex || options.fieldFrame !== frame) {
+  options.fieldFrame = frame;
+  options.fieldIndex = new Map((frame ? frame.fields : []).map((f, i) => [f.name, i]));
+}
+
+const getFieldValue = (name, fallback) => {
+  const i = options.fieldIndex.get(name);
+  const value = i === undefined ? undefined : frame.fields[i].values[0];
+  return value === undefined || value === null ? fallback : value;
 };
 
-options.statusMap = {
-  'status-Fuse_Fan1': options.statusData['Fan1_On'] ? options.statusData['Fuse_Fan1'] : -1,
-  'status-Feedback_K1': options.statusData['Fan1_On'] ? options.statusData['Feedback_K1'] : -1,
-  'status-Fuse_Fan2': options.statusData['Fan2_On'] ? options.statusData['Fuse_Fan2'] : -1,
-  'status-Feedback_K2': options.statusData['Fan2_On'] ? options.statusData['Feedback_K2'] : -1,
-  'status-Inflation': options.statusData['Inflation'],
-  'status-free': options.statusData['free'],
-  'status-Fuse_Dryer': options.statusData['Fuse_Dryer'],
-  'status-FeedbackPipeWatchdog': options.statusData['FeedbackPipeWatchdog']
-};
-  
-svgmap.fan1Hours.text((options.statusData["OperationalHours1"]).toString().padStart(6, '0'));  
-svgmap.fan2Hours.text((options.statusData["OperationalHours2"]).toString().padStart(6, '0'));    
-    
-options.updateRPMGauge(svgmap);
-options.updatePressureGauge(svgmap);
-options.updatePressureGaugeSegments(svgmap);  
-
-options.updateStatuses(svgmap);
-options.updateExhaust(svgmap);
-
-// Click handlers for interactive elements
-svgmap.statusFuseDryer.click(function () {
-  options.log("Clicked fuse dryer");
-  const newPressure = Math.round(options.statusData["Pressure"] - 69);
-  svgmap.pressureValue.text(newPressure.toString());
-
-  options.updatePressureGauge(svgmap);
-});
-
-svgmap.statusFuseFan2.click(function () {
-  options.log("Clicked fuse fan2");
-
-  const newSpeed = Math.round(options.statusData["FanSpeed_RPM"] + 100);
-  svgmap.fanspeedValue.text(newSpeed.toString());
-
-  options.updateRPMGauge(svgmap);
-});
-
-svgmap.statusFuseFan1.click(function () {
-  options.log("Clicked fuse fan1");
-  
-  if (options.statusData["SetPressure_Low"] > 150) {
-    options.statusData["SetPressure_Low"] = 100
-  } else {
-    options.statusData["SetPressure_Low"] = 150
+const previous = options.statusData || {};
+const missing = [];
+options.statusData = Object.assign({}, CONSTANTS);
+for (const [name, fallback] of FIELDS) {
+  if (!options.fieldIndex.has(name)) missing.push(name);
+  options.statusData[name] = getFieldValue(name, name in previous ? previous[name] : fallback);
+}
+if (missing.length) options.log("Fields missing from the data frame:", missing);
+
+// Only elements whose value changed since the last refresh are touched
+options.updatePanel(svgmap);
+
+// Click handlers (demo interactions), bound once per svgmap: they change
+// the status data and let updatePanel redraw what changed
+if (options.boundMap !== svgmap) {
+  options.boundMap = svgmap;
+  const onClick = (node, label, change) => {
+    if (!node) return;
+    node.off('click');
+    node.click(function () {
+      options.log("Clicked", label);
+      change(options.statusData);
+      options.updatePanel(svgmap);
+    });
+  };
+
+  onClick(svgmap.statusFuseDryer, "fuse dryer", (d) => { d["Pressure"] = Math.round(d["Pressure"] - 69); });
+  onClick(svgmap.statusFuseFan2, "fuse fan2", (d) => { d["FanSpeed_RPM"] = Math.round(d["FanSpeed_RPM"] + 100); });
+  onClick(svgmap.statusFuseFan1, "fuse fan1", (d) => {
+    d["SetPressure_Low"] = d["SetPressure_Low"] >= 150 ? 100 : 150;
+  });
+  for (let n = 1; n <= options.panel.fans; n++) {
+    onClick(svgmap[`statusFeedbackK${n}`], `feedback K${n}`, (d) => { d[`OperationalHours${n}`] += 100; });
+    onClick(svgmap[`powerFan${n}Container`], `fan${n}`, (d) => { d[`Fan${n}_On`] = 1 - d[`Fan${n}_On`]; });
   }
-
-  options.updatePressureGaugeSegments(svgmap);
-
-  options.log("Updated pressure labels and segments for new config");
-  options.log(svgmap.pressureLowLabel.text());
-});
-
-svgmap.statusFeedbackK1.click(function () {
-  options.log("Clicked feedback K1");
-
-  svgmap.fan1Hours.text((options.statusData["OperationalHours1"] + 100).toString().padStart(6, '0'));
-});
-
-svgmap.statusFeedbackK2.click(function () {
-  options.log("Clicked feedback K2");
-  svgmap.fan2Hours.text((options.statusData["OperationalHours2"] + 100).toString().padStart(6, '0'));
-});
-
-svgmap.powerFan1Container.click(function () {
-  options.log("Clicked fan1");
-  options.statusData["Fan1_On"] = 1 - options.statusData["Fan1_On"];
-
-  options.updateStatuses(svgmap);
-  options.updateExhaust(svgmap);
-});
-
-svgmap.powerFan2Container.click(function () {
-  options.log("Clicked fan2");
-  options.statusData["Fan2_On"] = 1 - options.statusData["Fan2_On"];
-
-  options.updateStatuses(svgmap);
-  options.updateExhaust(svgmap);
-});
-
-svgmap.statusFeedbackPipeWatchdog.click(function () {
-  options.log("Clicked watchdog");
-  options.statusData["NoEmergency"] = 1 - options.statusData["NoEmergency"];
-
-  options.updateStatuses(svgmap);
-});
+  onClick(svgmap.statusFeedbackPipeWatchdog, "watchdog", (d) => { d["NoEmergency"] = 1 - d["NoEmergency"]; });
+}
@@ -0,0 +1,213 @@
+"""
+Size optimisation pass for generated panels.
+
+optimize(svg) rewrites the element tree in place before serialization:
+
+- drops zero-opacity helpers nothing refers to
+- rounds numbers in geometry attributes to a fixed precision
+- merges adjacent stroked lines/paths that share all other attributes
+- moves presentation attributes repeated on many elements into
+  generated CSS classes
+
+Generated rules are wrapped in :where() so they keep the lowest
+specificity, like the attributes they replace: every rule of the panel
+stylesheet still wins over them. Elements with an id are never restyled
+or merged, as the runtime scripts address them (and set their
+attributes) by id.
+"""
+import re
+from collections import Counter
+
+import xml.etree.ElementTree as ET
+
+NUMBER = re.compile(r"-?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][-+]?\d+)?")
+URL_REF = re.compile(r"url\(#([^)]+)\)")
+# Attributes whose numbers are rounded: geometry and numeric presentation
+# attributes only, so colours (fill="#1e90ff"), ids and names stay intact
+NUMERIC = {"x", "y", "x1", "y1", "x2", "y2", "cx", "cy", "r", "rx", "ry", "fx", "fy", "dx", "dy",
+           "width", "height", "d", "points", "transform", "gradientTransform", "offset", "startOffset",
+           "refX", "refY", "markerWidth", "markerHeight", "stdDeviation", "stroke-width", "stroke-dasharray",
+           "stroke-dashoffset", "font-size", "opacity", "fill-opacity", "stroke-opacity", "stop-opacity"}
+PRESENTATION = ("fill", "stroke", "stroke-width", "stroke-linecap", "stroke-linejoin", "stroke-dasharray",
+                "fill-opacity", "stroke-opacity", "font-size", "font-family", "font-weight", "text-anchor",
+                "dominant-baseline")
+# Merging subpaths changes markers and how overlapping parts blend
+NO_MERGE = ("marker-start", "marker-mid", "marker-end", "opacity", "stroke-opacity", "filter", "mask",
+            "clip-path", "transform")
+CLASS_PREFIX = "s"
+
+
+def _format_number(match, precision):
+    text = match.group()
+    if "." not in text and "e" not in text and "E" not in text:
+        return text
+    value = round(float(text), precision)
+    text = f"{value:.{precision}f}".rstrip("0").rstrip(".")
+    return "0" if text in ("-0", "") else text
+
+
+def _references(svg):
+    """Ids referenced from inside the document (href, url(#...))."""
+    refs = set()
+    for elem in svg.iter():
+        for name, value in elem.attrib.items():
+            value = str(value)
+            if name in ("href", "xlink:href") and value.startswith("#"):
+                refs.add(value[1:])
+            else:
+                refs.update(URL_REF.findall(value))
+        if elem.tag == "style" and elem.text:
+            refs.update(URL_REF.findall(elem.text))
+    return refs
+
+
+def drop_hidden(svg, keep_ids=()):
+    """Removes opacity 0 elements that have no referenced id. Returns the number removed."""
+    keep = _references(svg) | set(keep_ids)
+    removed = 0
+    for parent in list(svg.iter()):
+        for child in list(parent):
+            if str(child.get("opacity", "")).strip() in ("0", "0.0") and child.get("id") not in keep:
+                if not any(elem.get("id") in keep for elem in child.iter() if elem.get("id")):
+                    parent.remove(child)
+                    removed += 1
+    return removed
+
+
+def quantize(svg, precision=2):
+    """Rounds the numbers of geometry attributes. Returns the number of attributes changed."""
+    changed = 0
+    for elem in svg.iter():
+        for name, value in elem.attrib.items():
+            if name not in NUMERIC:
+                continue
+            value = str(value)
+            rounded = NUMBER.sub(lambda match: _format_number(match, precision), value)
+            if rounded != value:
+                elem.set(name, rounded)
+                changed += 1
+    return changed
+
+
+def _as_path(elem):
+    """Path data of a mergeable line or path, None otherwise."""
+    if elem.get("id") or len(elem) or (elem.text and elem.text.strip()):
+        return None
+    if any(name in elem.attrib for name in NO_MERGE):
+        return None
+    if elem.tag == "line":
+        # A straight segment has no area to fill
+        return "M {} {} L {} {}".format(*(elem.get(a, "0") for a in ("x1", "y1", "x2", "y2")))
+    if elem.tag == "path" and elem.get("fill") == "none":
+        return elem.get("d")
+    return None
+
+
+def _merge_key(elem):
+    geometry = ("x1", "y1", "x2", "y2") if elem.tag == "line" else ("d",)
+    return tuple(sorted((name, str(value)) for name, value in elem.attrib.items()
+                        if name not in geometry and name != "fill"))
+
+
+def merge_paths(svg):
+    """
+    Joins runs of adjacent lines/stroked paths with identical attributes
+    into one path. Returns the number of elements removed.
+    """
+    removed = 0
+    for parent in list(svg.iter()):
+        children = list(parent)
+        i = 0
+        while i < len(children):
+            first = children[i]
+            data = _as_path(first)
+            run = [first]
+            if data is not None:
+                key = _merge_key(first)
+                while i + len(run) < len(children):
+                    candidate = children[i + len(run)]
+                    if (run[-1].tail and run[-1].tail.strip()) or _merge_key(candidate) != key:
+                        break
+                    candidate_data = _as_path(candidate)
+                    if candidate_data is None:
+                        break
+                    data += " " + candidate_data
+                    run.append(candidate)
+            if len(run) > 1:
+                attribs = {name: value for name, value in first.attrib.items()
+                           if name not in ("x1", "y1", "x2", "y2", "d", "fill")}
+                first.tag = "path"
+                first.attrib.clear()
+                first.set("d", data)
+                first.attrib.update(attribs)
+                first.set("fill", "none")
+                for merged in run[1:]:
+                    parent.remove(merged)
+                removed += len(run) - 1
+            i += len(run)
+    return removed
+
+
+def hoist_attributes(svg, min_uses=3):
+    """
+    Replaces presentation attribute sets shared by at least min_uses
+    elements with a generated class. Returns (classes, attributes removed).
+    """
+    candidates = [elem for elem in svg.iter()
+                  if not elem.get("id") and elem.tag not in ("svg", "defs", "style", "stop", "symbol")]
+    signature = {}
+    for elem in candidates:
+        attribs = tuple((name, str(elem.get(name))) for name in PRESENTATION if name in elem.attrib)
+        if attribs:
+            signature[elem] = attribs
+    counts = Counter(signature.values())
+
+    existing = {name for elem in svg.iter() for name in (elem.get("class") or "").split()}
+    names, rules, removed = {}, [], 0
+    for attribs, uses in counts.most_common():
+        if uses < min_uses:
+            break
+        name = f"{CLASS_PREFIX}{len(names)}"
+        while name in existing:
+            name = "_" + name
+        declarations = ";".join(f"{prop}:{value}" for prop, value in attribs)
+        rule = f":where(.{name}){{{declarations}}}"
+        attribute_bytes = sum(len(f' {prop}="{value}"') for prop, value in attribs)
+        # Only worth it if the attributes outweigh class references and the rule
+        if attribute_bytes * uses <= len(rule) + (len(name) + 9) * uses:
+            continue
+        names[attribs] = name
+        rules.append(rule)
+
+    for elem, attribs in signature.items():
+        name = names.get(attribs)
+        if name is None:
+            continue
+        for prop, _ in attribs:
+            del elem.attrib[prop]
+        removed += len(attribs)
+        elem.set("class", f"{elem.get('class')} {name}" if elem.get("class") else name)
+
+    if rules:
+        defs = svg.find("defs")
+        if defs is None:
+            defs = ET.Element("defs")
+            svg.insert(0, defs)
+        style = defs.find("style")
+        if style is None:
+            style = ET.SubElement(defs, "style")
+        # First, so equal-specificity rules of the stylesheet keep winning
+        style.text = "\n" + "\n".join(rules) + (style.text or "")
+    return len(rules), removed
+
+
+def optimize(svg, precision=2, keep_ids=(), min_uses=3):
+    """
+    Runs all passes on the panel tree. keep_ids are ids used from outside
+    the document (runtime scripts). Returns per-pass counts.
+    """
+    stats = {"hidden elements dropped": drop_hidden(svg, keep_ids),
+             "attributes rounded": quantize(svg, precision),
+             "elements merged": merge_paths(svg)}
+    stats["classes generated"], stats["attributes hoisted"] = hoist_attributes(svg, min_uses)
+    return stats
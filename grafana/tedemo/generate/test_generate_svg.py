@@ -0,0 +1,61 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from generate_svg import DEFAULT_UNIT, build_panel, bundle_scripts, minify_js, svg_bytes, unit_config
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class MinifyJsTest(unittest.TestCase):
+    def test_comments_indentation_and_blank_lines_are_stripped(self):
+        source = ("/* header\n   more */\n\nconst a = 1; // trailing\n  // own line\n"
+                  "function f() {\n    return a;  /* inline */\n}\n")
+        self.assertEqual(minify_js(source), "const a = 1;\nfunction f() {\nreturn a;  /* inline */\n}\n")
+
+    def test_strings_keep_comment_markers(self):
+        source = "const url = 'http://example.com'; // link\nconst s = \"a /* b */ c\";\n"
+        self.assertEqual(minify_js(source), "const url = 'http://example.com'; // link\nconst s = \"a /* b */ c\";\n")
+
+    def test_regex_literals_are_kept(self):
+        source = "const re = /\\/\\/+ */g;\nconst parts = path.split(/\\//);\n"
+        self.assertEqual(minify_js(source), source)
+
+    def test_template_literals_are_kept(self):
+        source = "const p = `M ${x} // ${y}`;\nconst block = `line 1\n    line 2 // not a comment\n  end`;\nnext();\n"
+        self.assertEqual(minify_js(source),
+                         "const p = `M ${x} // ${y}`;\nconst block = `line 1\n    line 2 // not a comment\n  end`;\n"
+                         "next();\n")
+
+    def test_line_breaks_are_kept_for_semicolon_insertion(self):
+        source = "let a = b\n(c || d).run()\nreturn\n  value\nx\n++y\n"
+        self.assertEqual(minify_js(source), "let a = b\n(c || d).run()\nreturn\nvalue\nx\n++y\n")
+
+    @unittest.skipIf(shutil.which("node") is None, "node is not installed")
+    def test_minified_bundle_parses(self):
+        init, render = bundle_scripts(unit_config(DEFAULT_UNIT))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bundle.js")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(f"function panel(options, svgmap, data) {{\n{init}\n{render}\n}}\n")
+            subprocess.run(["node", "--check", path], check=True)
+
+
+class CommittedOutputTest(unittest.TestCase):
+    def test_committed_panels_are_current(self):
+        svg, _ = build_panel(unit_config(DEFAULT_UNIT))
+        expected = svg_bytes(svg)
+        for path in (os.path.join(HERE, "te.svg"), os.path.join(HERE, "..", "te.svg")):
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), expected, f"{path} is stale; regenerate it with generate_svg.py")
+
+    def test_committed_bundle_is_current(self):
+        for suffix, code in zip((".init.js", ".render.js"), bundle_scripts(unit_config(DEFAULT_UNIT), minify=False)):
+            with open(os.path.join(HERE, "..", f"te{suffix}"), 'r', encoding='utf-8') as f:
+                self.assertEqual(f.read(), code, f"te{suffix} is stale; regenerate it with --scripts --no-minify")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+
+import xml.etree.ElementTree as ET
+
+from optimize_svg import quantize
+
+
+class QuantizeTest(unittest.TestCase):
+    def test_colours_are_kept(self):
+        svg = ET.Element("svg")
+        rect = ET.SubElement(svg, "rect", {"x": "1.23456", "width": "10.0", "fill": "#1e90ff",
+                                           "stroke": "#2E8B57"})
+        stop = ET.SubElement(svg, "stop", {"offset": "0.333333", "stop-color": "#123456",
+                                           "style": "stop-color:#1e90ff"})
+        quantize(svg)
+        self.assertEqual(rect.get("fill"), "#1e90ff")
+        self.assertEqual(rect.get("stroke"), "#2E8B57")
+        self.assertEqual(stop.get("stop-color"), "#123456")
+        self.assertEqual(stop.get("style"), "stop-color:#1e90ff")
+        self.assertEqual(rect.get("x"), "1.23")
+        self.assertEqual(rect.get("width"), "10")
+        self.assertEqual(stop.get("offset"), "0.33")
+
+    def test_path_data_and_transforms_are_rounded(self):
+        svg = ET.Element("svg")
+        path = ET.SubElement(svg, "path", {"d": "M -15.000 0.000 A 15 15 0 0 1 15.004 -0.001",
+                                           "transform": "rotate(-90.0, -18.0, -0.0)"})
+        self.assertEqual(quantize(svg), 2)
+        self.assertEqual(path.get("d"), "M -15 0 A 15 15 0 0 1 15 0")
+        self.assertEqual(path.get("transform"), "rotate(-90, -18, 0)")
+
+
+if __name__ == "__main__":
+    unittest.main()
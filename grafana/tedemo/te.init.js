@@ -0,0 +1,338 @@
+options.debug = false; // Toggle for console.log statements
+
+options.log = (...args) => {
+  if (options.debug) console.log(...args);
+};
+
+options.statusData = {  
+  "Fan1_On": 0,
+  "Fan2_On": 0,
+  "FanSpeed_RPM": 0,
+  "FeedbackPipeWatchdog": 0,
+  "Feedback_K1": 0,
+  "Feedback_K2": 0,
+  "Fuse_Dryer": 0,
+  "Fuse_Fan1": 0,
+  "Fuse_Fan2": 0,
+  "NoEmergency": 0,
+  "OperationalHours1": 0,
+  "OperationalHours2": 0,
+  "Pressure": 0,
+  "SetPressure": 0,
+  "SetPressure_High": 0,
+  "SetPressure_Normal": 0,
+  "SetPressure_Low": 100
+};
+
+// Update status indicator element based on value
+options.updateStatusElement = (el, value) => {
+  options.log("Updating circle:", el, "with value:", value);
+  if (value === 1) {
+    el.fill('#00FF00');
+    el.addClass('status-active');
+  } else if (value === 0) {
+    el.fill('#FF0000');
+    el.addClass('status-active');
+  } else {
+    // Default/unknown state
+    el.fill('gray');
+    el.removeClass('status-active');
+  }
+}; 
+
+// The gauge functions read the unit's gauge geometry from options.panel and
+// are called by options.updatePanel, both generated by generate_svg.py and
+// appended to this script (see bundle_scripts)
+
+// Update RPM gauge based on FanSpeed_RPM
+options.updateRPMGauge = (svgmap) => {  
+  const { cx, cy, max: maxRPM } = options.panel.rpm;
+  const gaugeRadius = 15;
+  const gaugeStartAngle = 0; // 0°
+  const gaugeEndAngle = Math.PI; // 180°
+    
+  const rpmValue = Math.round(options.statusData["FanSpeed_RPM"]); 
+  svgmap.fanspeedValue.text(rpmValue.toString());  
+  // Update value arc
+  if (rpmValue >= 0) {
+    const rpmRatio = Math.min(rpmValue / maxRPM, 1);
+    const deltaAngle = rpmRatio * (gaugeEndAngle - gaugeStartAngle);
+    
+    // Start at rotated gauge start (gaugeStartAngle + π) and sweep by deltaAngle
+    const valueStartAngle = gaugeStartAngle + Math.PI;
+    const valueEndAngle = valueStartAngle + deltaAngle;
+    const valueSweepFlag = 1;
+    const valueAngleSpan = Math.abs(valueEndAngle - valueStartAngle);
+    const valueLargeArc = (valueAngleSpan > Math.PI) ? 1 : 0;
+    
+    const startX = cx + gaugeRadius * Math.cos(valueStartAngle);
+    const startY = cy + gaugeRadius * Math.sin(valueStartAngle);
+    const endX = cx + gaugeRadius * Math.cos(valueEndAngle);
+    const endY = cy + gaugeRadius * Math.sin(valueEndAngle);
+    
+    const arcPath = `M ${startX.toFixed(3)} ${startY.toFixed(3)} A ${gaugeRadius} ${gaugeRadius} 0 ${valueLargeArc} ${valueSweepFlag} ${endX.toFixed(3)} ${endY.toFixed(3)}`;
+    svgmap.fanspeedValueArc.plot(arcPath);
+    options.log("RPM value arc updated to:", arcPath);
+  } else { 
+    svgmap.fanspeedValueArc.plot('');
+    options.log("RPM value arc cleared due to negative RPM value");
+  }
+  
+  // Update indicator triangle
+  if (rpmValue >= 0) {
+    const rpmRatio = Math.min(rpmValue / maxRPM, 1);
+    const indicatorAngle = gaugeStartAngle + (rpmRatio * (gaugeEndAngle - gaugeStartAngle));
+    
+    const indicatorRadius = gaugeRadius - 3;
+    const triangleSize = 2.25;
+    const baseRadius = indicatorRadius - triangleSize;
+    const newTriangleHeight = triangleSize * 3;
+    const tipRadius = baseRadius + newTriangleHeight;
+    const halfShift = newTriangleHeight;
+    const baseRadiusShifted = baseRadius - halfShift;
+    const tipRadiusShifted = tipRadius - halfShift;
+    
+    let trianglePoints = [
+      [cx + tipRadiusShifted * Math.cos(indicatorAngle), cy + tipRadiusShifted * Math.sin(indicatorAngle)],
+      [cx + baseRadiusShifted * Math.cos(indicatorAngle - 0.2), cy + baseRadiusShifted * Math.sin(indicatorAngle - 0.2)],
+      [cx + baseRadiusShifted * Math.cos(indicatorAngle + 0.2), cy + baseRadiusShifted * Math.sin(indicatorAngle + 0.2)]
+    ];
+    
+    // Symmetric with respect to center (mirror)
+    trianglePoints = trianglePoints.map(([px, py]) => [2 * cx - px, 2 * cy - py]);
+     
+    svgmap.fanspeedIndicator.plot(trianglePoints);
+    options.log("RPM indicator updated to:", trianglePoints.map(p => p.join(',')).join(' '));
+  } else { 
+    svgmap.fanspeedIndicator.plot([[0,0],[0,0],[0,0]]);
+    options.log("RPM indicator 0,0 0,0 0,0"); 
+  }
+}
+
+// Update pressure gauge segments based on SetPressure_Low and SetPressure_High
+options.updatePressureGaugeSegments = (svgmap) => {   
+  const { cx, cy, max: maxPressure } = options.panel.pressure;
+  const warningSpan = options.panel.pressure.warning - options.panel.pressure.low;
+   
+  const extraRadius2 = 30; // Radius for colored arc segments
+  const gaugeStartAngle = -24.5 * Math.PI / 180; // -24.5°
+  const gaugeEndAngle = Math.PI + 24.5 * Math.PI / 180; // 204.5°
+  
+  // Helper function to create arc path
+  function createArcPath(startRatio, endRatio, radius) {
+    const startAngle = gaugeStartAngle + startRatio * (gaugeEndAngle - gaugeStartAngle) + Math.PI;
+    const endAngle = gaugeStartAngle + endRatio * (gaugeEndAngle - gaugeStartAngle) + Math.PI;
+    const angleSpan = Math.abs(endAngle - startAngle);
+    const largeArc = angleSpan > Math.PI ? 1 : 0;
+    
+    const startX = cx + radius * Math.cos(startAngle);
+    const startY = cy + radius * Math.sin(startAngle);
+    const endX = cx + radius * Math.cos(endAngle);
+    const endY = cy + radius * Math.sin(endAngle);
+    
+    return {
+      path: `M ${startX.toFixed(3)} ${startY.toFixed(3)} A ${radius} ${radius} 0 ${largeArc} 1 ${endX.toFixed(3)} ${endY.toFixed(3)}`,
+      startAngle,
+      endAngle
+    };
+  }
+  const lowThreshold = options.statusData["SetPressure_Low"];
+  const highThreshold = options.statusData["SetPressure_High"]; 
+  const pressureYellowLowArcNew = createArcPath(lowThreshold / maxPressure, (lowThreshold + warningSpan) / maxPressure, extraRadius2);
+ 
+  svgmap.pressureYellowLowArc.plot(pressureYellowLowArcNew.path);
+  options.log("Updated yellow-low arc to:", pressureYellowLowArcNew.path);
+  
+  
+  const pressureLowArcNew = createArcPath(0, lowThreshold / maxPressure, extraRadius2);
+  //svgmap.pressureLowArc.attr('d', pressureLowArcNew.path);
+  svgmap.pressureLowArc.plot(pressureLowArcNew.path);
+  options.log("Updated low arc to:", pressureLowArcNew.path);
+
+  const greenStart = (lowThreshold + warningSpan) / maxPressure;
+  const greenEnd = highThreshold / maxPressure;
+  const greenArcNew = createArcPath(greenStart, greenEnd, extraRadius2);
+  //svgmap.pressureGreenArc.attr('d', greenArcNew.path);
+  svgmap.pressureGreenArc.plot(greenArcNew.path);
+  options.log("Updated green arc to:", greenArcNew.path); 
+
+  const highStart = highThreshold / maxPressure;
+  const pressureYellowHighArcNew = createArcPath(highStart, 1, extraRadius2);
+  //svgmap.pressureYellowHighArc.attr('d', pressureYellowHighArcNew.path);
+  svgmap.pressureYellowHighArc.plot(pressureYellowHighArcNew.path);
+  options.log("Updated yellow-high arc to:", pressureYellowHighArcNew.path);
+  // The band labels are updated by options.updatePanel
+}
+ 
+options.updatePressureGauge = (svgmap) => {
+  
+  const newPressure = Math.round(options.statusData["Pressure"]);
+  options.log("Updating pressure gauge with value:", newPressure);
+  
+  const { cx, cy, max: maxPressure, low, warning, high } = options.panel.pressure;
+  const gaugeRadius = 15;
+  const gaugeStartAngle = -24.5 * Math.PI / 180; // -24.5°
+  const gaugeEndAngle = Math.PI + 24.5 * Math.PI / 180; // 204.5°
+  
+  const pressureValueText = String(Math.max(0, Math.min(newPressure, maxPressure))); // Clamp to [0, maxPressure]  
+  options.log("Updating pressure gauge with value:", pressureValueText);
+  svgmap.pressureValue.text(pressureValueText);
+  options.log("NEW pressure gauge with value:",  svgmap.pressureValue.text()); 
+  // Update value arc
+  if (newPressure >= 0) {
+    const pressureRatio = Math.min(newPressure / maxPressure, 1);
+    const deltaAngle = pressureRatio * (gaugeEndAngle - gaugeStartAngle);
+    
+    // Start at rotated gauge start (gaugeStartAngle + π) and sweep by deltaAngle
+    const valueStartAngle = gaugeStartAngle + Math.PI;
+    const valueEndAngle = valueStartAngle + deltaAngle;
+    const valueSweepFlag = 1;
+    const valueAngleSpan = Math.abs(valueEndAngle - valueStartAngle);
+    const valueLargeArc = (valueAngleSpan > Math.PI) ? 1 : 0;
+    
+    const startX = cx + gaugeRadius * Math.cos(valueStartAngle);
+    const startY = cy + gaugeRadius * Math.sin(valueStartAngle);
+    const endX = cx + gaugeRadius * Math.cos(valueEndAngle);
+    const endY = cy + gaugeRadius * Math.sin(valueEndAngle);
+    
+    const arcPath = `M ${startX.toFixed(3)} ${startY.toFixed(3)} A ${gaugeRadius} ${gaugeRadius} 0 ${valueLargeArc} ${valueSweepFlag} ${endX.toFixed(3)} ${endY.toFixed(3)}`;
+    svgmap.pressureValueArc.attr('d', arcPath);
+    options.log("Pressure value arc updated to:", arcPath);
+    
+    // Update color based on pressure ranges
+    if (newPressure < low) {
+      svgmap.pressureValueArc.style.stroke = '#FF0000'; // Red
+    } else if (newPressure < warning) {
+      svgmap.pressureValueArc.style.stroke = '#FFFF00'; // Yellow 
+    } else if (newPressure <= high) {
+      svgmap.pressureValueArc.style.stroke = '#00FF00'; // Green
+    } else {
+      svgmap.pressureValueArc.style.stroke = '#FFFF00'; // Yellow
+    }
+  } else {
+    svgmap.pressureValueArc.attr('d', '');
+    options.log("Pressure value arc cleared due to negative pressure value"); 
+  }
+  
+  // Update indicator triangle
+  if (newPressure >= 0) { 
+    const pressureRatio = Math.min(newPressure / maxPressure, 1);
+    const indicatorAngle = gaugeStartAngle + (pressureRatio * (gaugeEndAngle - gaugeStartAngle));
+    
+    const indicatorRadius = gaugeRadius - 3;
+    const triangleSize = 2.25;
+    const baseRadius = indicatorRadius - triangleSize;
+    const newTriangleHeight = triangleSize * 3;
+    const tipRadius = baseRadius + newTriangleHeight;
+    const halfShift = newTriangleHeight;
+    const baseRadiusShifted = baseRadius - halfShift;
+    const tipRadiusShifted = tipRadius - halfShift;
+    
+    let trianglePoints = [
+      [cx + tipRadiusShifted * Math.cos(indicatorAngle), cy + tipRadiusShifted * Math.sin(indicatorAngle)],
+      [cx + baseRadiusShifted * Math.cos(indicatorAngle - 0.2), cy + baseRadiusShifted * Math.sin(indicatorAngle - 0.2)],
+      [cx + baseRadiusShifted * Math.cos(indicatorAngle + 0.2), cy + baseRadiusShifted * Math.sin(indicatorAngle + 0.2)]
+    ];
+    
+    // Symmetric with respect to center (mirror)
+    trianglePoints = trianglePoints.map(([px, py]) => [2 * cx - px, 2 * cy - py]);    
+    svgmap.pressureIndicator.plot(trianglePoints);
+    const points = trianglePoints.map(p => p.join(',')).join(' ');
+    options.log("Pressure indicator updated to:", points);
+  }
+  
+  // Update disk gradient based on low pressure 
+  if (newPressure <= options.statusData["SetPressure_Low"]) {
+    svgmap.pressureDiskPath.attr('fill', 'url(#red-gradient)');
+    svgmap.pressure.addClass('pulsating-disk');    
+  } else {
+    svgmap.pressureDiskPath.attr('fill', 'url(#disk-gradient)');
+    svgmap.pressure.removeClass('pulsating-disk');
+  }
+  options.log("Pressure disk gradient updated to:", newPressure <= options.statusData["SetPressure_Low"] ? 'url(#red-gradient)' : 'url(#disk-gradient)');
+
+  // Update low pressure indicator visibility  
+  if (newPressure <= options.statusData["SetPressure_Low"]) {
+    svgmap.pressureLowPressureIndicator.attr('opacity', '1');
+  } else {
+    svgmap.pressureLowPressureIndicator.attr('opacity', '0');
+  }
+   options.log("Pressure low indicator opacity set to:", newPressure <= options.statusData["SetPressure_Low"] ? '1' : '0'); 
+}
+
+// Generated by generate_svg.py for unit te, do not edit
+options.panel = {"fans": 2, "rpm": {"cx": 40, "cy": 18, "max": 4000}, "pressure": {"cx": 40, "cy": -13, "max": 500, "low": 100, "warning": 150, "high": 350}};
+
+// Applies options.statusData, touching only the elements whose value changed
+options.updatePanel = (svgmap) => {
+  if (options.updateMap !== svgmap) {
+    // Nodes are looked up once per svgmap; everything is drawn on the first refresh
+    options.updateMap = svgmap;
+    options.updateNodes = [
+      svgmap.statusFuseFan1,
+      svgmap.statusFeedbackK1,
+      svgmap.statusFuseFan2,
+      svgmap.statusFeedbackK2,
+      svgmap.statusFuseDryer,
+      svgmap.statusFeedbackPipeWatchdog,
+      svgmap.noErrorsDisc,
+      svgmap.noErrorsSymbol,
+      svgmap.powerFan1,
+      svgmap.powerFan2,
+      svgmap.fan1Hours,
+      svgmap.fan2Hours,
+      svgmap.pressureSetLabel,
+      svgmap.pressureNormalLabel,
+      svgmap.pressureHighLabel,
+      svgmap.pressureLowLabel,
+      svgmap.exhaustContainer1,
+      svgmap.exhaustContainer2,
+      svgmap.exhaustContainerCenter
+    ];
+    options.lastValues = [];
+  }
+  const d = options.statusData, n = options.updateNodes, last = options.lastValues;
+  let v;
+  v = d["Fan1_On"] ? d["Fuse_Fan1"] : -1;
+  if (v !== last[0]) { last[0] = v; options.updateStatusElement(n[0], v); }
+  v = d["Fan1_On"] ? d["Feedback_K1"] : -1;
+  if (v !== last[1]) { last[1] = v; options.updateStatusElement(n[1], v); }
+  v = d["Fan2_On"] ? d["Fuse_Fan2"] : -1;
+  if (v !== last[2]) { last[2] = v; options.updateStatusElement(n[2], v); }
+  v = d["Fan2_On"] ? d["Feedback_K2"] : -1;
+  if (v !== last[3]) { last[3] = v; options.updateStatusElement(n[3], v); }
+  v = d["Fuse_Dryer"];
+  if (v !== last[4]) { last[4] = v; options.updateStatusElement(n[4], v); }
+  v = d["FeedbackPipeWatchdog"];
+  if (v !== last[5]) { last[5] = v; options.updateStatusElement(n[5], v); }
+  v = d["NoEmergency"] === 1;
+  if (v !== last[6]) { last[6] = v; n[6].attr('fill', v ? 'green' : 'url(#status-red-gradient)'); v ? n[6].addClass('status-active') : n[6].removeClass('status-active'); n[7].text(v ? '✓' : '✗'); }
+  v = d["Fan1_On"];
+  if (v !== last[7]) { last[7] = v; v ? n[8].addClass('power-on') : n[8].removeClass('power-on'); }
+  v = d["Fan2_On"];
+  if (v !== last[8]) { last[8] = v; v ? n[9].addClass('power-on') : n[9].removeClass('power-on'); }
+  v = d["OperationalHours1"];
+  if (v !== last[9]) { last[9] = v; n[10].text(`${String(v).padStart(6, '0')}`); }
+  v = d["OperationalHours2"];
+  if (v !== last[10]) { last[10] = v; n[11].text(`${String(v).padStart(6, '0')}`); }
+  v = d["FanSpeed_RPM"];
+  if (v !== last[11]) { last[11] = v; options.updateRPMGauge(svgmap); }
+  v = `${d["Pressure"]}|${d["SetPressure_Low"]}`;
+  if (v !== last[12]) { last[12] = v; options.updatePressureGauge(svgmap); }
+  v = d["SetPressure"];
+  if (v !== last[13]) { last[13] = v; n[12].text(`SET ${v}`); }
+  v = d["SetPressure_Normal"];
+  if (v !== last[14]) { last[14] = v; n[13].text(`NORMAL ${v}`); }
+  v = d["SetPressure_High"];
+  if (v !== last[15]) { last[15] = v; n[14].text(`HIGH ${v}`); }
+  v = `${d["SetPressure_Low"]}|${d["SetPressure_High"]}`;
+  if (v !== last[16]) { last[16] = v; options.updatePressureGaugeSegments(svgmap); }
+  v = d["SetPressure_Low"];
+  if (v !== last[17]) { last[17] = v; n[15].text(`LOW ${v}`); }
+  v = d["Fan1_On"] ? 'block' : 'none';
+  if (v !== last[18]) { last[18] = v; n[16].css('display', v); }
+  v = d["Fan2_On"] ? 'block' : 'none';
+  if (v !== last[19]) { last[19] = v; n[17].css('display', v); }
+  v = (d["Fan1_On"] || d["Fan2_On"]) ? 'block' : 'none';
+  if (v !== last[20]) { last[20] = v; n[18].css('display', v); }
+};
@@ -0,0 +1,82 @@
+/* InfluxDB query used to get the data: exactly the fields of the panel's
+binding manifest (generate_svg.py --manifest), for the Grafana panel:
+  python query_influxdb.py BUCKET TOKEN FQDN PORT --panel te.bindings.json --influxql
+*/
+
+options.debug = false; // Toggle for console.log statements
+//console.log("Rendering airflowm01 SVG with data:", data);
+
+// <fields> generated by generate_svg.py from the unit's bindings, do not edit
+// [alias, value while the field is missing from the data frame]
+const FIELDS = [
+  ["Fuse_Fan1", 0],
+  ["Feedback_K1", 0],
+  ["Fuse_Fan2", 0],
+  ["Feedback_K2", 0],
+  ["Fuse_Dryer", 0],
+  ["FeedbackPipeWatchdog", 0],
+  ["NoEmergency", 0],
+  ["Fan1_On", 0],
+  ["Fan2_On", 0],
+  ["OperationalHours1", 0],
+  ["OperationalHours2", 0],
+  ["FanSpeed_RPM", 0],
+  ["Pressure", 0],
+  ["SetPressure", 0],
+  ["SetPressure_Normal", 0],
+  ["SetPressure_High", 0]
+];
+// Values not queried from InfluxDB
+const CONSTANTS = {"SetPressure_Low": 100};
+// </fields>
+
+// Field name -> index, built once per data frame instead of a scan per value
+const frame = data.series[0];
+if (!options.fieldIndex || options.fieldFrame !== frame) {
+  options.fieldFrame = frame;
+  options.fieldIndex = new Map((frame ? frame.fields : []).map((f, i) => [f.name, i]));
+}
+
+const getFieldValue = (name, fallback) => {
+  const i = options.fieldIndex.get(name);
+  const value = i === undefined ? undefined : frame.fields[i].values[0];
+  return value === undefined || value === null ? fallback : value;
+};
+
+const previous = options.statusData || {};
+const missing = [];
+options.statusData = Object.assign({}, CONSTANTS);
+for (const [name, fallback] of FIELDS) {
+  if (!options.fieldIndex.has(name)) missing.push(name);
+  options.statusData[name] = getFieldValue(name, name in previous ? previous[name] : fallback);
+}
+if (missing.length) options.log("Fields missing from the data frame:", missing);
+
+// Only elements whose value changed since the last refresh are touched
+options.updatePanel(svgmap);
+
+// Click handlers (demo interactions), bound once per svgmap: they change
+// the status data and let updatePanel redraw what changed
+if (options.boundMap !== svgmap) {
+  options.boundMap = svgmap;
+  const onClick = (node, label, change) => {
+    if (!node) return;
+    node.off('click');
+    node.click(function () {
+      options.log("Clicked", label);
+      change(options.statusData);
+      options.updatePanel(svgmap);
+    });
+  };
+
+  onClick(svgmap.statusFuseDryer, "fuse dryer", (d) => { d["Pressure"] = Math.round(d["Pressure"] - 69); });
+  onClick(svgmap.statusFuseFan2, "fuse fan2", (d) => { d["FanSpeed_RPM"] = Math.round(d["FanSpeed_RPM"] + 100); });
+  onClick(svgmap.statusFuseFan1, "fuse fan1", (d) => {
+    d["SetPressure_Low"] = d["SetPressure_Low"] >= 150 ? 100 : 150;
+  });
+  for (let n = 1; n <= options.panel.fans; n++) {
+    onClick(svgmap[`statusFeedbackK${n}`], `feedback K${n}`, (d) => { d[`OperationalHours${n}`] += 100; });
+    onClick(svgmap[`powerFan${n}Container`], `fan${n}`, (d) => { d[`Fan${n}_On`] = 1 - d[`Fan${n}_On`]; });
+  }
+  onClick(svgmap.statusFeedbackPipeWatchdog, "watchdog", (d) => { d["NoEmergency"] = 1 - d["NoEmergency"]; });
+}
@@ -13,11 +13,15 @@ Example:
     python query_influxdb.py my_bucket my_secret_token fqdn.de 18086 --org my_org
     python query_influxdb.py my_bucket my_secret_token fqdn.de 18086 --topics
     python query_influxdb.py my_bucket my_secret_token fqdn.de 18086 --topics --json
+    python query_influxdb.py my_bucket my_secret_token fqdn.de 18086 --catalogue ../sensors.db
+    python query_influxdb.py my_bucket my_secret_token fqdn.de 18086 --panel te.bindings.json
 """
 
 import argparse
+import json
+import os
 import sys
-from typing import Set, List
+from typing import Any, Dict, List, Set
 from influxdb_client import InfluxDBClient
 from influxdb_client.client.flux_table import FluxTable
 
@@ -213,6 +217,206 @@ from(bucket: "{bucket_name}")
         client.close()
 
 
+def get_series(
+    bucket_name: str,
+    influx_token: str,
+    org: str = "my-org",
+    url: str = "https://fqdn.de:18086",
+    verify_ssl: bool = False
+) -> List[Dict[str, str]]:
+    """
+    Get every (topic, field) series in a bucket with its measurement and last value.
+    
+    Args:
+        bucket_name: Name of the InfluxDB bucket to query
+        influx_token: Authentication token for InfluxDB
+        org: Organization name (default: "my-org")
+        url: InfluxDB URL (default: "https://fqdn.de:18086")
+        verify_ssl: Whether to verify SSL certificates (default: False)
+        
+    Returns:
+        List of catalogue rows (topic, field, measurement, site, last_value)
+    """
+    
+    client = InfluxDBClient(
+        url=url,
+        token=influx_token,
+        org=org,
+        verify_ssl=verify_ssl
+    )
+    
+    try:
+        query_api = client.query_api()
+        
+        # One row per series: its last value within the window
+        flux_query = f'''
+from(bucket: "{bucket_name}")
+  |> range(start: -7d)
+  |> group(columns: ["_measurement", "topic", "_field"])
+  |> last()
+  |> keep(columns: ["_measurement", "topic", "_field", "_value"])
+'''
+        
+        series: List[Dict[str, str]] = []
+        for table in query_api.query(flux_query):
+            for record in table.records:
+                topic = record.values.get("topic")
+                if not topic:
+                    continue
+                series.append({
+                    "topic": topic,
+                    "field": record.get_field(),
+                    "measurement": record.get_measurement(),
+                    "site": record.get_measurement(),
+                    "last_value": None if record.get_value() is None else str(record.get_value()),
+                })
+        
+        return series
+        
+    finally:
+        client.close()
+
+
+def store_in_catalogue(series: List[Dict[str, str]], catalogue_path: str, source: str) -> int:
+    """
+    Upsert exported series into the shared SQLite sensor catalogue (common/sensordb.py).
+    
+    Args:
+        series: Rows as returned by get_series()
+        catalogue_path: Path of the catalogue database
+        source: Recorded as the rows' source (e.g. the bucket)
+        
+    Returns:
+        Number of rows written
+    """
+    
+    common_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common")
+    if common_dir not in sys.path:
+        sys.path.insert(0, common_dir)
+    from sensordb import SensorDB
+    
+    with SensorDB(catalogue_path) as catalogue:
+        return catalogue.upsert_sensors(series, source=source)
+
+
+def load_panel_manifest(path: str) -> Dict[str, Any]:
+    """
+    Read a panel's binding manifest (generate_svg.py --manifest).
+    
+    Args:
+        path: Path of the <panel>.bindings.json file
+        
+    Returns:
+        The manifest: measurement, fields (field, alias) and bindings
+        
+    Raises:
+        ValueError: If the manifest has no measurement or no fields
+    """
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if not manifest.get("measurement") or not manifest.get("fields"):
+        raise ValueError(f"{path}: not a binding manifest (needs 'measurement' and 'fields')")
+    return manifest
+
+
+def _quoted(value: str) -> str:
+    """A Flux string literal or InfluxQL quoted identifier (same escaping)."""
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def build_panel_query(bucket_name: str, manifest: Dict[str, Any], start: str = "-1h") -> str:
+    """
+    Build the Flux query for the last value of exactly the fields a panel shows.
+    
+    range, the measurement/field filter and last() are pushed down to the
+    storage engine, so only one point per displayed series is read and
+    returned; no other column of the measurement is touched.
+    
+    Args:
+        bucket_name: Name of the InfluxDB bucket to query
+        manifest: Binding manifest of the panel (see load_panel_manifest)
+        start: Start of the range searched for the last values (default: -1h)
+        
+    Returns:
+        The Flux query
+    """
+    
+    fields = sorted({entry["field"] for entry in manifest["fields"]})
+    field_filter = " or ".join(f"r._field == {_quoted(field)}" for field in fields)
+    return f'''
+from(bucket: {_quoted(bucket_name)})
+  |> range(start: {start})
+  |> filter(fn: (r) => r._measurement == {_quoted(manifest["measurement"])})
+  |> filter(fn: (r) => {field_filter})
+  |> last()
+  |> keep(columns: ["_field", "_value"])
+'''
+
+
+def build_panel_influxql(manifest: Dict[str, Any]) -> str:
+    """
+    Build the InfluxQL query of a panel for Grafana: the last value of each
+    displayed field under the alias the panel's render script reads.
+    
+    Args:
+        manifest: Binding manifest of the panel (see load_panel_manifest)
+        
+    Returns:
+        The InfluxQL query (with Grafana's $timeFilter)
+    """
+    
+    columns = ",\n".join(f"  last({_quoted(entry['field'])}) AS {_quoted(entry['alias'])}"
+                          for entry in manifest["fields"])
+    return f"SELECT\n{columns}\nFROM {_quoted(manifest['measurement'])}\nWHERE $timeFilter"
+
+
+def get_panel_values(
+    bucket_name: str,
+    influx_token: str,
+    manifest: Dict[str, Any],
+    org: str = "my-org",
+    url: str = "https://fqdn.de:18086",
+    verify_ssl: bool = False,
+    start: str = "-1h"
+) -> Dict[str, Any]:
+    """
+    Fetch the last value of every field a panel shows, with one query.
+    
+    Args:
+        bucket_name: Name of the InfluxDB bucket to query
+        influx_token: Authentication token for InfluxDB
+        manifest: Binding manifest of the panel (see load_panel_manifest)
+        org: Organization name (default: "my-org")
+        url: InfluxDB URL (default: "https://fqdn.de:18086")
+        verify_ssl: Whether to verify SSL certificates (default: False)
+        start: Start of the range searched for the last values (default: -1h)
+        
+    Returns:
+        Values by alias (the names the panel scripts read); None for fields without data
+    """
+    
+    client = InfluxDBClient(
+        url=url,
+        token=influx_token,
+        org=org,
+        verify_ssl=verify_ssl
+    )
+    
+    try:
+        query_api = client.query_api()
+        
+        by_field: Dict[str, Any] = {}
+        for table in query_api.query(build_panel_query(bucket_name, manifest, start)):
+            for record in table.records:
+                by_field[record.get_field()] = record.get_value()
+        
+        return {entry["alias"]: by_field.get(entry["field"]) for entry in manifest["fields"]}
+        
+    finally:
+        client.close()
+
+
 def main():
     """Main entry point for the script."""
     
@@ -238,6 +442,15 @@ Examples:
   
   # Query with SSL verification
   python query_influxdb.py my_bucket my_token_here fqdn.de 18086 --verify-ssl
+  
+  # Export every series into the shared sensor catalogue
+  python query_influxdb.py my_bucket my_token_here fqdn.de 18086 --catalogue ../sensors.db
+  
+  # Last values of exactly the fields a panel shows (manifest from generate_svg.py --manifest)
+  python query_influxdb.py my_bucket my_token_here fqdn.de 18086 --panel te.bindings.json
+  
+  # The panel's InfluxQL query for Grafana, without connecting
+  python query_influxdb.py my_bucket my_token_here fqdn.de 18086 --panel te.bindings.json --influxql
         """
     )
     
@@ -286,15 +499,84 @@ Examples:
         help="Query distinct topics/tags instead of fields"
     )
     
+    parser.add_argument(
+        "--catalogue",
+        metavar="DB",
+        help="Export all series (topic, field, last value) into this SQLite sensor catalogue"
+    )
+    
+    parser.add_argument(
+        "--panel",
+        metavar="MANIFEST",
+        help="Query the last values of the fields in this panel binding manifest (NAME.bindings.json)"
+    )
+    
+    parser.add_argument(
+        "--influxql",
+        action="store_true",
+        help="With --panel, print the panel's InfluxQL query for Grafana instead of running it"
+    )
+    
+    parser.add_argument(
+        "--start",
+        default="-1h",
+        help="With --panel, start of the range searched for the last values (default: -1h)"
+    )
+    
     args = parser.parse_args()
     
     try:
+        manifest = load_panel_manifest(args.panel) if args.panel else None
+        if manifest and args.influxql:
+            print(build_panel_influxql(manifest))
+            return 0
+        
         # Construct the URL from fqdn and port
         url = f"https://{args.fqdn}:{args.port}"
         
         print(f"Connecting to InfluxDB at {url}...", file=sys.stderr)
         
-        if args.topics:
+        if manifest:
+            print(f"Querying {len(manifest['fields'])} panel fields of {manifest['measurement']} "
+                  f"in bucket: {args.bucket}", file=sys.stderr)
+            
+            values = get_panel_values(
+                bucket_name=args.bucket,
+                influx_token=args.token,
+                manifest=manifest,
+                org=args.org,
+                url=url,
+                verify_ssl=args.verify_ssl,
+                start=args.start
+            )
+            
+            missing = [alias for alias, value in values.items() if value is None]
+            if missing:
+                print(f"No data for: {', '.join(missing)}", file=sys.stderr)
+            
+            if args.json:
+                print(json.dumps(values))
+            else:
+                for alias, value in values.items():
+                    print(f"{alias}\t{value}")
+        elif args.catalogue:
+            print(f"Exporting series of bucket: {args.bucket}", file=sys.stderr)
+            
+            series = get_series(
+                bucket_name=args.bucket,
+                influx_token=args.token,
+                org=args.org,
+                url=url,
+                verify_ssl=args.verify_ssl
+            )
+            
+            if not series:
+                print("No series found in the bucket.", file=sys.stderr)
+                return 1
+            
+            store_in_catalogue(series, args.catalogue, source=f"influxdb:{args.bucket}")
+            print(f"\nStored {len(series)} series in {args.catalogue}", file=sys.stderr)
+        elif args.topics:
             print(f"Querying topics in bucket: {args.bucket}", file=sys.stderr)
             
             topics = get_all_topics(
@@ -312,7 +594,6 @@ Examples:
             print(f"\nFound {len(topics)} unique topics:\n", file=sys.stderr)
             
             if args.json:
-                import json
                 print(json.dumps(topics))
             else:
                 for topic in topics:
@@ -335,7 +616,6 @@ Examples:
             print(f"\nFound {len(fields)} unique fields:\n", file=sys.stderr)
             
             if args.json:
-                import json
                 print(json.dumps(fields))
             else:
                 for field in fields:
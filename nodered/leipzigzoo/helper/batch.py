@@ -0,0 +1,215 @@
+"""
+Batch flow generation for many sites.
+
+A batch source is either a directory of values files (one site per
+*.txt / *.csv file, named after the file) or a JSON manifest:
+
+    {"sites": [
+        {"name": "leipzigzoo", "input": "values-leipzig.txt", "project": "leipzigzoo", "label_prefix": "LZ",
+         "rules": "rules/leipzigzoo.json", "output": "flows/leipzigzoo.json",
+         "change_rates": "history/leipzigzoo.csv", "stats": "history/leipzigzoo.csv", "deadband": true,
+         "ingress": {"enabled": true, "broker": "mqtt.example:1883"}}
+    ]}
+
+Relative paths in a manifest are resolved against the manifest's directory.
+Every site is its own project: the project (sensor name and topic prefix)
+is the site's "project", else its name, and replaces the project of the
+rules file; the label prefix is the site's "label_prefix", else the rules
+file's if the project is unchanged, else the project in upper case.
+Site names must be unique (a.txt and a.csv are rejected). Each site is
+generated in worker processes; a failing site, at any stage, is reported
+and does not stop the others. Names are made unique across all sites of a run
+(see registry.py).
+"""
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from classify import ensure_rules, sanitize
+from deadband import deadband_options
+from genstate import apply_sensor_settings, build_nodes, classify_file, store_catalogue
+from ingress import ingress_options
+from layout import layout_options
+from registry import NameRegistry
+
+INPUT_EXTENSIONS = (".txt", ".csv")
+
+
+def _resolve(base_dir, path):
+    if path is None or os.path.isabs(path):
+        return path
+    return os.path.join(base_dir, path)
+
+
+def discover_sites(source, rules=None, out_dir="flows", layout=None, change_rates=None, deadband=None,
+                   ingress=None, stats=None):
+    """Returns the list of site jobs described by a directory or manifest."""
+    if os.path.isdir(source):
+        sites = []
+        for entry in sorted(os.listdir(source)):
+            stem, ext = os.path.splitext(entry)
+            if ext.lower() in INPUT_EXTENSIONS:
+                sites.append({"name": stem, "input": os.path.join(source, entry), "rules": rules, "project": None,
+                              "change_rates": change_rates, "deadband": deadband,
+                              "ingress": ingress, "stats": stats})
+    else:
+        with open(source, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        base_dir = os.path.dirname(os.path.abspath(source))
+        entries = manifest["sites"] if isinstance(manifest, dict) else manifest
+        sites = []
+        for entry in entries:
+            input_path = _resolve(base_dir, entry["input"])
+            sites.append({
+                "name": entry.get("name") or os.path.splitext(os.path.basename(input_path))[0],
+                "input": input_path,
+                "rules": _resolve(base_dir, entry.get("rules")) or rules,
+                "project": entry.get("project"),
+                "label_prefix": entry.get("label_prefix"),
+                "output": _resolve(base_dir, entry.get("output")),
+                "change_rates": _resolve(base_dir, entry.get("change_rates")) or change_rates,
+                "stats": _resolve(base_dir, entry.get("stats")) or stats,
+                "deadband": entry.get("deadband", deadband),
+                "ingress": dict(ingress or {}, **entry.get("ingress", {})),
+            })
+
+    names = [site["name"] for site in sites]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"several sites named {', '.join(duplicates)} in {source}; "
+                         "sites must have distinct names (and outputs)")
+    for site in sites:
+        site["project"] = site["project"] or sanitize(site["name"])
+        site["layout"] = layout
+        if not site.get("output"):
+            site["output"] = os.path.join(out_dir, f"{site['name']}.json")
+    return sites
+
+
+def site_rules(site):
+    """The rules of a site, with the site's project and label prefix."""
+    rules = ensure_rules(site.get("rules"))
+    project = site.get("project") or rules["project"]
+    if project == rules["project"] and not site.get("label_prefix"):
+        return rules
+    label_prefix = site.get("label_prefix") or (rules.get("label_prefix") if project == rules["project"]
+                                                 else project.upper())
+    return dict(rules, project=project, label_prefix=label_prefix)
+
+
+def _result(site, error=None):
+    return {"name": site["name"], "output": site["output"], "rows": 0, "nodes": 0,
+            "seconds": 0.0, "error": error}
+
+
+def classify_site(site):
+    """Phase 1 (worker): reads and classifies one site. Never raises."""
+    result = _result(site)
+    result["records"] = None
+    started = time.perf_counter()
+    try:
+        rules = site_rules(site)
+        records = classify_file(site["input"], rules)
+        if not records:
+            raise ValueError(f"no sensor rows found in {site['input']}")
+        apply_sensor_settings(records, rules, site.get("change_rates"), site.get("stats"))
+        result["records"] = records
+        result["rows"] = len(records)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def emit_site(site, records):
+    """Phase 2 (worker): lays out and writes the flow for one site. Never raises."""
+    result = _result(site)
+    started = time.perf_counter()
+    try:
+        rules = site_rules(site)
+        nodes = build_nodes(records, rules["project"], layout_options(rules, **(site.get("layout") or {})),
+                            deadband_options(rules, site.get("deadband")),
+                            ingress_options(rules, **(site.get("ingress") or {})))
+
+        out_dir = os.path.dirname(site["output"])
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        with open(site["output"], 'w', encoding='utf-8') as f:
+            json.dump(nodes, f, indent=4, ensure_ascii=False)
+
+        result["rows"] = len(records)
+        result["nodes"] = len(nodes)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def _collect(sites, futures):
+    results = []
+    for site, future in zip(sites, futures):
+        try:
+            results.append(future.result())
+        except Exception as e:
+            # The worker itself died (e.g. out of memory)
+            results.append(_result(site, f"{type(e).__name__}: {e}"))
+    return results
+
+
+def run_batch(sites, workers=None, registry=None, catalogue=None):
+    """
+    Runs every site in a process pool. Results keep the order of sites.
+
+    Sites are classified in parallel, names are then resolved against the
+    shared registry in site order (so suffixes are deterministic across the
+    whole run), and the flows are laid out and written in parallel again.
+    With a catalogue, the sensors of every site are stored in it from this
+    process, so SQLite sees a single writer.
+    """
+    if not sites:
+        return []
+    registry = registry or NameRegistry()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        classified = _collect(sites, [pool.submit(classify_site, site) for site in sites])
+
+        pending = []
+        for index, (site, result) in enumerate(zip(sites, classified)):
+            if result["error"] is not None:
+                continue
+            try:
+                registry.resolve_all(result["records"])
+                if catalogue:
+                    store_catalogue(catalogue, result["records"], site_rules(site), site["input"])
+            except Exception as e:
+                result["error"] = f"{type(e).__name__}: {e}"
+                continue
+            pending.append((index, site, result))
+
+        emitted = _collect([site for _, site, _ in pending],
+                           [pool.submit(emit_site, site, result.pop("records")) for _, site, result in pending])
+
+    written = {index: result for (index, _, _), result in zip(pending, emitted)}
+    results = []
+    for index, result in enumerate(classified):
+        result.pop("records", None)
+        if index in written:
+            written[index]["seconds"] += result["seconds"]
+            result = written[index]
+        results.append(result)
+    return results
+
+
+def print_report(results, stream=sys.stderr):
+    """Prints per-site timings and row counts, then a summary line."""
+    for result in results:
+        if result["error"] is None:
+            print(f"✓ {result['name']}: {result['rows']} rows, {result['nodes']} nodes "
+                  f"in {result['seconds']:.3f}s -> {result['output']}", file=stream)
+        else:
+            print(f"✗ {result['name']}: {result['error']}", file=stream)
+    failed = sum(1 for result in results if result["error"] is not None)
+    total_rows = sum(result["rows"] for result in results)
+    print(f"{len(results) - failed}/{len(results)} sites generated, {total_rows} rows, "
+          f"{failed} failed", file=stream)
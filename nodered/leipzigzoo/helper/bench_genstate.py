@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Synthetic-load benchmark for the genstate pipeline.
+
+Generates values files shaped like values-leipzig.txt (device topics of the
+form 'project/device|address|description', icpdas rows, umlauts and
+descriptions wrapped over several lines) and runs them through the real
+pipeline (genstate.process_data, then JSON serialisation). Every stage
+(read, consolidate, parse, classify, resolve, settings, build, emit) is
+timed in one untraced run and its memory measured in a second, traced
+one: a stage's peak is counted from the memory held when it starts, so
+it is what the stage itself allocates, not what earlier stages still
+hold. Results are compared with a stored baseline.
+
+Usage:
+    python bench_genstate.py                          # 10k, 100k rows
+    python bench_genstate.py --sizes 10000 1000000
+    python bench_genstate.py --save-baseline          # store this run as the baseline
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import tracemalloc
+
+from classify import load_rules
+from genstate import process_data
+from profiling import Profiler
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(HERE, "bench_baseline.json")
+STAGES = ("read", "consolidate", "parse", "classify", "resolve", "settings", "build", "emit")
+
+# (address template, description templates, value generator)
+ANALOG = [
+    ("S066.{a:02d}-4839-FB_AI.01", ["cushion pressure", "Kissendruck {n}"], lambda r: f"{r.uniform(100, 400):.2f}"),
+    ("S083.{a:02d}-2146-FB_AI.01", ["cushion temperature", "Kissentemperatur {n}"], lambda r: f"{r.uniform(-5, 35):.2f}"),
+    ("S325.{a:02d}-{n}-FB_AI.01", ["Durchfluss {n}", "flow rate {n}"], lambda r: f"{r.uniform(0, 8):.2f}"),
+    ("S325.{a:02d}-3-FB_AI.01", ["Kissenfeuchte {n}"], lambda r: f"{r.uniform(20, 60):.2f}"),
+    ("S066.{a:02d}-8610-FB_AO.01", ["Max {n}-{m}", "Min {n}-{m}", "maximum alarm: cushion pressure &gt;350 Pa"],
+     lambda r: f"{r.uniform(-1, 3):.1f}"),
+    ("T.{a:02d}-Ton-FB_AO.01", ["Einschaltverzög!"], lambda r: str(r.choice([500, 660]))),
+    ("H601.{a:02d}-6-FB_AI.01", ["Betriebsstunden"], lambda r: str(r.randint(0, 20000))),
+]
+BINARY = [
+    ("M.{a:02d}-6-FB_BI.01", ["Störung {n}!", "control unit failure", "fan {n} on", "Schneesensor {n}",
+                              "minimum alarm: cushion pressure &lt; 10 Pa"], lambda r: str(r.randint(0, 1))),
+]
+
+
+def generate_values(path, rows, project="leipzigzoo", seed=1, multiline_ratio=0.02, icpdas_ratio=0.02):
+    """Writes a synthetic values file with the given number of sensor rows."""
+    rng = random.Random(seed)
+    templates = ANALOG + BINARY
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("state_value,_field,_measurement,topic\n")
+        for i in range(rows):
+            if rng.random() < icpdas_ratio:
+                f.write(f"{rng.uniform(0, 5):.3f},AI-{rng.randint(1, 16):02d},{project},{project}/icpdas01\n")
+                continue
+
+            address_template, descriptions, value = rng.choice(templates)
+            n = rng.randint(1, 40)
+            device = 10 + (i // 500) % 90
+            address = f"--{i // 100000:03d}-{(i // 1000) % 100:02d}-{(i // 10) % 100:02d}-" \
+                      + address_template.format(a=i % 100, n=n)
+            description = rng.choice(descriptions).format(n=n, m=n + 2)
+
+            if rng.random() < multiline_ratio and " " in description:
+                # Wrap the description onto a continuation line
+                description = description.replace(" ", "\n", 1)
+            f.write(f"{value(rng)},value,{project},{project}/{device}|{address}|{description}\n")
+
+
+class StageProfiler(Profiler):
+    """Records the pipeline stages only: no helper wrappers or rule hit counts slowing classify."""
+
+    def instrument(self, classifier):
+        pass
+
+    def count(self, group, key, n=1):
+        pass
+
+
+def run_stages(path, rules, memory=False):
+    """
+    Runs process_data and serialises its nodes once. Returns the stages
+    recorded by a StageProfiler ({stage: {"seconds", "peak_kb", ...}}).
+    """
+    profiler = StageProfiler(memory=memory)
+    try:
+        nodes = process_data(path, rules, profiler=profiler)
+        with profiler.stage("emit"):
+            json.dumps(nodes, ensure_ascii=False)
+        del nodes
+    finally:
+        if memory:
+            tracemalloc.stop()
+    return profiler.stages
+
+
+def benchmark(sizes, rules, memory=True, workdir=None):
+    """Benchmarks every size. Returns {size: {stage: {rows_per_sec, seconds, peak_mb}}}."""
+    results = {}
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        for size in sizes:
+            path = os.path.join(tmp, f"values-{size}.txt")
+            generate_values(path, size, project=rules["project"])
+
+            gc.collect()
+            timings = run_stages(path, rules)
+            gc.collect()
+            peaks = run_stages(path, rules, memory=True) if memory else {}
+
+            results[str(size)] = {
+                stage: {
+                    "seconds": round(timings[stage]["seconds"], 4),
+                    "rows_per_sec": round(size / timings[stage]["seconds"]) if timings[stage]["seconds"] else None,
+                    "peak_mb": round(peaks[stage]["peak_kb"] / 1024, 2) if stage in peaks else None,
+                }
+                for stage in STAGES
+            }
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Returns a list of regression messages (slower or bigger than threshold)."""
+    regressions = []
+    for size, stages in results.items():
+        for stage, current in stages.items():
+            previous = baseline.get(size, {}).get(stage)
+            if not previous:
+                continue
+            if previous.get("rows_per_sec") and current["rows_per_sec"] \
+                    and current["rows_per_sec"] < previous["rows_per_sec"] * (1 - threshold):
+                regressions.append(f"{size} rows {stage}: {current['rows_per_sec']} rows/s "
+                                   f"(baseline {previous['rows_per_sec']})")
+            if previous.get("peak_mb") and current["peak_mb"] \
+                    and current["peak_mb"] > previous["peak_mb"] * (1 + threshold):
+                regressions.append(f"{size} rows {stage}: {current['peak_mb']} MB peak "
+                                   f"(baseline {previous['peak_mb']})")
+    return regressions
+
+
+def print_results(results, baseline):
+    print(f"{'rows':>9} {'stage':<11} {'rows/s':>12} {'peak MB':>9} {'vs baseline':>12}")
+    for size, stages in results.items():
+        for stage, current in stages.items():
+            previous = baseline.get(size, {}).get(stage, {})
+            ratio = ""
+            if previous.get("rows_per_sec") and current["rows_per_sec"]:
+                ratio = f"{current['rows_per_sec'] / previous['rows_per_sec']:.2f}x"
+            peak = "-" if current["peak_mb"] is None else f"{current['peak_mb']:.2f}"
+            print(f"{size:>9} {stage:<11} {current['rows_per_sec'] or 0:>12,} {peak:>9} {ratio:>12}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the genstate pipeline on synthetic data")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000],
+                        help="Row counts to benchmark (default: 10000 100000)")
+    parser.add_argument("--rules", help="Rules file (default: rules/leipzigzoo.json)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed slowdown / memory growth before flagging (default: 0.2)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the (slower) tracemalloc pass")
+    parser.add_argument("--write-sample", metavar="PATH", help="Only write a synthetic values file of --sizes[0] rows")
+    args = parser.parse_args(argv)
+
+    rules = load_rules(args.rules)
+    if args.write_sample:
+        generate_values(args.write_sample, args.sizes[0], project=rules["project"])
+        return 0
+
+    results = benchmark(args.sizes, rules, memory=not args.no_memory)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not baseline:
+        print("No baseline stored yet; run with --save-baseline to create one.")
+        return 0
+    regressions = compare(results, baseline, args.threshold)
+    for message in regressions:
+        print(f"REGRESSION {message}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
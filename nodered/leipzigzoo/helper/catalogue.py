@@ -0,0 +1,141 @@
+"""
+Compact in-memory sensor catalogue.
+
+Classified sensors are kept as Sensor objects (__slots__, no per-instance
+dict) instead of 15-key dicts. The strings that repeat across sensors
+(project, device, keyword, data type, unit, precision, field) are
+interned, so a million sensors share one copy of each; tags are derived
+from project/device/keyword instead of stored. A Sensor still reads and
+writes like a record dict (record["name"], record.get("numMin", "")), so
+the registry, policy, stats and layout code work on it unchanged; the
+Node-RED node dicts are only built when the flow is emitted. The indexed
+columns (device, keyword, data type) are read-only through record[...],
+so the posting lists of a catalogue holding the sensor can't go stale.
+
+SensorCatalogue keeps the sensors in insertion order together with
+posting lists per device, keyword and data type, so selecting e.g. all
+'pressure' sensors of one device is an intersection of two lists rather
+than a scan.
+"""
+import sys
+
+_intern = sys.intern
+
+# Columns whose values repeat across sensors
+INTERNED = ("project", "device", "keyword", "dataType", "unit", "precision", "field")
+INDEXED = ("device", "keyword", "dataType")
+
+
+class Sensor:
+    """One classified sensor; behaves like the record dict it replaces."""
+
+    __slots__ = ("name", "lbl", "project", "device", "keyword", "dataType", "precision", "unit",
+                 "topic", "field", "value", "saveInterval", "historyCount", "numMin", "numMax")
+
+    def __init__(self, name, lbl, project, device, keyword, dataType, precision, unit, topic, field, value):
+        self.name = name
+        self.lbl = lbl
+        self.project = _intern(project)
+        self.device = _intern(device)
+        self.keyword = _intern(keyword)
+        self.dataType = _intern(dataType)
+        self.precision = _intern(precision)
+        self.unit = _intern(unit)
+        self.topic = topic
+        self.field = _intern(field)
+        self.value = value
+        self.saveInterval = None
+        self.historyCount = None
+        self.numMin = None
+        self.numMax = None
+
+    @property
+    def tags(self):
+        return [self.project, self.device, self.keyword]
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        if key in INDEXED:
+            raise KeyError(f"'{key}' is indexed by SensorCatalogue and can't be changed")
+        if key in INTERNED and isinstance(value, str):
+            value = _intern(value)
+        setattr(self, key, value)
+
+    def get(self, key, default=None):
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+    def as_dict(self):
+        record = {key: getattr(self, key) for key in self.__slots__ if getattr(self, key) is not None}
+        record["tags"] = self.tags
+        return record
+
+    def __repr__(self):
+        return f"Sensor({self.name!r}, {self.topic!r}#{self.field!r})"
+
+
+class SensorCatalogue:
+    """Ordered sensors with posting lists by device, keyword and data type."""
+
+    def __init__(self, sensors=()):
+        self.sensors = []
+        self.postings = {column: {} for column in INDEXED}
+        self.extend(sensors)
+
+    def append(self, sensor):
+        row = len(self.sensors)
+        self.sensors.append(sensor)
+        for column, index in self.postings.items():
+            index.setdefault(getattr(sensor, column), []).append(row)
+
+    def extend(self, sensors):
+        for sensor in sensors:
+            self.append(sensor)
+
+    def __len__(self):
+        return len(self.sensors)
+
+    def __iter__(self):
+        return iter(self.sensors)
+
+    def __getitem__(self, row):
+        return self.sensors[row]
+
+    def values(self, column):
+        """Distinct values of an indexed column with their sensor counts."""
+        return {value: len(rows) for value, rows in self.postings[column].items()}
+
+    def rows(self, device=None, keyword=None, dataType=None):
+        """
+        Returns the row numbers matching every given filter (a value or a
+        collection of values), in catalogue order.
+        """
+        selected = []
+        for column, wanted in (("device", device), ("keyword", keyword), ("dataType", dataType)):
+            if wanted is None:
+                continue
+            index = self.postings[column]
+            if isinstance(wanted, str):
+                rows = index.get(wanted, [])
+            else:
+                rows = sorted(row for value in wanted for row in index.get(value, []))
+            selected.append(rows)
+        if not selected:
+            return list(range(len(self.sensors)))
+
+        selected.sort(key=len)
+        rows = selected[0]
+        for other in selected[1:]:
+            keep = set(other)
+            rows = [row for row in rows if row in keep]
+        return rows
+
+    def select(self, device=None, keyword=None, dataType=None):
+        """Returns a new catalogue holding the matching sensors."""
+        sensors = self.sensors
+        return SensorCatalogue(sensors[row] for row in self.rows(device, keyword, dataType))
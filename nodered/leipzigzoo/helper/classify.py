@@ -0,0 +1,166 @@
+import json
+import os
+import re
+from functools import lru_cache
+
+from catalogue import Sensor
+
+DEFAULT_RULES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules", "leipzigzoo.json")
+
+_ONLY_BANGS = re.compile(r'!+')
+# Every run of non-word characters (and underscores) collapses to one underscore
+_SEPARATORS = re.compile(r'[\W_]+')
+
+
+@lru_cache(maxsize=65536)
+def sanitize(text):
+    """Cleans a string to be a valid JavaScript variable name component."""
+    # Special case for multiple exclamation marks
+    if _ONLY_BANGS.fullmatch(text):
+        return "alarm"
+
+    # Remove trailing exclamation marks, then squash punctuation,
+    # whitespace and hyphens into single underscores
+    text = _SEPARATORS.sub('_', text.rstrip('!'))
+    # Remove leading or trailing underscores
+    return text.strip('_')
+
+
+def get_precision_from_value(value_str):
+    """Calculates the number of decimal places in a string value."""
+    # Clean the value string to handle cases like '-0.5'
+    cleaned_value = value_str.strip()
+    if '.' in cleaned_value:
+        return len(cleaned_value.split('.')[-1])
+    return 0
+
+
+def load_rules(path=None):
+    """Loads a per-project classification rules file (JSON)."""
+    with open(path or DEFAULT_RULES, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def ensure_rules(rules):
+    """Accepts a rules dict, a rules file path or None (default rules)."""
+    if rules is None or isinstance(rules, str):
+        return load_rules(rules)
+    return rules
+
+
+def _alternation(words):
+    """Builds a regex alternation that keeps the given priority order."""
+    return "|".join(re.escape(word) for word in words)
+
+
+class Classifier:
+    """
+    Compiled form of a rules file.
+
+    Keywords are matched in a single scan of the lower-cased description:
+    a lookahead alternation reports the highest-priority keyword starting
+    at every position, so overlapping keywords ('temperatur' inside
+    'temperature') resolve exactly like the ordered substring scan they
+    replace. Results are memoised per description.
+    """
+
+    def __init__(self, rules):
+        self.project = rules["project"]
+        self.label_prefix = rules.get("label_prefix", self.project.upper())
+        self.bool_marker = rules.get("bool_marker", "_BI")
+        # Units are kept in file order; earlier keywords win ties.
+        # An empty unit avoids unsupported unit errors (humidity).
+        self.units = dict(rules.get("units", {}))
+        self._keywords = list(self.units)
+        self._priority = {keyword: i for i, keyword in enumerate(self._keywords)}
+        self._keyword_re = re.compile(f"(?=({_alternation(self.units)}))") if self.units else None
+
+        self._alarms = [
+            (alarm.get("on", "description"), re.compile(re.escape(alarm["match"].lower())), alarm["keyword"])
+            for alarm in rules.get("alarms", [])
+        ]
+
+        self.devices = rules.get("devices", {})
+        self._device_re = re.compile(_alternation(self.devices)) if self.devices else None
+        self._keyword_cache = {}
+        self.sanitize = sanitize
+
+    def match_device(self, text):
+        """Returns the configured device mentioned in text, or None."""
+        if self._device_re is None:
+            return None
+        found = self._device_re.search(text)
+        return found.group(0) if found else None
+
+    def match_keyword(self, description):
+        """Returns (keyword, unit) for a description, ('unknown', '') if no rule applies."""
+        lowered = description.lower()
+        hit = self._keyword_cache.get(lowered)
+        if hit is None:
+            hit = ('unknown', "")
+            if self._keyword_re is not None:
+                best = None
+                for found in self._keyword_re.finditer(lowered):
+                    rank = self._priority[found.group(1)]
+                    if best is None or rank < best:
+                        best = rank
+                        if rank == 0:
+                            break
+                if best is not None:
+                    keyword = self._keywords[best]
+                    hit = (keyword, self.units[keyword])
+            self._keyword_cache[lowered] = hit
+        return hit
+
+    def match_alarm(self, description, s_description):
+        """Returns the alarm keyword for a sensor, or None."""
+        targets = {"description": description.lower(), "label": s_description.lower()}
+        for on, pattern, keyword in self._alarms:
+            if pattern.search(targets[on]):
+                return keyword
+        return None
+
+    def classify(self, val_str, field, topic):
+        """
+        Classifies one input row. Returns a Sensor (see catalogue.py) or None
+        if the topic cannot be interpreted.
+        """
+        project = self.project
+        device = self.match_device(topic)
+
+        if device is not None:
+            device_rules = self.devices[device]
+            clean_field = field.replace('-', '')
+            field_rules = device_rules.get("fields", {}).get(clean_field, {})
+
+            keyword = field_rules.get("keyword", device_rules.get("default_keyword", 'value'))
+            precision = field_rules.get("precision")
+            if precision is None:
+                precision = get_precision_from_value(val_str)
+
+            name = f"{project}_{device}_{clean_field}"
+            lbl_name = f"{self.label_prefix}_{device}_{clean_field}_{keyword}"
+            data_type = "num"
+            unit = self.units.get(keyword, "")
+        else:
+            topic_parts = topic.split('|')
+            if len(topic_parts) != 3:
+                return None
+
+            device_part, address, description = topic_parts
+            device = device_part.split('/')[-1]
+
+            s_address = self.sanitize(address)
+            s_description = self.sanitize(description)
+
+            name = f"{project}_{device}_{s_address}"
+            lbl_name = f"{self.label_prefix}_{device}_{s_address}_{s_description}"
+
+            data_type = "bool" if self.bool_marker in address else "num"
+            precision = 0 if data_type == "bool" else get_precision_from_value(val_str)
+
+            keyword, unit = self.match_keyword(description)
+            keyword = self.match_alarm(description, s_description) or keyword
+
+        return Sensor(name, lbl_name, project, device, keyword, data_type, str(precision), unit,
+                      topic, field, val_str)
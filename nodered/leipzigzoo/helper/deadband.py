@@ -0,0 +1,54 @@
+"""
+Report-by-exception filters in front of set-shared-state nodes.
+
+With deadband filtering enabled every sensor gets a core Node-RED 'rbe'
+(filter) node wired into its set-shared-state node. Numeric sensors only
+pass a value once it moved by at least one step of the displayed
+precision (or by a per-keyword threshold, absolute or '5%'), compared with
+the last value passed on so slow drifts still get through. Boolean
+sensors only pass actual changes. Configuration lives in the rules file:
+
+    "deadband": {
+        "enabled": false,
+        "keywords": {"pressure": 2, "flow": "5%"}
+    }
+"""
+
+DEFAULT_DEADBAND = {
+    "enabled": False,
+    "keywords": {},
+}
+
+
+def deadband_options(rules=None, enabled=None):
+    """Merges the defaults, the rules file 'deadband' block and an explicit on/off override."""
+    options = dict(DEFAULT_DEADBAND)
+    if rules:
+        options.update(rules.get("deadband", {}))
+    if enabled is not None:
+        options["enabled"] = enabled
+    return options
+
+
+def threshold(record, options):
+    """Returns the filter gap for a numeric sensor as the string Node-RED expects."""
+    override = options["keywords"].get(record["keyword"])
+    if override is not None:
+        return str(override)
+    precision = int(record["precision"] or 0)
+    return f"{10 ** -precision:.{precision}f}"
+
+
+def filter_node(record, set_node, options, new_id):
+    """Returns the 'rbe' node feeding set_node, or None when filtering is disabled."""
+    if not options["enabled"]:
+        return None
+    if record["dataType"] == "num":
+        func, gap = "deadbandEq", threshold(record, options)
+    else:
+        func, gap = "rbe", ""
+    return {
+        "id": new_id(), "type": "rbe", "z": "", "name": f"{set_node['name']} deadband",
+        "func": func, "gap": gap, "start": "", "inout": "out", "septopics": True,
+        "property": "payload", "topi": "topic", "x": 0, "y": 0, "wires": [[set_node["id"]]]
+    }
@@ -0,0 +1,217 @@
+"""
+Deploy generated nodes through the Node-RED Admin HTTP API.
+
+Two modes are supported:
+
+- flows: GET /flows (API v2) for the current revision, merge the generated
+  tabs/groups/nodes into it and POST /flows once with the 'nodes'
+  deployment type. POST /flows always carries the whole configuration,
+  so it is not split; a 409 version mismatch re-reads the flows and
+  retries.
+- flow: one PUT /flow/global for the shared-state config nodes, then one
+  PUT /flow/:id per existing tab (POST /flow for new tabs). The configs go
+  first, so the get/set nodes of every tab find their state when it
+  starts.
+
+Redeploys are idempotent: generated tabs are matched to existing tabs by
+label and shared-state nodes by name, and the existing ids are reused.
+All requests share one keep-alive connection.
+"""
+import http.client
+import json
+import time
+from urllib.parse import urlsplit
+
+API_HEADERS = {
+    "Content-Type": "application/json",
+    "Accept": "application/json",
+    "Node-RED-API-Version": "v2",
+}
+
+
+class DeployError(Exception):
+    """Raised when the Admin API rejects a request."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class AdminClient:
+    """Minimal Node-RED Admin API client over a single persistent connection."""
+
+    def __init__(self, url, token=None, timeout=30):
+        parts = urlsplit(url)
+        self.base_path = parts.path.rstrip('/')
+        self.headers = dict(API_HEADERS)
+        if token:
+            self.headers["Authorization"] = f"Bearer {token}"
+        connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self.connection = connection_class(parts.hostname, parts.port, timeout=timeout)
+        self.requests = 0
+
+    def close(self):
+        self.connection.close()
+
+    def request(self, method, path, body=None, headers=None):
+        """Sends one request and returns the decoded JSON body (or None)."""
+        payload = None if body is None else json.dumps(body, ensure_ascii=False).encode('utf-8')
+        all_headers = dict(self.headers, **(headers or {}))
+        for attempt in (1, 2):
+            try:
+                self.connection.request(method, self.base_path + path, body=payload, headers=all_headers)
+                response = self.connection.getresponse()
+                data = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # The server closed the idle keep-alive connection; reconnect once
+                self.connection.close()
+                if attempt == 2:
+                    raise
+        self.requests += 1
+
+        if response.status >= 400:
+            raise DeployError(f"{method} {path} failed with {response.status}: {data.decode('utf-8', 'replace')}",
+                              status=response.status)
+        return json.loads(data) if data else None
+
+    def get_flows(self):
+        """Returns (rev, flows)."""
+        body = self.request("GET", "/flows")
+        return body["rev"], body["flows"]
+
+    def post_flows(self, flows, rev, deployment_type="nodes"):
+        """Deploys the full flow configuration. Returns the new revision."""
+        body = self.request("POST", "/flows", {"rev": rev, "flows": flows},
+                            headers={"Node-RED-Deployment-Type": deployment_type})
+        return body.get("rev") if body else None
+
+    def get_flow(self, flow_id):
+        return self.request("GET", f"/flow/{flow_id}")
+
+    def put_flow(self, flow_id, flow):
+        return self.request("PUT", f"/flow/{flow_id}", flow)
+
+    def post_flow(self, flow):
+        return self.request("POST", "/flow", flow)
+
+
+def split_generated(nodes):
+    """Splits generated nodes into (tabs, nodes by tab id, shared-state configs)."""
+    tabs, by_tab, configs = [], {}, []
+    for node in nodes:
+        if node["type"] == "tab":
+            tabs.append(node)
+            by_tab.setdefault(node["id"], [])
+        elif node.get("z"):
+            by_tab.setdefault(node["z"], []).append(node)
+        else:
+            configs.append(node)
+    return tabs, by_tab, configs
+
+
+def reuse_existing_ids(current, nodes):
+    """
+    Rewrites generated tab and shared-state ids to the ids already deployed
+    under the same tab label / state or broker name, so redeploys replace in place.
+    Returns the rewritten copy of nodes.
+    """
+    deployed = {}
+    for node in current:
+        if node.get("type") == "tab":
+            deployed.setdefault(("tab", node["label"]), []).append(node["id"])
+        elif node.get("type") in ("shared-state", "mqtt-broker"):
+            deployed.setdefault((node["type"], node["name"]), []).append(node["id"])
+
+    # Each deployed id is claimed at most once, in order
+    renamed = {}
+    for node in nodes:
+        key = (node["type"], node.get("label") if node["type"] == "tab" else node.get("name"))
+        if deployed.get(key):
+            renamed[node["id"]] = deployed[key].pop(0)
+
+    rewritten = []
+    for node in nodes:
+        node = dict(node)
+        for key in ("id", "z", "state", "broker"):
+            if node.get(key) in renamed:
+                node[key] = renamed[node[key]]
+        rewritten.append(node)
+    return rewritten
+
+
+def merge_flows(current, tabs, by_tab, configs):
+    """Returns current flows with the given tabs (and their nodes) and configs replaced."""
+    tab_ids = {tab["id"] for tab in tabs}
+    config_ids = {config["id"] for config in configs}
+    merged = [node for node in current
+              if node["id"] not in tab_ids and node.get("z") not in tab_ids and node["id"] not in config_ids]
+    merged.extend(configs)
+    for tab in tabs:
+        merged.append(tab)
+        merged.extend(by_tab[tab["id"]])
+    return merged
+
+
+def deploy_flows(client, nodes, retries=3):
+    """Deploys via POST /flows. Returns a summary dict."""
+    rev, current = client.get_flows()
+    nodes = reuse_existing_ids(current, nodes)
+    tabs, by_tab, configs = split_generated(nodes)
+
+    conflicts = 0
+    for attempt in range(retries + 1):
+        try:
+            rev = client.post_flows(merge_flows(current, tabs, by_tab, configs), rev)
+            break
+        except DeployError as e:
+            if e.status != 409 or attempt == retries:
+                raise
+            conflicts += 1
+            rev, current = client.get_flows()
+            nodes = reuse_existing_ids(current, nodes)
+            tabs, by_tab, configs = split_generated(nodes)
+    return {"mode": "flows", "tabs": len(tabs), "conflicts": conflicts, "rev": rev}
+
+
+def deploy_per_flow(client, nodes):
+    """Deploys via the per-flow API: PUT /flow/global, then PUT /flow/:id and POST /flow."""
+    rev, current = client.get_flows()
+    existing_tabs = {node["id"] for node in current if node.get("type") == "tab"}
+    nodes = reuse_existing_ids(current, nodes)
+    tabs, by_tab, configs = split_generated(nodes)
+
+    if configs:
+        global_flow = client.get_flow("global")
+        config_ids = {config["id"] for config in configs}
+        kept = [config for config in global_flow.get("configs", []) if config["id"] not in config_ids]
+        client.put_flow("global", {"id": "global", "configs": kept + configs})
+
+    created = updated = 0
+    for tab in tabs:
+        flow = {"id": tab["id"], "label": tab["label"], "disabled": tab.get("disabled", False),
+                "info": tab.get("info", ""), "nodes": by_tab[tab["id"]], "configs": []}
+        if tab["id"] in existing_tabs:
+            client.put_flow(tab["id"], flow)
+            updated += 1
+        else:
+            client.post_flow(flow)
+            created += 1
+
+    return {"mode": "flow", "tabs": len(tabs), "created": created, "updated": updated}
+
+
+def deploy(url, nodes, token=None, mode="flows", retries=3):
+    """Deploys generated nodes to the Node-RED instance at url."""
+    client = AdminClient(url, token=token)
+    started = time.perf_counter()
+    try:
+        if mode == "flow":
+            summary = deploy_per_flow(client, nodes)
+        else:
+            summary = deploy_flows(client, nodes, retries=retries)
+    finally:
+        client.close()
+    summary["requests"] = client.requests
+    summary["seconds"] = time.perf_counter() - started
+    return summary
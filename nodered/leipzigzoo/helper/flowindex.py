@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Streaming index over Node-RED flow exports.
+
+A flow export is one JSON array of node objects. iter_nodes() decodes it
+one node at a time (json.JSONDecoder.raw_decode over a sliding buffer), so
+the full parsed document is never held in memory. FlowIndex keeps a small
+tuple per node (id, type, z, name, state, wire targets, group/link refs)
+plus secondary indexes by type, state reference, tab (z) and name, and
+answers the usual consistency questions from those:
+
+- get/set-shared-state nodes whose state no longer exists
+- shared states nobody reads or writes
+- nodes on tabs that don't exist, wires/links to missing nodes
+- duplicate ids
+
+Usage:
+    python flowindex.py leipzigzoo-model.json --validate
+    python flowindex.py flows.json --type get-shared-state --orphans
+    python flowindex.py flows.json --state 6649a642b01f4151 --json
+"""
+import argparse
+import json
+import sys
+from collections import Counter, namedtuple
+
+CHUNK_SIZE = 1 << 20
+WHITESPACE = " \t\r\n"
+STATE_USERS = ("get-shared-state", "set-shared-state")
+
+Node = namedtuple("Node", "id type z name state targets refs")
+
+
+class FlowFormatError(ValueError):
+    """Raised when a flow export is not a JSON array of node objects."""
+
+
+def iter_nodes(path, chunk_size=CHUNK_SIZE):
+    """Yields the node objects of a flow export one by one."""
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer, pos, eof = "", 0, False
+
+        def fill():
+            nonlocal buffer, pos, eof
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+        def skip():
+            """Skips whitespace; returns the next character or '' at the end of the file."""
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in WHITESPACE:
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    return buffer[pos] if pos < len(buffer) else ""
+                fill()
+
+        fill()
+        if skip() != "[":
+            raise FlowFormatError(f"{path}: expected a JSON array of nodes")
+        pos += 1
+        if skip() == "]":
+            return
+
+        while True:
+            # raw_decode doesn't skip leading whitespace itself
+            skip()
+            try:
+                node, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                if eof:
+                    raise FlowFormatError(f"{path}: {e}") from None
+                # The object continues in the next chunk
+                fill()
+                continue
+            if not isinstance(node, dict):
+                raise FlowFormatError(f"{path}: expected node objects, got {type(node).__name__}")
+            pos = end
+            yield node
+
+            separator = skip()
+            pos += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                raise FlowFormatError(f"{path}: expected ',' or ']' after a node, got {separator!r}")
+            if pos > chunk_size:
+                # Drop the consumed part so the buffer stays about one chunk long
+                fill()
+
+
+def _targets(node):
+    return tuple(target for output in node.get("wires") or () for target in output)
+
+
+def _refs(node):
+    """Ids a node refers to besides its wires: link targets, group members, its group."""
+    refs = list(node.get("links") or ())
+    refs.extend(node.get("nodes") or ())
+    if node.get("g"):
+        refs.append(node["g"])
+    return tuple(refs)
+
+
+class FlowIndex:
+    def __init__(self):
+        self.nodes = {}
+        self.by_type = {}
+        self.by_state = {}
+        self.by_z = {}
+        self.by_name = {}
+        self.duplicates = []
+
+    @classmethod
+    def from_file(cls, path, chunk_size=CHUNK_SIZE):
+        index = cls()
+        for node in iter_nodes(path, chunk_size):
+            index.add(node)
+        return index
+
+    def add(self, node):
+        entry = Node(node.get("id"), node.get("type"), node.get("z") or "", node.get("name") or "",
+                     node.get("state"), _targets(node), _refs(node))
+        if entry.id in self.nodes:
+            self.duplicates.append(entry.id)
+        self.nodes[entry.id] = entry
+        self.by_type.setdefault(entry.type, []).append(entry.id)
+        self.by_z.setdefault(entry.z, []).append(entry.id)
+        if entry.name:
+            self.by_name.setdefault(entry.name, []).append(entry.id)
+        if entry.state:
+            self.by_state.setdefault(entry.state, []).append(entry.id)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def of_type(self, node_type):
+        return [self.nodes[node_id] for node_id in self.by_type.get(node_type, ())]
+
+    def on_tab(self, tab_id):
+        return [self.nodes[node_id] for node_id in self.by_z.get(tab_id, ())]
+
+    def named(self, name):
+        return [self.nodes[node_id] for node_id in self.by_name.get(name, ())]
+
+    def using_state(self, state_id):
+        return [self.nodes[node_id] for node_id in self.by_state.get(state_id, ())]
+
+    # Queries
+
+    def orphaned_state_users(self, node_type=None):
+        """get/set-shared-state nodes whose state no longer exists."""
+        types = (node_type,) if node_type else STATE_USERS
+        states = set(self.by_type.get("shared-state", ()))
+        return [node for t in types for node in self.of_type(t) if node.state not in states]
+
+    def unused_states(self):
+        """shared-state nodes no get/set node refers to."""
+        return [node for node in self.of_type("shared-state") if node.id not in self.by_state]
+
+    def missing_tabs(self):
+        """
+        Nodes whose z names a tab or subflow that isn't in the export. Exports
+        of a selection carry no tabs at all; those are not checked.
+        """
+        containers = set(self.by_type.get("tab", ())) | set(self.by_type.get("subflow", ()))
+        if not containers:
+            return []
+        return [self.nodes[node_id] for z, ids in self.by_z.items() if z and z not in containers for node_id in ids]
+
+    def dangling_references(self):
+        """(node, missing id) pairs for wires, links and group references to missing nodes."""
+        return [(node, target) for node in self.nodes.values()
+                for target in node.targets + node.refs if target not in self.nodes]
+
+    def validate(self):
+        """Returns {problem: [descriptions]} for every problem found (empty if valid)."""
+        problems = {
+            "orphaned state users": [f"{n.type} {n.id} ({n.name}) -> missing state {n.state}"
+                                     for n in self.orphaned_state_users()],
+            "missing tabs": [f"{n.type} {n.id} on missing tab {n.z}" for n in self.missing_tabs()],
+            "dangling references": [f"{n.type} {n.id} -> missing {target}"
+                                    for n, target in self.dangling_references()],
+            "duplicate ids": sorted(set(self.duplicates)),
+        }
+        return {problem: found for problem, found in problems.items() if found}
+
+    def summary(self):
+        return {
+            "nodes": len(self.nodes),
+            "tabs": len(self.by_type.get("tab", ())),
+            "types": dict(Counter({t: len(ids) for t, ids in self.by_type.items()}).most_common()),
+            "unused states": len(self.unused_states()),
+        }
+
+
+def _print_nodes(nodes, as_json):
+    if as_json:
+        print(json.dumps([node._asdict() for node in nodes], ensure_ascii=False, indent=2))
+        return
+    for node in nodes:
+        print(f"{node.id}\t{node.type}\t{node.z}\t{node.name}" + (f"\tstate={node.state}" if node.state else ""))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index and validate a Node-RED flow export without loading it whole")
+    parser.add_argument("flow", help="Flow export (JSON array of nodes)")
+    parser.add_argument("--type", help="List nodes of this type")
+    parser.add_argument("--tab", help="List nodes on this tab id")
+    parser.add_argument("--name", help="List nodes with this name")
+    parser.add_argument("--state", help="List get/set nodes using this shared-state id")
+    parser.add_argument("--orphans", action="store_true",
+                        help="List get/set-shared-state nodes (of --type, if given) whose state is missing")
+    parser.add_argument("--unused", action="store_true", help="List shared states without get/set nodes")
+    parser.add_argument("--validate", action="store_true", help="Report all problems; exit 1 if any")
+    parser.add_argument("--json", action="store_true", help="Output as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        index = FlowIndex.from_file(args.flow)
+    except (OSError, FlowFormatError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.validate:
+        problems = index.validate()
+        if args.json:
+            print(json.dumps({"summary": index.summary(), "problems": problems}, ensure_ascii=False, indent=2))
+        else:
+            for problem, found in problems.items():
+                print(f"{problem}: {len(found)}")
+                for description in found[:20]:
+                    print(f"  {description}")
+                if len(found) > 20:
+                    print(f"  ... {len(found) - 20} more")
+            print(f"{len(index)} nodes, {'no problems' if not problems else f'{len(problems)} kinds of problems'}",
+                  file=sys.stderr)
+        return 1 if problems else 0
+
+    if args.orphans:
+        nodes = index.orphaned_state_users(args.type)
+    elif args.unused:
+        nodes = index.unused_states()
+    elif args.state:
+        nodes = index.using_state(args.state)
+    elif args.type:
+        nodes = index.of_type(args.type)
+    elif args.tab:
+        nodes = index.on_tab(args.tab)
+    elif args.name:
+        nodes = index.named(args.name)
+    else:
+        print(json.dumps(index.summary(), ensure_ascii=False, indent=2))
+        return 0
+    _print_nodes(nodes, args.json)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
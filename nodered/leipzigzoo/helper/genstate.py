@@ -1,75 +1,35 @@
+import argparse
 import json
-import re
+import os
+import sys
 import uuid
 
+from catalogue import SensorCatalogue
+from classify import Classifier, ensure_rules, get_precision_from_value, load_rules, sanitize  # noqa: F401
+from deadband import deadband_options, filter_node
+from ingress import build_ingress, ingress_options
+from layout import GROUP_KEYS, layout_options, layout_sensors
+from policy import DEFAULT_PERSISTENCE, PersistencePolicy, load_change_rates, rates_from_stats
+from profiling import NullProfiler, Profiler, write_report
+from registry import NameRegistry, sensor_key
+from stats import apply_stats, collect, load_field_stats
+
+# Shared SQLite sensor catalogue (common/sensordb.py)
+COMMON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "common")
+CATALOGUE_EXTENSIONS = (".db", ".sqlite")
+
 def generate_id():
     """Generates a random 16-character hexadecimal ID."""
     return uuid.uuid4().hex[:16]
 
-def sanitize(text):
-    """Cleans a string to be a valid JavaScript variable name component."""
-    # Special case for multiple exclamation marks
-    if re.fullmatch(r'!+', text):
-        return "alarm"
-        
-    # Remove trailing exclamation marks
-    text = text.rstrip('!')
-    
-    # Replace any non-alphanumeric characters with an underscore
-    text = re.sub(r'[^\w\s-]', '_', text)
-    # Replace whitespace and hyphens with a single underscore
-    text = re.sub(r'[\s-]+', '_', text)
-    # Replace multiple consecutive underscores with a single one
-    text = re.sub(r'_+', '_', text)
-    # Remove leading or trailing underscores
-    text = text.strip('_')
-    return text
-
-def get_precision_from_value(value_str):
-    """Calculates the number of decimal places in a string value."""
-    # Clean the value string to handle cases like '-0.5'
-    cleaned_value = value_str.strip()
-    if '.' in cleaned_value:
-        return len(cleaned_value.split('.')[-1])
-    return 0
-
-def process_data(file_path):
-    """
-    Reads the input file, processes the data, and returns a list of Node-RED nodes.
-    """
-    all_nodes = []
-    x, y = 150, 100
-    x_increment = 300
-    max_x = 2400
-
-    icpdas_precision_map = {
-        'AI02': 0, 'AI05': 0, 'AI09': 0, 'AI10': 0,
-        'AI07': 2, 'AI08': 2, 'AI11': 2, 'AI12': 2,
-        'AI13': 2, 'AI14': 2, 'AI15': 2, 'AI16': 2
-    }
-    icpdas_keyword_map = {
-        'AI02': 'pressure', 'AI05': 'pressure', 'AI09': 'snow', 'AI10': 'snow',
-        'AI07': 'flow', 'AI08': 'flow', 'AI11': 'flow', 'AI12': 'flow',
-        'AI13': 'flow', 'AI14': 'flow', 'AI15': 'flow', 'AI16': 'flow'
-    }
-
-    unit_map = {
-        'pressure': 'Pa',
-        'temperature': 'C',
-        'flow': 'm/s',
-        'druck': 'Pa',
-        'temperatur': 'C',
-        'durchfluss': 'm/s',
-        'humidity': '', # Set to empty to avoid unsupported unit error
-        'feuchte': ''   # Set to empty to avoid unsupported unit error
-    }
-
+def read_lines(file_path):
     with open(file_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
+        return f.readlines()
 
+def consolidate_lines(lines):
+    """Joins multi-line descriptions into one line per row, skipping blanks and headers."""
     full_data_lines = []
     previous_line = ""
-    # Consolidate multi-line descriptions first
     for line in lines:
         line = line.strip()
         if not line or 'state_value' in line:
@@ -82,108 +42,325 @@ def process_data(file_path):
             previous_line += " " + line
     if previous_line:
         full_data_lines.append(previous_line)
+    return full_data_lines
 
+def split_rows(full_data_lines, classifier):
+    """Yields (value, field, measurement, topic) tuples from consolidated lines."""
     for line in full_data_lines:
-        try:
-            val_str, field, measurement, topic = [part.strip() for part in line.split(',')]
-        except ValueError:
-            # Handle lines that don't split into exactly 4 parts
-            # This can happen with the icpdas data
-            parts = [p.strip() for p in line.split(',')]
-            if len(parts) == 4:
-                 val_str, field, measurement, topic = parts
-            elif 'icpdas' in line:
-                val_str, field, measurement, topic = parts[0], parts[1], parts[2], parts[3] if len(parts) > 3 else "leipzigzoo/icpdas01"
-            else:
-                continue
+        parts = [part.strip() for part in line.split(',')]
+        if len(parts) == 4:
+            yield tuple(parts)
+            continue
+        # Handle lines that don't split into exactly 4 parts
+        # This can happen with device data (e.g. icpdas)
+        device = classifier.match_device(line)
+        if device is not None and len(parts) >= 3:
+            topic = parts[3] if len(parts) > 3 else f"{classifier.project}/{device}"
+            yield parts[0], parts[1], parts[2], topic
 
+def open_catalogue(path):
+    if COMMON_DIR not in sys.path:
+        sys.path.insert(0, COMMON_DIR)
+    from sensordb import SensorDB
+    return SensorDB(path)
 
-        project = "leipzigzoo"
-        name, lbl, tags_list, data_type, precision, unit = "", "", [], "num", "0", ""
+def read_rows(file_path, classifier):
+    """
+    Reads the input file, consolidates multi-line descriptions and yields
+    (value, field, measurement, topic) tuples.
+    """
+    return split_rows(consolidate_lines(read_lines(file_path)), classifier)
 
-        if 'icpdas01' in topic:
-            device = "icpdas01"
-            clean_field = field.replace('-', '')
-            name = f"{project}_{device}_{clean_field}"
-            
-            keyword = icpdas_keyword_map.get(clean_field, 'value')
-            lbl_name = f"LZ_{device}_{clean_field}_{keyword}"
-            
-            tags_list = [project, device, keyword]
-            data_type = "num"
-            precision = str(icpdas_precision_map.get(clean_field, get_precision_from_value(val_str)))
-            unit = unit_map.get(keyword, "")
 
-        else:
-            topic_parts = topic.split('|')
-            if len(topic_parts) != 3:
-                continue
-
-            device_part, address, description = topic_parts
-            device = device_part.split('/')[-1]
-
-            s_address = sanitize(address)
-            s_description = sanitize(description)
-
-            name = f"{project}_{device}_{s_address}"
-            lbl_name = f"LZ_{device}_{s_address}_{s_description}"
-            
-            data_type = "bool" if "_BI" in address else "num"
-            precision = "0" if data_type == "bool" else str(get_precision_from_value(val_str))
-            
-            keyword = 'unknown'
-            # Find the appropriate keyword and unit
-            for key in unit_map:
-                if key in description.lower():
-                    keyword = key
-                    unit = unit_map.get(key, "")
-                    break
-            
-            if 'störung' in description.lower() or 'alarm' in s_description.lower():
-                keyword = 'störung'
-            elif s_description == 'alarm':
-                 keyword = 'alarm'
-
-
-            tags_list = [project, device, keyword]
+def build_nodes(records, project="leipzigzoo", layout=None, deadband=None, ingress=None):
+    """
+    Emits the shared-state, get and set nodes for classified sensor records,
+    placed on generated tabs and groups (see layout.py). With deadband
+    filtering enabled each set node gets an 'rbe' filter in front (see deadband.py);
+    with ingress enabled one wildcard MQTT-in feeds them all (see ingress.py).
+    """
+    deadband = deadband or deadband_options()
+    sensor_nodes = []
+    sensors = []
 
+    for record in records:
         state_id = generate_id()
-        z_id = "c0292dea32408fa2"
+        lbl_name = record["lbl"]
 
         shared_state_node = {
-            "id": state_id, "type": "shared-state", "name": name, "lbl": lbl_name,
-            "tags": ",".join(tags_list), "historyCount": 2, "dataType": data_type,
+            "id": state_id, "type": "shared-state", "name": record["name"], "lbl": lbl_name,
+            "tags": ",".join(record["tags"]),
+            "historyCount": record.get("historyCount", DEFAULT_PERSISTENCE["historyCount"]),
+            "dataType": record["dataType"],
             "boolType": "bool", "boolStrTrue": "", "boolStrFalse": "",
-            "precision": precision, "numMin": "", "numMax": "", "unit": unit,
-            "saveInterval": "30000"
+            "precision": record["precision"], "numMin": record.get("numMin", ""), "numMax": record.get("numMax", ""),
+            "unit": record["unit"],
+            "saveInterval": str(record.get("saveInterval", DEFAULT_PERSISTENCE["saveInterval"]))
         }
 
         get_state_node = {
-            "id": generate_id(), "type": "get-shared-state", "z": z_id, "state": state_id,
+            "id": generate_id(), "type": "get-shared-state", "z": "", "state": state_id,
             "name": lbl_name, "triggerOnInit": True, "triggerOnChange": True,
-            "x": x, "y": y, "wires": [[]]
+            "x": 0, "y": 0, "wires": [[]]
         }
 
         set_state_node = {
-            "id": generate_id(), "type": "set-shared-state", "z": z_id, "state": state_id,
+            "id": generate_id(), "type": "set-shared-state", "z": "", "state": state_id,
             "name": lbl_name, "triggerOnInit": True, "triggerOnChange": True,
-            "provideOutput": True, "outputs": 1, "x": x, "y": y + 60, "wires": [[]]
+            "provideOutput": True, "outputs": 1, "x": 0, "y": 0, "wires": [[]]
         }
 
-        all_nodes.extend([shared_state_node, get_state_node, set_state_node])
+        filter_state_node = filter_node(record, set_state_node, deadband, generate_id)
+        if filter_state_node is None:
+            stack = [get_state_node, set_state_node]
+        else:
+            stack = [get_state_node, filter_state_node, set_state_node]
 
-        x += x_increment
-        if x > max_x:
-            x = 150
-            y += 200
+        sensor_nodes.append(shared_state_node)
+        sensor_nodes.extend(stack)
+        sensors.append((record, stack))
 
-    return all_nodes
+    layout_nodes = layout_sensors(sensors, project, layout or layout_options(), generate_id)
+    if ingress and ingress["enabled"]:
+        layout_nodes += build_ingress(sensors, project, ingress, generate_id)
+    return layout_nodes + sensor_nodes
 
-if __name__ == "__main__":
+def classify_file(file_path, rules=None, profiler=None):
+    """Reads and classifies an input file. Returns the sensors as a SensorCatalogue."""
+    profiler = profiler or NullProfiler()
+    classifier = Classifier(ensure_rules(rules))
+    profiler.instrument(classifier)
+
+    if file_path.endswith(CATALOGUE_EXTENSIONS):
+        # The catalogue already holds one consolidated row per sensor
+        with profiler.stage("read"), open_catalogue(file_path) as catalogue:
+            rows = list(catalogue.value_rows(site=classifier.project))
+    else:
+        with profiler.stage("read"):
+            lines = read_lines(file_path)
+        with profiler.stage("consolidate"):
+            lines = consolidate_lines(lines)
+        rows = split_rows(lines, classifier)
+    if profiler.enabled:
+        # Materialised only when profiling, so parsing is timed apart from classifying
+        with profiler.stage("parse"):
+            rows = list(rows)
+
+    records = SensorCatalogue()
+    with profiler.stage("classify"):
+        for val_str, field, measurement, topic in rows:
+            record = classifier.classify(val_str, field, topic)
+            if record is not None:
+                records.append(record)
+                profiler.count("records", record["keyword"])
+            else:
+                profiler.count("rows", "unparsed")
+    profiler.count("rows", "classified", len(records))
+    return records
+
+def load_stats(file_path, rules=None):
+    """
+    Returns per-field statistics (see stats.py) of a history export, or of a
+    values file (which may hold several samples per sensor but no times).
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        header = f.readline()
+    if header.startswith('#') or "_value" in header.strip().split(','):
+        return load_field_stats(file_path)
+    classifier = Classifier(ensure_rules(rules))
+    return collect((sensor_key({"topic": topic, "field": field}), value, None)
+                   for value, field, measurement, topic in read_rows(file_path, classifier))
+
+def apply_sensor_settings(records, rules, change_rates=None, stats=None):
+    """
+    Fills precision and numMin/numMax from field statistics (see stats.py) and
+    sets per-sensor saveInterval/historyCount (see policy.py). change_rates and
+    stats are dicts or files; without explicit change rates they come from stats.
+    """
+    if isinstance(stats, str):
+        stats = load_stats(stats, rules)
+    if stats is not None:
+        apply_stats(records, stats, rules)
+        if change_rates is None:
+            change_rates = rates_from_stats(stats)
+    if isinstance(change_rates, str):
+        change_rates = load_change_rates(change_rates)
+    return PersistencePolicy(rules).apply(records, change_rates)
+
+def store_catalogue(path, records, rules, source=None):
+    """Upserts the classified sensors of a site into the SQLite catalogue."""
+    with open_catalogue(path) as catalogue:
+        return catalogue.upsert_records(records, rules["project"], source=source)
+
+def process_data(file_path, rules=None, layout=None, registry=None, change_rates=None, deadband=None,
+                 ingress=None, stats=None, profiler=None, select=None, catalogue=None):
+    """
+    Reads the input file, processes the data, and returns a list of Node-RED nodes.
+    Classification rules come from a per-project rules file (see rules/); layout
+    overrides (max_per_tab, group_by) take precedence over the file's 'layout' block.
+    Names are made unique through the registry (a fresh in-memory one by default).
+    Persistence settings follow the rules' 'persistence' block and, when given,
+    the observed change rates. deadband=True/False overrides the rules' 'deadband' block,
+    ingress (enabled/broker/broker_id overrides) the 'ingress' block. Field
+    statistics (a file, or a table from load_stats) fill precision, numMin/numMax
+    and, without explicit change rates, the change rates. A Profiler (see
+    profiling.py) records the time and memory of every stage. select
+    (device/keyword/dataType filters) restricts the flow to matching sensors.
+    The final sensors are stored in the SQLite catalogue, if one is given.
+    """
+    profiler = profiler or NullProfiler()
+    rules = ensure_rules(rules)
+    options = layout_options(rules, **(layout or {}))
+    records = classify_file(file_path, rules, profiler)
+    if select:
+        records = records.select(**select)
+    with profiler.stage("resolve"):
+        (registry or NameRegistry()).resolve_all(records)
+    with profiler.stage("settings"):
+        apply_sensor_settings(records, rules, change_rates, stats)
+    if catalogue:
+        with profiler.stage("catalogue"):
+            store_catalogue(catalogue, records, rules, file_path)
+    with profiler.stage("build"):
+        return build_nodes(records, rules["project"], options, deadband_options(rules, deadband),
+                           ingress_options(rules, **(ingress or {})))
+
+def add_layout_arguments(parser):
+    parser.add_argument("--registry", help="Name registry file; keeps collision suffixes stable between runs")
+    parser.add_argument("--max-per-tab", type=int, help="Maximum sensors per generated tab")
+    parser.add_argument("--group-by", choices=list(GROUP_KEYS), help="Group sensors by device or keyword")
+    parser.add_argument("--change-rates", metavar="CSV",
+                        help="History export or changes_per_hour table used to pick save intervals")
+    parser.add_argument("--stats", metavar="CSV",
+                        help="History export or values file used to infer precision and value ranges")
+    parser.add_argument("--catalogue", metavar="DB", help="Store the generated sensors in this SQLite catalogue")
+    parser.add_argument("--deadband", action=argparse.BooleanOptionalAction, default=None,
+                        help="Put a report-by-exception filter in front of every set node")
+    parser.add_argument("--ingress", action=argparse.BooleanOptionalAction, default=None,
+                        help="Feed all set nodes from one wildcard MQTT-in and generated dispatchers")
+    parser.add_argument("--broker", metavar="HOST[:PORT]", help="MQTT broker for the generated ingress")
+    parser.add_argument("--broker-id", help="Use this existing mqtt-broker config node for the ingress")
+
+def layout_arguments(args):
+    return {"max_per_tab": args.max_per_tab, "group_by": args.group_by}
+
+def ingress_arguments(args):
+    return {"enabled": args.ingress, "broker": args.broker, "broker_id": args.broker_id}
+
+def main(argv=None):
+    """Command line entry point: 'generate' (default), 'batch' or 'deploy'."""
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0] not in ("generate", "batch", "deploy"):
+        argv.insert(0, "generate")
+
+    parser = argparse.ArgumentParser(description="Generate Node-RED shared-state flows from sensor values")
+    subparsers = parser.add_subparsers(dest="command")
+
+    generate = subparsers.add_parser("generate", help="Generate the flow for one site")
+    generate.add_argument("input", nargs="?", default="values.txt",
+                          help="Values file or SQLite catalogue (.db) (default: values.txt)")
+    generate.add_argument("--rules", help="Rules file (default: rules/leipzigzoo.json)")
+    generate.add_argument("-o", "--output", help="Write the flow to this file instead of stdout")
+    generate.add_argument("--device", action="append", help="Only generate sensors of this device (repeatable)")
+    generate.add_argument("--keyword", action="append", help="Only generate sensors with this keyword (repeatable)")
+    generate.add_argument("--data-type", action="append", choices=["num", "bool"],
+                          help="Only generate sensors of this data type")
+    generate.add_argument("--profile", metavar="REPORT",
+                          help="Record per-stage time, memory and rule hits and write them as JSON")
+    add_layout_arguments(generate)
+
+    batch = subparsers.add_parser("batch", help="Generate flows for many sites in parallel")
+    batch.add_argument("source", help="Directory of values files or a JSON site manifest")
+    batch.add_argument("--rules", help="Rules file for sites that don't name one")
+    batch.add_argument("--out-dir", default="flows", help="Output directory (default: flows)")
+    batch.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    add_layout_arguments(batch)
+
+    deploy = subparsers.add_parser("deploy", help="Generate a site and deploy it via the Node-RED Admin API")
+    deploy.add_argument("input", help="Values file, or an already generated flow (.json)")
+    deploy.add_argument("--rules", help="Rules file (default: rules/leipzigzoo.json)")
+    deploy.add_argument("--url", default="http://127.0.0.1:1880", help="Node-RED base URL")
+    deploy.add_argument("--token", help="Admin API bearer token")
+    deploy.add_argument("--mode", choices=["flows", "flow"], default="flows",
+                        help="POST /flows with revision checks (default) or per-tab /flow/:id")
+    deploy.add_argument("--retries", type=int, default=3, help="Retries on revision conflicts")
+    add_layout_arguments(deploy)
+
+    args = parser.parse_args(argv)
+    registry = NameRegistry(args.registry)
+
+    if args.command == "deploy":
+        from deploy import DeployError
+        from deploy import deploy as deploy_nodes
+        if args.input.endswith(".json"):
+            from flowindex import FlowIndex
+            with open(args.input, 'r', encoding='utf-8') as f:
+                nodes = json.load(f)
+            index = FlowIndex()
+            for node in nodes:
+                index.add(node)
+            problems = index.validate()
+            if problems:
+                for problem, found in problems.items():
+                    print(f"Error: {args.input}: {len(found)} {problem}, e.g. {found[0]}", file=sys.stderr)
+                return 1
+        else:
+            nodes = process_data(args.input, args.rules, layout_arguments(args), registry, args.change_rates,
+                                 args.deadband, ingress_arguments(args), args.stats, catalogue=args.catalogue)
+            registry.report(sys.stderr)
+            registry.save()
+        try:
+            summary = deploy_nodes(args.url, nodes, token=args.token, mode=args.mode, retries=args.retries)
+        except (DeployError, OSError) as e:
+            print(f"Error: deploy failed: {e}", file=sys.stderr)
+            return 1
+        print(f"✓ deployed {len(nodes)} nodes on {summary['tabs']} tabs to {args.url} "
+              f"in {summary['requests']} requests, {summary['seconds']:.2f}s", file=sys.stderr)
+        return 0
+
+    if args.command == "batch":
+        from batch import discover_sites, print_report, run_batch
+        try:
+            sites = discover_sites(args.source, rules=args.rules, out_dir=args.out_dir,
+                                   layout=layout_arguments(args), change_rates=args.change_rates,
+                                   deadband=args.deadband, ingress=ingress_arguments(args), stats=args.stats)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        results = run_batch(sites, workers=args.workers, registry=registry, catalogue=args.catalogue)
+        print_report(results)
+        registry.report(sys.stderr)
+        registry.save()
+        return 0 if all(result["error"] is None for result in results) else 1
+
+    profiler = Profiler() if args.profile else NullProfiler()
     try:
-        nodes = process_data('values.txt')
-        print(json.dumps(nodes, indent=4, ensure_ascii=False))
-    except FileNotFoundError:
-        print("Error: 'values.txt' not found.")
+        nodes = process_data(args.input, args.rules, layout_arguments(args), registry, args.change_rates,
+                             args.deadband, ingress_arguments(args), args.stats, profiler,
+                             {"device": args.device, "keyword": args.keyword, "dataType": args.data_type},
+                             args.catalogue)
+    except FileNotFoundError as e:
+        print(f"Error: '{e.filename}' not found.")
+        return 1
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
+        return 1
+
+    registry.report(sys.stderr)
+    registry.save()
+
+    with profiler.stage("emit"):
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(nodes, f, indent=4, ensure_ascii=False)
+        else:
+            print(json.dumps(nodes, indent=4, ensure_ascii=False))
+
+    if args.profile:
+        report = profiler.report(input=args.input, nodes=len(nodes),
+                                 sanitize_cache=sanitize.cache_info()._asdict())
+        write_report(report, args.profile)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""
+Single MQTT ingress with generated dispatch functions.
+
+Instead of one MQTT-in per topic, the generated flow subscribes once with
+a wildcard and routes every message through precomputed lookup tables:
+
+    mqtt in (project/#) -> root dispatcher -> link out --> link in -> tab dispatcher -> set node
+                                           -> link out --> link in -> tab dispatcher -> set node
+
+The root dispatcher looks the topic up in a topic -> tab outputs table and
+each tab dispatcher looks it up in a topic -> {field: output} table, so the
+cost per message does not depend on the number of sensors. The tables are
+built once in the functions' 'initialize' code. A payload that is an object
+(several fields on one topic, e.g. icpdas modules) is fanned out per field;
+any other payload goes to the topic's 'value' sensor (or its only sensor).
+Tab dispatchers have at most max_per_tab outputs.
+
+    "ingress": {
+        "enabled": false,
+        "topic": "leipzigzoo/#",
+        "broker": {"host": "localhost", "port": 1883}
+    }
+
+'broker_id' names an existing mqtt-broker config node instead.
+"""
+import json
+
+from layout import ORIGIN_X, ORIGIN_Y, SET_OFFSET, TAB_WIDTH
+
+DEFAULT_INGRESS = {
+    "enabled": False,
+    "topic": None,
+    "broker": {"host": "localhost", "port": 1883},
+    "broker_id": None,
+}
+
+DISPATCH_X = TAB_WIDTH + 300
+ROW_HEIGHT = 60
+
+ROOT_DISPATCH = """const outputs = context.get("routes")[msg.topic];
+if (outputs === undefined) {
+    return null;
+}
+const out = new Array(%d);
+for (const i of outputs) {
+    out[i] = msg;
+}
+return out;"""
+
+TAB_DISPATCH = """const fields = context.get("routes")[msg.topic];
+if (fields === undefined) {
+    return null;
+}
+const out = new Array(%d);
+const payload = msg.payload;
+if (payload !== null && typeof payload === "object" && !Array.isArray(payload)) {
+    for (const field in payload) {
+        const i = fields[field];
+        if (i !== undefined) {
+            out[i] = {topic: msg.topic, field: field, payload: payload[field]};
+        }
+    }
+} else {
+    const i = fields.value !== undefined ? fields.value : fields[Object.keys(fields)[0]];
+    out[i] = msg;
+}
+return out;"""
+
+
+def ingress_options(rules=None, enabled=None, broker=None, broker_id=None):
+    """Merges the defaults, the rules file 'ingress' block and explicit overrides."""
+    options = dict(DEFAULT_INGRESS)
+    if rules:
+        options.update(rules.get("ingress", {}))
+        options["topic"] = options["topic"] or f"{rules['project']}/#"
+    if enabled is not None:
+        options["enabled"] = enabled
+    if broker:
+        host, _, port = broker.partition(":")
+        options["broker"] = {"host": host, "port": int(port or 1883)}
+    if broker_id:
+        options["broker_id"] = broker_id
+    return options
+
+
+def _function(node_id, tab_id, name, code, routes, outputs, x, y, wires):
+    return {
+        "id": node_id, "type": "function", "z": tab_id, "name": name, "func": code % outputs,
+        "outputs": outputs, "timeout": 0, "noerr": 0,
+        "initialize": f"context.set(\"routes\", {json.dumps(routes, ensure_ascii=False)});",
+        "finalize": "", "libs": [], "x": x, "y": y, "wires": wires
+    }
+
+
+def build_ingress(sensors, project, options, new_id):
+    """
+    Returns the ingress nodes (broker config, ingress tab, dispatchers and
+    links) for (record, nodes) sensors already placed by layout_sensors.
+    Each sensor's second node (its filter, or the set node) is the target.
+    """
+    tabs = {}
+    for record, nodes in sensors:
+        entry = nodes[1]
+        tabs.setdefault(entry["z"], []).append((record, entry))
+
+    topic = options["topic"] or f"{project}/#"
+    ingress_nodes = []
+    broker_id = options["broker_id"]
+    if not broker_id:
+        broker = options["broker"]
+        broker_id = new_id()
+        ingress_nodes.append({
+            "id": broker_id, "type": "mqtt-broker", "name": f"{project} broker",
+            "broker": broker["host"], "port": str(broker["port"]), "clientid": "", "autoConnect": True,
+            "usetls": False, "protocolVersion": "4", "keepalive": "60", "cleansession": True
+        })
+
+    ingress_tab = new_id()
+    ingress_nodes.append({"id": ingress_tab, "type": "tab", "label": f"{project} ingress",
+                          "disabled": False, "info": ""})
+
+    root_routes, link_outs = {}, []
+    for index, (tab_id, members) in enumerate(tabs.items()):
+        # Tab side: link in -> dispatcher -> sensor entry nodes
+        link_in, link_out, dispatcher = new_id(), new_id(), new_id()
+        routes = {}
+        for output, (record, entry) in enumerate(members):
+            routes.setdefault(record["topic"], {})[record["field"]] = output
+            topic_tabs = root_routes.setdefault(record["topic"], [])
+            if not topic_tabs or topic_tabs[-1] != index:
+                topic_tabs.append(index)
+
+        ingress_nodes.append({"id": link_in, "type": "link in", "z": tab_id, "name": "ingress",
+                              "links": [link_out], "x": DISPATCH_X, "y": ORIGIN_Y, "wires": [[dispatcher]]})
+        tab_dispatch = _function(dispatcher, tab_id, "dispatch", TAB_DISPATCH, routes, len(members),
+                                 DISPATCH_X, ORIGIN_Y + SET_OFFSET, [[entry["id"]] for _, entry in members])
+        ingress_nodes.append(tab_dispatch)
+
+        # Ingress side: one link out per tab
+        link_outs.append(link_out)
+        ingress_nodes.append({"id": link_out, "type": "link out", "z": ingress_tab, "name": f"tab {index + 1}",
+                              "mode": "link", "links": [link_in],
+                              "x": ORIGIN_X + 600, "y": ORIGIN_Y + index * ROW_HEIGHT, "wires": []})
+
+    root_dispatch = _function(new_id(), ingress_tab, "dispatch", ROOT_DISPATCH, root_routes, len(link_outs),
+                              ORIGIN_X + 300, ORIGIN_Y, [[link_out] for link_out in link_outs])
+    ingress_nodes.append(root_dispatch)
+    ingress_nodes.append({
+        "id": new_id(), "type": "mqtt in", "z": ingress_tab, "name": topic,
+        "topic": topic, "qos": "0", "datatype": "auto-detect", "broker": broker_id,
+        "nl": False, "rap": True, "rh": 0, "inputs": 0, "x": ORIGIN_X, "y": ORIGIN_Y,
+        "wires": [[root_dispatch["id"]]]
+    })
+    return ingress_nodes
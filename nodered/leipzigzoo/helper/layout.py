@@ -0,0 +1,145 @@
+"""
+Tab sharding and grouped placement for generated flows.
+
+Sensors are bucketed by device (or keyword), buckets are packed into
+tabs holding at most `max_per_tab` sensors, and every bucket on a tab
+gets a Node-RED group with its get/set nodes (and any filter in between)
+stacked in a compact grid, about as many columns as rows up to the width
+of the tab. Keeping tabs bounded keeps editor load and render time flat
+as sensor counts grow.
+"""
+import math
+
+DEFAULT_LAYOUT = {
+    "max_per_tab": 250,
+    "group_by": "device",
+}
+
+GROUP_KEYS = {
+    "device": lambda record: record["device"],
+    "keyword": lambda record: record["keyword"],
+    "none": lambda record: "",
+}
+
+# Node-RED coordinates are node centres; groups are boxes around them.
+CELL_WIDTH = 300
+CELL_HEIGHT = 100
+SET_OFFSET = 40
+NODE_HALF_HEIGHT = 15
+GROUP_PADDING = 20
+GROUP_LABEL_HEIGHT = 20
+GROUP_GAP = 40
+TAB_WIDTH = 2400
+# A group never gets wider than a tab
+GROUP_MAX_COLUMNS = TAB_WIDTH // CELL_WIDTH
+ORIGIN_X, ORIGIN_Y = 150, 100
+
+
+def layout_options(rules=None, **overrides):
+    """Merges the defaults, the rules file 'layout' block and explicit overrides."""
+    options = dict(DEFAULT_LAYOUT)
+    if rules:
+        options.update(rules.get("layout", {}))
+    options.update({key: value for key, value in overrides.items() if value is not None})
+    if options["group_by"] not in GROUP_KEYS:
+        raise ValueError(f"unknown group_by '{options['group_by']}' (expected one of {', '.join(GROUP_KEYS)})")
+    if int(options["max_per_tab"]) < 1:
+        raise ValueError("max_per_tab must be at least 1")
+    return options
+
+
+def group_columns(size):
+    """Columns of a group of size sensors: a square grid, at most a tab wide."""
+    return max(1, min(GROUP_MAX_COLUMNS, math.ceil(math.sqrt(size))))
+
+
+def _buckets(sensors, group_by):
+    """Splits sensors into ordered (key, sensors) buckets, first appearance first."""
+    key_of = GROUP_KEYS[group_by]
+    buckets = {}
+    for sensor in sensors:
+        buckets.setdefault(key_of(sensor[0]), []).append(sensor)
+    return list(buckets.items())
+
+
+def _shard(buckets, max_per_tab):
+    """Packs buckets into tabs; buckets larger than a tab are split."""
+    tabs, current, used = [], [], 0
+    for key, members in buckets:
+        for start in range(0, len(members), max_per_tab):
+            chunk = members[start:start + max_per_tab]
+            if used and used + len(chunk) > max_per_tab:
+                tabs.append(current)
+                current, used = [], 0
+            current.append((key, chunk))
+            used += len(chunk)
+    if current:
+        tabs.append(current)
+    return tabs
+
+
+def _tab_label(project, groups, index, total):
+    keys = [key for key, _ in groups if key]
+    if not keys:
+        label = project
+    elif keys[0] == keys[-1]:
+        label = f"{project} {keys[0]}"
+    else:
+        label = f"{project} {keys[0]}–{keys[-1]}"
+    return label if total == 1 else f"{label} ({index}/{total})"
+
+
+def layout_sensors(sensors, project, options, new_id):
+    """
+    Places (record, nodes) sensors on generated tabs and groups; a sensor's
+    nodes (get, optional filter, set) are stacked top to bottom. Sets 'z',
+    'g', 'x' and 'y' on those nodes in place and returns the tab and group
+    nodes.
+    """
+    max_per_tab = int(options["max_per_tab"])
+    tabs = _shard(_buckets(sensors, options["group_by"]), max_per_tab)
+
+    layout_nodes = []
+    for tab_index, groups in enumerate(tabs, start=1):
+        tab_id = new_id()
+        layout_nodes.append({
+            "id": tab_id, "type": "tab", "label": _tab_label(project, groups, tab_index, len(tabs)),
+            "disabled": False, "info": ""
+        })
+
+        x, y, row_height = ORIGIN_X, ORIGIN_Y, 0
+        for key, members in groups:
+            columns = group_columns(len(members))
+            rows = math.ceil(len(members) / columns)
+            depth = max(len(nodes) for _, nodes in members)
+            cell_height = CELL_HEIGHT + (depth - 2) * SET_OFFSET
+            width = columns * CELL_WIDTH
+            height = (rows - 1) * cell_height + (depth - 1) * SET_OFFSET \
+                + 2 * (NODE_HALF_HEIGHT + GROUP_PADDING) + GROUP_LABEL_HEIGHT
+
+            if x > ORIGIN_X and x + width > TAB_WIDTH:
+                x = ORIGIN_X
+                y += row_height + GROUP_GAP
+                row_height = 0
+
+            group_id = new_id()
+            member_ids = []
+            for i, (record, nodes) in enumerate(members):
+                column, row = i % columns, i // columns
+                node_x = x + column * CELL_WIDTH
+                node_y = y + row * cell_height
+                for level, node in enumerate(nodes):
+                    node.update({"z": tab_id, "g": group_id, "x": node_x, "y": node_y + level * SET_OFFSET})
+                    member_ids.append(node["id"])
+
+            layout_nodes.append({
+                "id": group_id, "type": "group", "z": tab_id, "name": key or project,
+                "style": {"label": True}, "nodes": member_ids,
+                "x": x - CELL_WIDTH // 2, "y": y - NODE_HALF_HEIGHT - GROUP_PADDING - GROUP_LABEL_HEIGHT,
+                "w": width, "h": height
+            })
+
+            x += width + GROUP_GAP
+            row_height = max(row_height, height)
+
+    return layout_nodes
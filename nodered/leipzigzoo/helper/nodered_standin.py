@@ -0,0 +1,137 @@
+"""
+Local stand-in for the subset of the Node-RED Admin API used by deploy.py.
+
+Keeps the flow configuration in memory, tracks a revision hash like
+Node-RED does and answers 409 on a stale revision. Run it and point the
+deploy subcommand at it:
+
+    python nodered_standin.py --port 1880
+    python genstate.py deploy values-leipzig.txt --url http://127.0.0.1:1880
+"""
+import argparse
+import hashlib
+import json
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FlowStore:
+    """In-memory flow configuration with a content-derived revision."""
+
+    def __init__(self, flows=None):
+        self.lock = threading.Lock()
+        self.flows = list(flows or [])
+        self.deploys = 0
+        self.requests = []  # (method, path) in arrival order
+
+    @property
+    def rev(self):
+        return hashlib.md5(json.dumps(self.flows, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def replace_flow(self, flow_id, flow):
+        """Replaces one tab and its nodes (or the global configs for 'global')."""
+        if flow_id == "global":
+            self.flows = [node for node in self.flows if node.get("z") or node.get("type") == "tab"]
+            self.flows.extend(flow.get("configs", []))
+            return
+        self.flows = [node for node in self.flows if node["id"] != flow_id and node.get("z") != flow_id]
+        self.flows.append({"id": flow_id, "type": "tab", "label": flow.get("label", ""),
+                           "disabled": flow.get("disabled", False), "info": flow.get("info", "")})
+        for node in flow.get("nodes", []) + flow.get("configs", []):
+            self.flows.append(dict(node, z=flow_id))
+
+    def get_flow(self, flow_id):
+        if flow_id == "global":
+            return {"id": "global", "configs": [node for node in self.flows
+                                                if not node.get("z") and node.get("type") != "tab"]}
+        tabs = [node for node in self.flows if node["id"] == flow_id and node.get("type") == "tab"]
+        if not tabs:
+            return None
+        return dict(tabs[0], nodes=[node for node in self.flows if node.get("z") == flow_id], configs=[])
+
+
+class AdminHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def store(self):
+        return self.server.store
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length)) if length else None
+
+    def _send(self, status, body=None):
+        data = b"" if body is None else json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self.store.requests.append(("GET", self.path))
+        with self.store.lock:
+            if self.path == "/flows":
+                return self._send(200, {"rev": self.store.rev, "flows": self.store.flows})
+            if self.path.startswith("/flow/"):
+                flow = self.store.get_flow(self.path[len("/flow/"):])
+                return self._send(200, flow) if flow is not None else self._send(404, {"code": "not_found"})
+        self._send(404, {"code": "not_found"})
+
+    def do_POST(self):
+        self.store.requests.append(("POST", self.path))
+        body = self._body()
+        with self.store.lock:
+            if self.path == "/flows":
+                if body.get("rev") and body["rev"] != self.store.rev:
+                    return self._send(409, {"code": "version_mismatch"})
+                self.store.flows = body["flows"]
+                self.store.deploys += 1
+                return self._send(200, {"rev": self.store.rev})
+            if self.path == "/flow":
+                flow_id = uuid.uuid4().hex[:16]
+                self.store.replace_flow(flow_id, body)
+                self.store.deploys += 1
+                return self._send(200, {"id": flow_id})
+        self._send(404, {"code": "not_found"})
+
+    def do_PUT(self):
+        self.store.requests.append(("PUT", self.path))
+        body = self._body()
+        with self.store.lock:
+            if self.path.startswith("/flow/"):
+                flow_id = self.path[len("/flow/"):]
+                if flow_id != "global" and self.store.get_flow(flow_id) is None:
+                    return self._send(404, {"code": "not_found"})
+                self.store.replace_flow(flow_id, body)
+                self.store.deploys += 1
+                return self._send(200, {"id": flow_id})
+        self._send(404, {"code": "not_found"})
+
+
+def serve(host="127.0.0.1", port=0, flows=None):
+    """Starts the stand-in in a background thread. Returns the server (server.store, server.server_port)."""
+    server = ThreadingHTTPServer((host, port), AdminHandler)
+    server.store = FlowStore(flows)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the Node-RED Admin API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1880)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), AdminHandler)
+    server.store = FlowStore()
+    print(f"Node-RED Admin API stand-in listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,100 @@
+"""
+Persistence policy: per-sensor saveInterval/historyCount.
+
+Every shared-state used to be persisted every 30s (historyCount 2), and
+that stays the setting of every sensor the configuration says nothing
+about. Per-data-type and per-keyword settings are layered on the default
+(a keyword's over its data type's). When the sensor's change rate
+(changes per hour) is known, it picks a tier (the busiest sensors get
+the longest interval, since what is saved is stale again at once and
+only has to survive a restart), which replaces the layered settings
+except that a configured data-type or keyword saveInterval is kept as
+the shortest interval: a rate can make a sensor slower than its type
+asks for, never faster. The result is clamped to the configured bounds
+(globally and per keyword, so alarms can be pinned). Configuration lives
+in the rules file under "persistence":
+
+    "persistence": {
+        "default": {"saveInterval": 30000, "historyCount": 2},
+        "tiers": [{"max_changes_per_hour": 2, "saveInterval": 600000, "historyCount": 1}, ...],
+        "dataTypes": {"bool": {...}},
+        "keywords": {"temperature": {...}},
+        "bounds": {"min_interval": 5000, "max_interval": 600000,
+                   "keywords": {"störung": {"min_interval": 30000, "max_interval": 30000}}}
+    }
+"""
+from registry import sensor_key
+from stats import FieldStats, csv_rows, parse_time, row_key
+
+DEFAULT_PERSISTENCE = {"saveInterval": 30000, "historyCount": 2}
+
+
+def load_change_rates(path):
+    """
+    Loads per-sensor change rates (changes per hour), keyed like registry.sensor_key.
+
+    Accepts either a precomputed table with 'topic', '_field' and
+    'changes_per_hour' columns, or a raw history export with '_time',
+    '_value', '_field' and 'topic' columns, from which the rate is derived.
+    """
+    rates = {}
+    history = {}
+    for row in csv_rows(path):
+        if row.get("changes_per_hour") not in (None, ""):
+            rates[row_key(row)] = float(row["changes_per_hour"])
+        elif row.get("_time") and "_value" in row:
+            stats = history.get(row_key(row))
+            if stats is None:
+                stats = history[row_key(row)] = FieldStats()
+            stats.add(row["_value"], parse_time(row["_time"]))
+    return dict(rates_from_stats(history), **rates)
+
+
+def rates_from_stats(table):
+    """Returns the change rates of a {sensor key: FieldStats} table (see stats.py)."""
+    return {key: stats.changes_per_hour for key, stats in table.items() if stats.changes_per_hour is not None}
+
+
+class PersistencePolicy:
+    def __init__(self, rules):
+        config = rules.get("persistence", {})
+        self.default = dict(DEFAULT_PERSISTENCE, **config.get("default", {}))
+        self.tiers = sorted(config.get("tiers", []),
+                            key=lambda tier: float("inf") if tier.get("max_changes_per_hour") is None
+                            else tier["max_changes_per_hour"])
+        self.data_types = config.get("dataTypes", {})
+        self.keywords = config.get("keywords", {})
+        bounds = config.get("bounds", {})
+        self.min_interval = bounds.get("min_interval", 0)
+        self.max_interval = bounds.get("max_interval", float("inf"))
+        self.keyword_bounds = bounds.get("keywords", {})
+
+    def _tier(self, rate):
+        for tier in self.tiers:
+            limit = tier.get("max_changes_per_hour")
+            if limit is None or rate <= limit:
+                return tier
+        return None
+
+    def decide(self, record, rate=None):
+        """Returns (saveInterval ms, historyCount) for one sensor record."""
+        configured = dict(self.data_types.get(record["dataType"], {}), **self.keywords.get(record["keyword"], {}))
+        setting = dict(self.default, **configured)
+        tier = self._tier(rate) if rate is not None else None
+        if tier is not None:
+            setting.update(tier)
+            if "saveInterval" in configured:
+                setting["saveInterval"] = max(setting["saveInterval"], configured["saveInterval"])
+
+        interval = setting["saveInterval"]
+        keyword_bounds = self.keyword_bounds.get(record["keyword"], {})
+        interval = max(interval, keyword_bounds.get("min_interval", 0), self.min_interval)
+        interval = min(interval, keyword_bounds.get("max_interval", float("inf")), self.max_interval)
+        return int(interval), int(setting["historyCount"])
+
+    def apply(self, records, rates=None):
+        """Sets 'saveInterval' and 'historyCount' on every record in place."""
+        rates = rates or {}
+        for record in records:
+            record["saveInterval"], record["historyCount"] = self.decide(record, rates.get(sensor_key(record)))
+        return records
@@ -0,0 +1,132 @@
+"""
+Stage-level profiling for the genstate pipeline (--profile REPORT).
+
+The pipeline runs its stages inside Profiler.stage(); each stage records
+wall time, net allocated and peak traced memory (tracemalloc). The
+classifier's hot helpers (device lookup, sanitize, keyword and alarm
+matching) are wrapped to count calls and accumulate their time; those
+timings are part of the enclosing parse/classify stage. Rule hit counts
+record which keyword each description matched, including 'unknown'.
+Timings include the tracing overhead, so compare stages with each other
+rather than with an unprofiled run.
+
+The default NullProfiler does nothing, so unprofiled runs pay no cost.
+"""
+import json
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+
+class NullProfiler:
+    enabled = False
+
+    def stage(self, name):
+        return nullcontext()
+
+    def instrument(self, classifier):
+        pass
+
+    def count(self, group, key, n=1):
+        pass
+
+
+class Profiler:
+    enabled = True
+
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.stages = {}
+        self.helpers = {}
+        self.hits = {}
+        self.started = time.perf_counter()
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name):
+        if self.memory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = self.stages.setdefault(name, {"seconds": 0.0, "runs": 0, "allocated_kb": None, "peak_kb": None})
+            entry["seconds"] += time.perf_counter() - started
+            entry["runs"] += 1
+            if self.memory:
+                current, peak = tracemalloc.get_traced_memory()
+                entry["allocated_kb"] = round((current - before) / 1024, 1)
+                entry["peak_kb"] = round((peak - before) / 1024, 1)
+
+    def timed(self, name, func):
+        """Wraps func so its calls and time are accumulated under name."""
+        entry = self.helpers.setdefault(name, {"calls": 0, "seconds": 0.0})
+        perf_counter = time.perf_counter
+
+        def wrapper(*args):
+            started = perf_counter()
+            try:
+                return func(*args)
+            finally:
+                entry["seconds"] += perf_counter() - started
+                entry["calls"] += 1
+        return wrapper
+
+    def count(self, group, key, n=1):
+        self.hits.setdefault(group, Counter())[key] += n
+
+    def instrument(self, classifier):
+        """Wraps the classifier's helpers and counts rule hits."""
+        match_keyword = self.timed("keyword", classifier.match_keyword)
+        match_alarm = self.timed("alarm", classifier.match_alarm)
+
+        def counted_keyword(description):
+            hit = match_keyword(description)
+            self.count("keywords", hit[0])
+            return hit
+
+        def counted_alarm(description, s_description):
+            hit = match_alarm(description, s_description)
+            if hit is not None:
+                self.count("alarms", hit)
+            return hit
+
+        classifier.match_device = self.timed("device", classifier.match_device)
+        classifier.sanitize = self.timed("sanitize", classifier.sanitize)
+        classifier.match_keyword = counted_keyword
+        classifier.match_alarm = counted_alarm
+
+    def report(self, **extra):
+        """Returns the machine-readable report."""
+        if self.memory:
+            tracemalloc.stop()
+        return dict(extra, **{
+            "seconds": round(time.perf_counter() - self.started, 4),
+            "memory_traced": self.memory,
+            "stages": {name: dict(entry, seconds=round(entry["seconds"], 4)) for name, entry in self.stages.items()},
+            "helpers": {name: dict(entry, seconds=round(entry["seconds"], 4)) for name, entry in self.helpers.items()},
+            "hits": {group: dict(counter.most_common()) for group, counter in self.hits.items()},
+        })
+
+
+def write_report(report, path, stream=sys.stderr):
+    """Writes the report as JSON and prints a short summary."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    total = sum(entry["seconds"] for entry in report["stages"].values()) or 1
+    print(f"{'stage':<12} {'seconds':>9} {'share':>6} {'alloc KB':>10} {'peak KB':>10}", file=stream)
+    for name, entry in report["stages"].items():
+        print(f"{name:<12} {entry['seconds']:>9.4f} {entry['seconds'] / total:>6.1%} "
+              f"{entry['allocated_kb'] if entry['allocated_kb'] is not None else '-':>10} "
+              f"{entry['peak_kb'] if entry['peak_kb'] is not None else '-':>10}", file=stream)
+    for name, entry in report["helpers"].items():
+        print(f"  {name:<10} {entry['seconds']:>9.4f} {entry['calls']:>10} calls", file=stream)
+    keywords = report["hits"].get("keywords", {})
+    if keywords:
+        print(f"keywords: {', '.join(f'{key}={n}' for key, n in keywords.items())}", file=stream)
+    print(f"Profile written to {path}", file=stream)
@@ -0,0 +1,114 @@
+"""
+Global name registry for generated shared-state names.
+
+sanitize() maps many distinct addresses/descriptions onto the same name.
+The registry gives every sensor (identified by project, topic and field,
+so sites sharing topics stay apart) a unique name/lbl: the first sensor
+keeps the plain name, later ones get a deterministic '_2', '_3', ...
+suffix. Assignments can be persisted, per project, so a sensor keeps its
+name across runs even if new collisions appear later and an
+already-deployed state is never renamed. Files written before projects
+were recorded (version 1) are read with the project taken from the first
+segment of each topic.
+
+Lookups and claims are dict operations, with a per-name next-suffix
+counter, so resolving stays O(1) per sensor.
+"""
+import json
+import os
+
+
+def sensor_key(record):
+    """Identity of a sensor within its site's data (history, change rates)."""
+    return f"{record['topic']}#{record['field']}"
+
+
+def site_key(record):
+    """Stable identity of a sensor across sites and runs, like common/sensordb.py."""
+    return f"{record['project']}:{sensor_key(record)}"
+
+
+class NameRegistry:
+    def __init__(self, path=None):
+        self.path = path
+        self.assigned = {}      # sensor key -> (name, lbl)
+        self.names = {}         # name -> sensor key
+        self.labels = {}        # lbl -> sensor key
+        self.next_suffix = {}   # base name/lbl -> next suffix to try
+        self.collisions = []
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def load(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("version", 1) < 2:
+            projects = {}
+            for key, entry in data.get("sensors", {}).items():
+                projects.setdefault(key.split("/", 1)[0], {})[key] = entry
+        else:
+            projects = data.get("projects", {})
+        for project, sensors in projects.items():
+            for key, entry in sensors.items():
+                self._claim(f"{project}:{key}", entry["name"], entry["lbl"])
+
+    def save(self, path=None):
+        path = path or self.path
+        if not path:
+            return
+        projects = {}
+        for key, (name, lbl) in self.assigned.items():
+            project, key = key.split(":", 1)
+            projects.setdefault(project, {})[key] = {"name": name, "lbl": lbl}
+        data = {"version": 2, "projects": projects}
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, path)
+
+    def _claim(self, key, name, lbl):
+        self.assigned[key] = (name, lbl)
+        self.names[name] = key
+        self.labels[lbl] = key
+
+    def _unique(self, index, base, key):
+        """Returns base, or base with the first free deterministic suffix."""
+        if index.get(base, key) == key:
+            return base
+        suffix = self.next_suffix.get(base, 2)
+        while index.get(f"{base}_{suffix}", key) != key:
+            suffix += 1
+        self.next_suffix[base] = suffix + 1
+        return f"{base}_{suffix}"
+
+    def resolve(self, record):
+        """Sets a unique 'name' and 'lbl' on the record in place. Returns the record."""
+        key = site_key(record)
+        known = self.assigned.get(key)
+        if known is not None:
+            record["name"], record["lbl"] = known
+            return record
+
+        base_name, base_lbl = record["name"], record["lbl"]
+        name = self._unique(self.names, base_name, key)
+        lbl = self._unique(self.labels, base_lbl, key)
+        if name != base_name or lbl != base_lbl:
+            self.collisions.append({"sensor": key, "name": base_name, "lbl": base_lbl,
+                                    "resolved_name": name, "resolved_lbl": lbl,
+                                    "shadowed_by": self.names.get(base_name) or self.labels.get(base_lbl)})
+
+        self._claim(key, name, lbl)
+        record["name"], record["lbl"] = name, lbl
+        return record
+
+    def resolve_all(self, records):
+        for record in records:
+            self.resolve(record)
+        return records
+
+    def report(self, stream):
+        """Prints the collisions resolved during this run."""
+        for collision in self.collisions:
+            print(f"collision: {collision['sensor']} -> {collision['resolved_name']} "
+                  f"({collision['name']} already used by {collision['shadowed_by']})", file=stream)
+        print(f"{len(self.assigned)} names registered, {len(self.collisions)} collisions resolved", file=stream)
@@ -0,0 +1,222 @@
+"""
+Streaming per-field statistics.
+
+One pass over exported history (or a values file) keeps a fixed-size
+accumulator per sensor: sample count, maximum number of decimals,
+min/max, Welford mean/variance, changes and first/last timestamp. Memory
+grows with the number of sensors, never with the number of rows, and no
+per-sensor queries are needed. genstate uses the result to fill
+precision and numMin/numMax, and policy.py the update frequency.
+
+Accepted files are Influx CSV exports (plain or annotated) with '_value'
+(or 'state_value'), '_field', 'topic' and optionally '_time' columns.
+"""
+import csv
+import math
+from datetime import datetime
+
+from classify import get_precision_from_value
+from registry import sensor_key
+
+# Observed ranges are widened to mean ± RANGE_SIGMA·σ and then padded by
+# RANGE_MARGIN of their width, so numMin/numMax don't reject the next extreme.
+# A range is only derived from at least RANGE_MIN_SAMPLES numeric samples
+# and, for timed samples, RANGE_MIN_HOURS of history; a handful of readings
+# says nothing about the limits of a sensor.
+DEFAULT_STATISTICS = {
+    "max_decimals": 6,
+    "range_sigma": 4,
+    "range_margin": 0.1,
+    "range_min_samples": 20,
+    "range_min_hours": 24,
+}
+
+
+def parse_time(text):
+    """Parses an RFC 3339 timestamp (as exported by Influx) to epoch seconds."""
+    text = text.strip().replace("Z", "+00:00")
+    if "." in text:
+        # Influx writes nanoseconds; datetime takes at most microseconds
+        head, tail = text.split(".", 1)
+        digits = len(tail) - len(tail.lstrip("0123456789"))
+        text = f"{head}.{tail[:min(digits, 6)]}{tail[digits:]}"
+    return datetime.fromisoformat(text).timestamp()
+
+
+def csv_rows(path):
+    """Yields dict rows from a plain or Influx annotated CSV export."""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        header = None
+        for row in csv.reader(f):
+            # Blank lines and '#' annotations separate the tables of an annotated export
+            if not row or row[0].startswith('#'):
+                header = None
+                continue
+            if header is None:
+                header = row
+                continue
+            yield dict(zip(header, row))
+
+
+def row_key(row):
+    """Sensor key of an export row, matching registry.sensor_key."""
+    return f"{row.get('topic', '')}#{row.get('_field', 'value')}"
+
+
+class FieldStats:
+    """Running statistics of one field."""
+
+    __slots__ = ("count", "numeric", "decimals", "minimum", "maximum", "mean", "m2",
+                 "changes", "last", "first_time", "last_time")
+
+    def __init__(self):
+        self.count = 0
+        self.numeric = 0
+        self.decimals = 0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.changes = 0
+        self.last = None
+        self.first_time = None
+        self.last_time = None
+
+    def add(self, value, when=None):
+        """Adds one sample (the raw value string and an optional epoch time)."""
+        value = value.strip()
+        self.count += 1
+        if self.last is not None and value != self.last:
+            self.changes += 1
+        self.last = value
+
+        if when is not None:
+            if self.first_time is None or when < self.first_time:
+                self.first_time = when
+            if self.last_time is None or when > self.last_time:
+                self.last_time = when
+
+        try:
+            number = float(value)
+        except ValueError:
+            return
+        if not math.isfinite(number):
+            return
+        self.numeric += 1
+        self.decimals = max(self.decimals, get_precision_from_value(value))
+        self.minimum = min(self.minimum, number)
+        self.maximum = max(self.maximum, number)
+        delta = number - self.mean
+        self.mean += delta / self.numeric
+        self.m2 += delta * (number - self.mean)
+
+    @property
+    def variance(self):
+        return self.m2 / (self.numeric - 1) if self.numeric > 1 else 0.0
+
+    @property
+    def hours(self):
+        if self.first_time is None or self.last_time <= self.first_time:
+            return None
+        return (self.last_time - self.first_time) / 3600
+
+    @property
+    def changes_per_hour(self):
+        hours = self.hours
+        return None if hours is None else self.changes / hours
+
+    @property
+    def samples_per_hour(self):
+        hours = self.hours
+        return None if hours is None else self.count / hours
+
+    def value_range(self, sigma=DEFAULT_STATISTICS["range_sigma"], margin=DEFAULT_STATISTICS["range_margin"],
+                    min_samples=DEFAULT_STATISTICS["range_min_samples"],
+                    min_hours=DEFAULT_STATISTICS["range_min_hours"]):
+        """
+        Returns a (low, high) validation range around the observed values, or
+        None with fewer than min_samples numeric samples or, if the samples
+        are timed, less than min_hours between the first and the last.
+        """
+        if not self.numeric or self.numeric < min_samples:
+            return None
+        if self.first_time is not None and (self.hours or 0) < min_hours:
+            return None
+        spread = sigma * math.sqrt(self.variance)
+        low = min(self.minimum, self.mean - spread)
+        high = max(self.maximum, self.mean + spread)
+        pad = margin * (high - low) or margin * abs(self.mean) or 1
+        return low - pad, high + pad
+
+    def as_dict(self):
+        return {
+            "count": self.count, "decimals": self.decimals,
+            "min": self.minimum if self.numeric else None, "max": self.maximum if self.numeric else None,
+            "mean": self.mean if self.numeric else None, "variance": self.variance,
+            "changes_per_hour": self.changes_per_hour, "samples_per_hour": self.samples_per_hour,
+        }
+
+
+def collect(samples):
+    """Builds {sensor key: FieldStats} from (key, value string, epoch time or None) samples."""
+    table = {}
+    for key, value, when in samples:
+        stats = table.get(key)
+        if stats is None:
+            stats = table[key] = FieldStats()
+        stats.add(value, when)
+    return table
+
+
+def export_samples(path):
+    """Yields (key, value, time) samples from an Influx CSV export."""
+    for row in csv_rows(path):
+        value = row.get("_value", row.get("state_value"))
+        if value is None:
+            continue
+        when = row.get("_time")
+        yield row_key(row), value, parse_time(when) if when else None
+
+
+def load_field_stats(path):
+    """Returns {sensor key: FieldStats} for an Influx CSV export."""
+    return collect(export_samples(path))
+
+
+def statistics_options(rules=None):
+    options = dict(DEFAULT_STATISTICS)
+    if rules:
+        options.update(rules.get("statistics", {}))
+    return options
+
+
+def _round(number, decimals, up):
+    scale = 10 ** decimals
+    rounded = (math.ceil if up else math.floor)(number * scale) / scale
+    return f"{rounded:.{decimals}f}"
+
+
+def apply_stats(records, table, rules=None):
+    """
+    Fills precision and numMin/numMax of numeric records from their field
+    statistics. A precision fixed in the rules file is kept; numMin/numMax
+    stay empty while there is too little history for a range.
+    """
+    options = statistics_options(rules)
+    devices = (rules or {}).get("devices", {})
+    for record in records:
+        stats = table.get(sensor_key(record))
+        if stats is None or not stats.numeric or record["dataType"] != "num":
+            continue
+        field_rules = devices.get(record["device"], {}).get("fields", {}).get(record["field"].replace('-', ''), {})
+        if field_rules.get("precision") is None:
+            record["precision"] = str(min(stats.decimals, options["max_decimals"]))
+        decimals = int(record["precision"])
+        value_range = stats.value_range(options["range_sigma"], options["range_margin"],
+                                        options["range_min_samples"], options["range_min_hours"])
+        if value_range is None:
+            continue
+        low, high = value_range
+        record["numMin"] = _round(low, decimals, up=False)
+        record["numMax"] = _round(high, decimals, up=True)
+    return records
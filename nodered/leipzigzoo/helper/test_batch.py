@@ -0,0 +1,58 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from batch import discover_sites, run_batch
+from registry import NameRegistry
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class FailingRegistry(NameRegistry):
+    """Fails to resolve the sensors of one project."""
+
+    def __init__(self, project):
+        super().__init__()
+        self.project = project
+
+    def resolve(self, record):
+        if record["project"] == self.project:
+            raise ValueError("registry is broken")
+        return super().resolve(record)
+
+
+class RunBatchTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.sites_dir = os.path.join(self.tmp, "sites")
+        os.makedirs(self.sites_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _site(self, filename):
+        shutil.copy(os.path.join(HERE, "values-leipzig.txt"), os.path.join(self.sites_dir, filename))
+
+    def test_duplicate_site_names_are_rejected(self):
+        self._site("x.txt")
+        self._site("x.csv")
+        with self.assertRaises(ValueError):
+            discover_sites(self.sites_dir)
+
+    def test_a_site_failing_in_the_parent_does_not_stop_the_others(self):
+        for name in ("a", "b", "c"):
+            self._site(f"{name}.txt")
+        sites = discover_sites(self.sites_dir, out_dir=os.path.join(self.tmp, "flows"))
+        results = run_batch(sites, workers=2, registry=FailingRegistry("b"))
+
+        self.assertEqual([result["name"] for result in results], ["a", "b", "c"])
+        self.assertIsNone(results[0]["error"])
+        self.assertIn("registry is broken", results[1]["error"])
+        self.assertIsNone(results[2]["error"])
+        self.assertTrue(os.path.exists(results[2]["output"]))
+        self.assertFalse(os.path.exists(results[1]["output"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
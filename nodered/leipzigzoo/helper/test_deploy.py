@@ -0,0 +1,63 @@
+import os
+import unittest
+
+import nodered_standin
+from deploy import deploy
+from genstate import process_data
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class DeployTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.nodes = process_data(os.path.join(HERE, "values-leipzig.txt"), layout={"max_per_tab": 100})
+        cls.tabs = sum(1 for node in cls.nodes if node["type"] == "tab")
+
+    def setUp(self):
+        self.server = nodered_standin.serve(flows=[{"id": "other", "type": "tab", "label": "kept"}])
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _deployed(self):
+        flows = self.server.store.flows
+        return (sorted(node["label"] for node in flows if node["type"] == "tab"),
+                sum(1 for node in flows if node["type"] == "shared-state"))
+
+    def _assert_deployed(self):
+        labels, states = self._deployed()
+        self.assertEqual(len(labels), self.tabs + 1)
+        self.assertIn("kept", labels)
+        self.assertEqual(states, sum(1 for node in self.nodes if node["type"] == "shared-state"))
+
+    def test_flows_mode_posts_once_and_redeploys_in_place(self):
+        summary = deploy(self.url, self.nodes, mode="flows")
+        self.assertEqual(summary["tabs"], self.tabs)
+        self.assertEqual([request for request in self.server.store.requests if request[0] == "POST"],
+                         [("POST", "/flows")])
+        self._assert_deployed()
+        first = self.server.store.flows
+
+        deploy(self.url, self.nodes, mode="flows")
+        self._assert_deployed()
+        self.assertEqual(sorted(node["id"] for node in self.server.store.flows),
+                         sorted(node["id"] for node in first))
+
+    def test_flow_mode_deploys_the_global_configs_first(self):
+        summary = deploy(self.url, self.nodes, mode="flow")
+        self.assertEqual(summary["created"], self.tabs)
+        writes = [request for request in self.server.store.requests if request[0] in ("PUT", "POST")]
+        self.assertEqual(writes[0], ("PUT", "/flow/global"))
+        self.assertEqual(len(writes), self.tabs + 1)
+        self._assert_deployed()
+
+        summary = deploy(self.url, self.nodes, mode="flow")
+        self.assertEqual((summary["created"], summary["updated"]), (0, self.tabs))
+        self._assert_deployed()
+
+
+if __name__ == "__main__":
+    unittest.main()
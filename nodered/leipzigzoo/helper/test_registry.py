@@ -0,0 +1,82 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from batch import discover_sites, run_batch
+from catalogue import Sensor
+from genstate import open_catalogue
+from registry import NameRegistry
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TOPIC = "leipzigzoo/11|--000-01-01-S066.01-4839-FB_AI.01|cushion pressure"
+
+
+def _sensor(project, topic=TOPIC):
+    return Sensor(f"{project}_11_S066", f"{project.upper()}_11_S066_cushion_pressure", project, "11", "pressure",
+                  "num", "2", "Pa", topic, "value", "250.00")
+
+
+class NameRegistryTest(unittest.TestCase):
+    def test_projects_sharing_a_topic_are_separate_sensors(self):
+        registry = NameRegistry()
+        a, b = registry.resolve(_sensor("a")), registry.resolve(_sensor("b"))
+        self.assertEqual((a["name"], b["name"]), ("a_11_S066", "b_11_S066"))
+        self.assertEqual(len(registry.assigned), 2)
+
+    def test_colliding_names_of_two_projects_get_a_suffix(self):
+        registry = NameRegistry()
+        first = registry.resolve(_sensor("a"))
+        second = _sensor("b")
+        second["name"], second["lbl"] = first["name"], first["lbl"]
+        registry.resolve(second)
+        self.assertEqual(second["name"], "a_11_S066_2")
+        self.assertEqual(len(registry.collisions), 1)
+
+    def test_save_and_load_keep_projects(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "registry.json")
+            registry = NameRegistry(path)
+            registry.resolve_all([_sensor("a"), _sensor("b")])
+            registry.save()
+            with open(path, 'r', encoding='utf-8') as f:
+                self.assertEqual(sorted(json.load(f)["projects"]), ["a", "b"])
+            self.assertEqual(NameRegistry(path).assigned, registry.assigned)
+
+    def test_version_1_files_take_the_project_from_the_topic(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "registry.json")
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({"version": 1, "sensors": {f"{TOPIC}#value": {"name": "old", "lbl": "OLD"}}}, f)
+            self.assertEqual(NameRegistry(path).resolve(_sensor("leipzigzoo"))["name"], "old")
+
+
+class BatchOverlappingTopicsTest(unittest.TestCase):
+    def test_two_sites_with_the_same_topics(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            sites_dir = os.path.join(tmp, "sites")
+            os.makedirs(sites_dir)
+            for name in ("a", "b"):
+                shutil.copy(os.path.join(HERE, "values-leipzig.txt"), os.path.join(sites_dir, f"{name}.txt"))
+            catalogue = os.path.join(tmp, "sensors.db")
+            registry = NameRegistry()
+            results = run_batch(discover_sites(sites_dir, out_dir=os.path.join(tmp, "flows")), workers=2,
+                                registry=registry, catalogue=catalogue)
+
+            self.assertEqual([result["error"] for result in results], [None, None])
+            rows = results[0]["rows"]
+            self.assertEqual(results[1]["rows"], rows)
+            self.assertEqual(len(registry.assigned), 2 * rows)
+            for result in results:
+                with open(result["output"], 'r', encoding='utf-8') as f:
+                    names = [node["name"] for node in json.load(f) if node.get("type") == "shared-state"]
+                self.assertTrue(names)
+                self.assertTrue(all(name.startswith(f"{result['name']}_") for name in names))
+            with open_catalogue(catalogue) as db:
+                self.assertEqual(len(db.sensors(site="a")), rows)
+                self.assertEqual(len(db.sensors(site="b")), rows)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+from catalogue import Sensor
+from stats import FieldStats, apply_stats, collect
+
+TOPIC = "leipzigzoo/11|--000-01-01-S066.01-4839-FB_AI.01|cushion pressure"
+KEY = f"{TOPIC}#value"
+
+
+def _record():
+    return Sensor("leipzigzoo_11_S066", "LZ_11_S066_cushion_pressure", "leipzigzoo", "11", "pressure", "num", "2",
+                  "Pa", TOPIC, "value", "250.00")
+
+
+class ApplyStatsTest(unittest.TestCase):
+    def test_single_sample_sets_no_range(self):
+        record = _record()
+        apply_stats([record], collect([(KEY, "251.25", None)]))
+        self.assertEqual(record["precision"], "2")
+        self.assertIsNone(record["numMin"])
+        self.assertIsNone(record["numMax"])
+
+    def test_short_history_sets_no_range(self):
+        record = _record()
+        apply_stats([record], collect((KEY, f"{250 + i % 5}.00", 60.0 * i) for i in range(100)))
+        self.assertIsNone(record["numMin"])
+
+    def test_enough_history_sets_range(self):
+        record = _record()
+        apply_stats([record], collect((KEY, f"{250 + i % 5}.00", 3600.0 * i) for i in range(48)))
+        self.assertLessEqual(float(record["numMin"]), 250)
+        self.assertGreaterEqual(float(record["numMax"]), 254)
+
+    def test_thresholds_are_configurable(self):
+        record = _record()
+        rules = {"statistics": {"range_min_samples": 1, "range_min_hours": 0}}
+        apply_stats([record], collect([(KEY, "251.25", None)]), rules)
+        self.assertIsNotNone(record["numMin"])
+
+
+class ValueRangeTest(unittest.TestCase):
+    def test_untimed_samples_need_only_the_count(self):
+        stats = FieldStats()
+        for i in range(20):
+            stats.add(str(i))
+        self.assertIsNotNone(stats.value_range())
+        self.assertIsNone(stats.value_range(min_samples=21))
+
+
+if __name__ == "__main__":
+    unittest.main()